@@ -0,0 +1,243 @@
+"""
+Asyncio-native translation client for the FastAPI service.
+
+Talks to the Google Translate web endpoint (the same one googletrans uses)
+through a shared httpx connection pool, limits concurrent requests, and
+retries rate-limit responses with jittered exponential backoff. Requests
+share the "google" circuit breaker with translate.py (see resilience.py).
+Point TRANSLATE_ENDPOINT at translate_stub.py to load-test offline.
+
+Load test:
+    python translate_stub.py --port 8765 --max-rps 50 &
+    python async_translate.py --endpoint http://127.0.0.1:8765/translate_a/single -n 500 -c 32
+"""
+
+import os
+import time
+import random
+import asyncio
+import argparse
+
+import httpx
+
+import metrics
+from resilience import get_breaker, time_left
+from translate import (HTTP_TIMEOUT_ERRORS, get_translation_memory, memory_key, split_segments,
+                       join_segments, translate_local)
+
+DEFAULT_ENDPOINT = "https://translate.googleapis.com/translate_a/single"
+RETRY_STATUS = (429, 503)
+# Failed requests; httpx 0.13 re-exports httpcore's network and timeout
+# errors, which are not httpx.HTTPError subclasses
+REQUEST_ERRORS = (httpx.HTTPError, httpx.NetworkError, httpx.ProtocolError, httpx.ProxyError) + HTTP_TIMEOUT_ERRORS
+
+
+class RateLimitError(Exception):
+    """Raised when the backend keeps rate limiting after all retries."""
+
+
+def _pool_limits(max_connections: int):
+    # googletrans pins httpx 0.13 (PoolLimits); newer httpx renamed it to Limits
+    if hasattr(httpx, "Limits"):
+        return {"limits": httpx.Limits(max_connections=max_connections,
+                                       max_keepalive_connections=max_connections)}
+    return {"pool_limits": httpx.PoolLimits(max_keepalive=max_connections,
+                                            max_connections=max_connections)}
+
+
+class AsyncTranslator:
+    """Translation client safe to call from async routes.
+
+    One instance should be shared per event loop so requests reuse pooled
+    connections. Results go through the same translation memory as
+    translate.translate_text(); errors are raised, never cached.
+    """
+
+    def __init__(self, endpoint: str = None, max_concurrency: int = 8, timeout: float = 10.0,
+                 max_retries: int = 5, backoff_base: float = 0.5, backoff_max: float = 10.0,
+                 use_memory: bool = True, use_local: bool = True, breaker=None):
+        self.endpoint = endpoint or os.environ.get("TRANSLATE_ENDPOINT", DEFAULT_ENDPOINT)
+        self.breaker = breaker or get_breaker("google")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.memory = get_translation_memory() if use_memory else None
+        self.use_local = use_local
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = httpx.AsyncClient(timeout=timeout, **_pool_limits(max_concurrency))
+        self.stats = {"requests": 0, "retries": 0, "rate_limited": 0, "errors": 0}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    def _backoff(self, attempt: int, retry_after: str = None) -> float:
+        """Full-jitter exponential backoff, honoring Retry-After when given."""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _request(self, text: str, dest: str, src: str) -> str:
+        params = {"client": "gtx", "sl": src, "tl": dest, "dt": "t", "q": text}
+        for attempt in range(self.max_retries + 1):
+            async with self._semaphore:
+                self.stats["requests"] += 1
+                try:
+                    response = await self._client.get(self.endpoint, params=params)
+                except REQUEST_ERRORS:
+                    self.stats["errors"] += 1
+                    if attempt == self.max_retries:
+                        raise
+                    retry_after = None
+                else:
+                    if response.status_code not in RETRY_STATUS:
+                        response.raise_for_status()
+                        data = response.json()
+                        return "".join(part[0] for part in data[0] if part and part[0])
+                    self.stats["rate_limited"] += 1
+                    retry_after = response.headers.get("Retry-After")
+            # Sleep outside the semaphore so other requests can use the slot
+            if attempt < self.max_retries:
+                self.stats["retries"] += 1
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+        raise RateLimitError(f"Still rate limited after {self.max_retries} retries")
+
+    async def _request_batch(self, segments: list, dest: str, src: str) -> list:
+        """Translate several segments, in a single request when line breaks survive."""
+        if len(segments) == 1:
+            return [await self._request(segments[0], dest, src)]
+        joined = await self._request("\n".join(segments), dest, src)
+        parts = joined.split("\n") if joined else []
+        if len(parts) == len(segments):
+            return [part.strip() for part in parts]
+        return list(await asyncio.gather(*(self._request(s, dest, src) for s in segments)))
+
+    def _lookup(self, segments: dict, dest: str):
+        """Answer segments from the phrase table and memory; returns (translations, missing keys).
+
+        Blocking (the memory's disk tier is SQLite), so run it off the event loop.
+        """
+        translations = {}
+        unknown = []
+        local = translate_local(list(segments.values()), dest) if self.use_local else [None] * len(segments)
+        for key, value in zip(segments, local):
+            if value is None:
+                unknown.append(key)
+            else:
+                translations[key] = value
+        missing = []
+        for key in unknown:
+            segment = segments[key]
+            cached = self.memory.get(memory_key(segment, dest)) if self.memory is not None else None
+            if self.memory is not None:
+                metrics.inc(metrics.CACHE_REQUESTS, cache="translation",
+                            result="miss" if cached is None else "hit")
+            if cached is not None:
+                translations[key] = cached
+            else:
+                missing.append(key)
+        return translations, missing
+
+    def _remember(self, pairs: list, dest: str) -> None:
+        """Store (segment, translation) pairs in the memory; blocking like _lookup()."""
+        for segment, value in pairs:
+            self.memory.put(memory_key(segment, dest), value)
+
+    async def translate(self, text: str, dest: str = "en", src: str = "auto", deadline=None) -> str:
+        """Translate text line by line, consulting the phrase table and memory first.
+
+        Only unique lines neither in the phrase table (see
+        translate.get_translation_backends) nor in the memory are sent,
+        batched into one request; the result keeps the original line layout.
+        Sending them, including retries, is bounded by `deadline`
+        (resilience.Deadline).
+
+        Raises:
+            RateLimitError: If the backend is still rate limiting after all retries
+            REQUEST_ERRORS: On other HTTP or network failures, including
+                backend timeouts, after all retries
+            CircuitOpenError: If the circuit breaker is open (nothing is sent)
+            DeadlineExceeded: If the deadline expires first
+        """
+        if not text.strip():
+            return "No text to translate"
+
+        layout, segments = split_segments(text)
+        # Known signage phrases are answered offline, before the memory and network
+        translations, missing = await asyncio.to_thread(self._lookup, segments, dest)
+
+        if missing:
+            if deadline is not None:
+                deadline.check("translate")
+            if not self.breaker.allow():
+                raise self.breaker.reject()
+            try:
+                translated = await asyncio.wait_for(
+                    self._request_batch([segments[key] for key in missing], dest, src), time_left(deadline))
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except asyncio.TimeoutError:
+                if deadline is None:
+                    self.breaker.record_failure()
+                    raise
+                # wait_for gave up because the request deadline ran out; the
+                # backend's own timeout surfaces as an httpx error instead
+                self.breaker.release()
+                raise deadline.exceeded("translate")
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            self.breaker.record_success()
+            for key, value in zip(missing, translated):
+                translations[key] = value or ""
+            if self.memory is not None:
+                await asyncio.to_thread(self._remember, [(segments[key], value) for key, value
+                                                         in zip(missing, translated) if value], dest)
+
+        return join_segments(layout, translations)
+
+    async def translate_many(self, text: str, target_langs) -> dict:
+        """Translate text into several languages concurrently; returns {lang: text}.
+
+        Failed languages map to a 'Translation Error: ...' string.
+        """
+        langs = list(dict.fromkeys(target_langs))
+        results = await asyncio.gather(*(self.translate(text, lang) for lang in langs),
+                                       return_exceptions=True)
+        return {lang: (f"Translation Error: {r}" if isinstance(r, Exception) else r)
+                for lang, r in zip(langs, results)}
+
+
+async def _load_test(endpoint: str, requests: int, concurrency: int, lang: str) -> None:
+    async with AsyncTranslator(endpoint=endpoint, max_concurrency=concurrency, use_memory=False,
+                               use_local=False) as client:
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(client.translate(f"NO PARKING {i}", lang) for i in range(requests)),
+            return_exceptions=True,
+        )
+        elapsed = time.perf_counter() - start
+    failed = sum(isinstance(r, Exception) for r in results)
+    print(f"{requests} translations in {elapsed:.2f}s ({requests / elapsed:.1f}/s), {failed} failed")
+    print(f"HTTP requests: {client.stats['requests']}  retries: {client.stats['retries']}  "
+          f"rate limited: {client.stats['rate_limited']}  errors: {client.stats['errors']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the async translation client")
+    parser.add_argument("--endpoint", default=None, help="Translate endpoint (default: TRANSLATE_ENDPOINT or Google)")
+    parser.add_argument("-n", "--requests", type=int, default=200, help="Number of translations (default: 200)")
+    parser.add_argument("-c", "--concurrency", type=int, default=16, help="Concurrent requests (default: 16)")
+    parser.add_argument("-l", "--lang", default="hi", help="Target language code (default: hi)")
+    args = parser.parse_args()
+
+    asyncio.run(_load_test(args.endpoint, args.requests, args.concurrency, args.lang))
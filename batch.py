@@ -0,0 +1,127 @@
+"""
+Batch mode: run the interpreter pipeline over many images in parallel.
+
+Images are OCR'd on a process pool while translation and guidance of the
+ones already done run on threads in this process (see stage_executor.py).
+Each result is written to a JSONL file as soon as it finishes (completion
+order, keyed by input path). Stage metrics recorded in the workers are
+merged into this process's registry (see metrics.py).
+"""
+
+import os
+import glob
+import json
+import time
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+from guidance import generate_guidance
+from pipeline import init_worker, ocr_image_job
+from stage_executor import run_pipelined
+from translate import translate_text
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
+
+
+def collect_images(source: str) -> list:
+    """Expand a batch source into a list of image paths.
+
+    Args:
+        source: A directory (searched recursively), a glob pattern, or a
+            list file with one image path per line.
+
+    Returns:
+        List of image paths.
+
+    Raises:
+        FileNotFoundError: If the source does not exist or contains no images
+    """
+    if os.path.isdir(source):
+        paths = []
+        for root, _, files in os.walk(source):
+            for name in files:
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    paths.append(os.path.join(root, name))
+        paths.sort()
+    elif glob.has_magic(source):
+        paths = sorted(glob.glob(source, recursive=True))
+    elif os.path.isfile(source):
+        # A list file; blank lines and '#' comments are ignored
+        with open(source, encoding="utf-8") as f:
+            paths = [line.strip() for line in f
+                     if line.strip() and not line.lstrip().startswith("#")]
+    else:
+        raise FileNotFoundError(f"Batch source not found: {source}")
+
+    if not paths:
+        raise FileNotFoundError(f"No images found in batch source: {source}")
+    return paths
+
+
+def run_batch(source: str, output_path: str, target_lang: str = "hi", enable_denoise: bool = False,
+              denoise_method: str = "gaussian", workers: int = None,
+              normalize_text_size: bool = False, detect_regions: bool = False,
+              deadline_seconds: float = None, translation_workers: int = 4) -> dict:
+    """Process every image in `source` and stream results to a JSONL file.
+
+    Args:
+        source: Directory, glob pattern or list file (see collect_images)
+        output_path: JSONL file to write, one result object per line
+        target_lang: Target language for translation
+        enable_denoise: If True, denoise each image before OCR
+        denoise_method: Denoising method ('gaussian', 'nlmeans', 'bilateral')
+        workers: Number of worker processes (default: number of CPUs)
+        normalize_text_size: If True, rescale so text is about 32 px tall before OCR
+        detect_regions: If True, OCR only detected text lines of each image
+        deadline_seconds: Time budget per image (see pipeline.interpret_image)
+        translation_workers: Threads translating while later images are OCR'd
+
+    Returns:
+        Summary dict with 'total', 'ok', 'no_text', 'errors', 'seconds',
+        'images_per_sec' and 'queues' (per-queue depth statistics, see
+        stage_executor.run_pipelined).
+
+    Raises:
+        FileNotFoundError: If the source does not exist or contains no images
+    """
+    images = collect_images(source)
+    workers = workers or os.cpu_count() or 1
+
+    counts = {"ok": 0, "no_text": 0, "error": 0}
+    start_time = time.perf_counter()
+
+    outdir = os.path.dirname(output_path) or "."
+    os.makedirs(outdir, exist_ok=True)
+
+    with open(output_path, "w", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+
+        def write(result):
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+
+        ocr_job = partial(ocr_image_job, enable_denoise=enable_denoise, denoise_method=denoise_method,
+                          normalize_text_size=normalize_text_size, detect_regions=detect_regions,
+                          deadline_seconds=deadline_seconds)
+        # Keep every worker busy plus one job queued each, so huge
+        # backfills don't sit in memory
+        queues = run_pipelined(
+            pool, images, ocr_job,
+            translate=lambda text, deadline: translate_text(text, target_lang, deadline=deadline),
+            guide=generate_guidance, on_result=write,
+            max_inflight=workers * 2, translation_workers=translation_workers,
+            restart_pool=partial(ProcessPoolExecutor, max_workers=workers, initializer=init_worker),
+        )
+
+    elapsed = time.perf_counter() - start_time
+    total = len(images)
+    return {
+        "total": total,
+        "ok": counts["ok"],
+        "no_text": counts["no_text"],
+        "errors": counts["error"],
+        "seconds": elapsed,
+        "images_per_sec": total / elapsed if elapsed > 0 else 0.0,
+        "queues": queues,
+    }
@@ -0,0 +1,84 @@
+"""
+Benchmark: per-call cost of generate_guidance as the number of rules grows.
+
+Compares the compiled multi-pattern engine against a linear chain of
+`keyword in text.lower()` checks (the pre-engine approach).
+
+Run from the repository root: python benchmarks/bench_guidance.py
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from guidance import GuidanceEngine, get_engine  # noqa: E402
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyz"
+SAMPLE_TEXTS = [
+    "NO PARKING\nTOW AWAY ZONE",
+    "DANGER: HIGH VOLTAGE. Keep out.",
+    "STOP - Checkpoint ahead",
+    "Platform 3 ->\nGate B12",
+    "यहाँ पार्किंग मना है",
+    "Welcome to Chennai Central Railway Station, please keep your belongings safe",
+]
+
+
+def synthetic_rules(count: int, seed: int = 0) -> list:
+    """The shipped rules plus `count` random keyword rules (3 keywords each)."""
+    rng = random.Random(seed)
+    rules = list(get_engine().rules)
+    for i in range(count):
+        keywords = ["".join(rng.choice(ALPHABET) for _ in range(rng.randint(5, 12))) for _ in range(3)]
+        rules.append({"id": f"rule{i}", "priority": rng.randint(0, 60), "match": "word",
+                      "message": f"Synthetic rule {i}", "keywords": keywords})
+    return rules
+
+
+def linear_guidance(rules: list, text: str) -> str:
+    """Reference implementation: scan every keyword of every rule."""
+    lowered = text.lower()
+    best = None
+    for rule in rules:
+        keywords = rule["keywords"]
+        if isinstance(keywords, dict):
+            keywords = [k for words in keywords.values() for k in words]
+        if any(k.lower() in lowered for k in keywords):
+            if best is None or rule["priority"] > best["priority"]:
+                best = rule
+    return best["message"] if best else ""
+
+
+def time_per_call(fn, texts: list, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text)
+    return (time.perf_counter() - start) / (repeat * len(texts))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark guidance rule matching")
+    parser.add_argument("--sizes", default="10,100,1000,10000", help="Comma-separated rule counts")
+    parser.add_argument("--repeat", type=int, default=200, help="Passes over the sample texts")
+    args = parser.parse_args()
+
+    print(f"{'rules':>8} {'keywords':>9} {'build ms':>9} {'engine us/call':>15} {'linear us/call':>15}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        rules = synthetic_rules(size)
+        start = time.perf_counter()
+        engine = GuidanceEngine(rules, default="")
+        build_ms = (time.perf_counter() - start) * 1000
+
+        engine_us = time_per_call(engine.match, SAMPLE_TEXTS, args.repeat) * 1e6
+        linear_us = time_per_call(lambda t: linear_guidance(rules, t), SAMPLE_TEXTS,
+                                  max(1, args.repeat // 10)) * 1e6
+        print(f"{len(rules):>8} {len(engine.matcher):>9} {build_ms:>9.1f} {engine_us:>15.1f} {linear_us:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
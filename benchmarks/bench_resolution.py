@@ -0,0 +1,102 @@
+"""
+Benchmark: OCR latency and accuracy with and without text size normalization.
+
+Renders synthetic signboards (known text, scaled to phone-camera sizes, with
+sensor noise), then OCRs each one through the default pipeline at full
+resolution and with normalize_text_size=True. Accuracy is the character
+similarity between the recognized and the rendered text.
+
+Without a Tesseract installation only the preprocessing time is reported.
+
+Run from the repository root: python benchmarks/bench_resolution.py
+"""
+
+import os
+import sys
+import time
+import argparse
+import difflib
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ocr import OCR_PIPELINE, extract_text_scored, get_backend  # noqa: E402
+from preprocess import TEXT_SIZE_PIPELINE, estimate_text_height  # noqa: E402
+
+SIGNS = [
+    ["NO PARKING", "TOW AWAY ZONE"],
+    ["DANGER", "HIGH VOLTAGE", "KEEP OUT"],
+    ["PLATFORM 3", "EXIT GATE B12"],
+]
+# (width, height): 3, 12, 24 and 48 megapixels
+SIZES = [(2000, 1500), (4000, 3000), (5656, 4242), (8000, 6000)]
+
+
+def render_sign(lines: list, size: tuple, seed: int = 0) -> np.ndarray:
+    """Dark text on a light board filling about 70% of the frame width, plus noise."""
+    width, height = size
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    longest = max(lines, key=len)
+    (text_w, _), _ = cv2.getTextSize(longest, font, 1.0, 2)
+    scale = 0.7 * width / text_w
+    thickness = max(1, int(scale * 1.6))
+
+    img = np.full((height, width, 3), (205, 210, 200), np.uint8)
+    line_h = cv2.getTextSize(longest, font, scale, thickness)[0][1]
+    y = (height - len(lines) * line_h * 2) // 2 + line_h
+    for line in lines:
+        (w, _), _ = cv2.getTextSize(line, font, scale, thickness)
+        cv2.putText(img, line, ((width - w) // 2, y), font, scale, (30, 30, 40), thickness, cv2.LINE_AA)
+        y += line_h * 2
+
+    noise = np.random.default_rng(seed).normal(0, 12, img.shape)
+    return np.clip(img + noise, 0, 255).astype(np.uint8)
+
+
+def accuracy(expected: str, actual: str) -> float:
+    return difflib.SequenceMatcher(None, " ".join(expected.split()), " ".join(actual.split())).ratio()
+
+
+def run(sizes, repeat: int) -> None:
+    try:
+        get_backend()
+        have_ocr = True
+    except RuntimeError as e:
+        print(f"OCR unavailable ({e}); timing preprocessing only.\n")
+        have_ocr = False
+
+    print(f"{'size':>11} {'text px':>8} {'mode':>10} {'ocr input':>11} {'seconds':>8} {'accuracy':>9}")
+    for size in sizes:
+        for i, lines in enumerate(SIGNS):
+            img = render_sign(lines, size, seed=i)
+            expected = "\n".join(lines)
+            text_px = estimate_text_height(img)
+            for normalize in (False, True):
+                pipeline = TEXT_SIZE_PIPELINE.then(OCR_PIPELINE) if normalize else OCR_PIPELINE
+                times, score = [], None
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    if have_ocr:
+                        text = extract_text_scored(img, normalize_text_size=normalize).text
+                    else:
+                        pipeline.run(img)
+                    times.append(time.perf_counter() - start)
+                if have_ocr:
+                    score = accuracy(expected, text)
+                # OCR_PIPELINE keeps the size, so only normalization changes it
+                shape = TEXT_SIZE_PIPELINE.run(img).image.shape if normalize else img.shape
+                label = "normalized" if normalize else "fixed"
+                print(f"{size[0]:>5}x{size[1]:<5} {text_px:>8.0f} {label:>10} "
+                      f"{shape[1]:>5}x{shape[0]:<5} {min(times):>8.2f} "
+                      f"{'-' if score is None else f'{score:.2f}':>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark OCR with and without text size normalization")
+    parser.add_argument("--max-mp", type=float, default=48, help="Largest image size in megapixels (default: 48)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case; the fastest is reported (default: 1)")
+    args = parser.parse_args()
+
+    run([s for s in SIZES if s[0] * s[1] <= args.max_mp * 1e6], args.repeat)
@@ -0,0 +1,376 @@
+"""
+Benchmark suite: per-stage latency, throughput and memory on a synthetic corpus.
+
+Generates a deterministic corpus of signboards (text rendered with PIL in
+several scripts and fonts, then degraded with sensor noise, blur or a
+perspective warp) at several resolutions, and times each stage:
+
+    denoise           denoise.denoise_image(), every method
+    extract_text      ocr.extract_text() (skipped without Tesseract)
+    guidance          guidance.generate_guidance()
+    translate         AsyncTranslator against an in-process translate_stub.py
+    translate_memory  translate.translate_text() answered from translation memory
+    translate_phrases translate.translate_text() with the offline phrase table first
+
+Each case records p50/p95/mean latency, throughput and the peak RSS reached
+while it ran. Results are written as JSON; --compare checks them against a
+saved baseline and exits with status 1 if any case regressed.
+
+Run from the repository root:
+    python benchmarks/bench_suite.py -o baseline.json
+    python benchmarks/bench_suite.py --compare baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import difflib
+import argparse
+import platform
+import tempfile
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# Keep the benchmark off the user's persistent caches
+os.environ.setdefault("OCR_CACHE_PATH", "")
+os.environ.setdefault("TRANSLATION_CACHE_PATH", "")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import translate_stub  # noqa: E402
+from async_translate import AsyncTranslator  # noqa: E402
+from denoise import denoise_image  # noqa: E402
+from guidance import generate_guidance  # noqa: E402
+from ocr import extract_text, get_backend  # noqa: E402
+from translate import get_translation_memory, memory_key, translate_text  # noqa: E402
+
+# (script, phrase) pairs; the vocabulary real signboards use
+PHRASES = {
+    "latin": ["NO PARKING", "EXIT", "DANGER\nHIGH VOLTAGE", "PLATFORM 3", "NO ENTRY"],
+    "devanagari": ["पार्किंग निषेध", "निकास", "खतरा"],
+    "cyrillic": ["ВЫХОД", "СТОЯНКА ЗАПРЕЩЕНА"],
+    "greek": ["ΕΞΟΔΟΣ", "ΚΙΝΔΥΝΟΣ"],
+}
+# Font files tried per script, in order; every one found is used in turn
+FONT_CANDIDATES = {
+    "latin": ["DejaVuSans.ttf", "DejaVuSerif-Bold.ttf", "DejaVuSansMono.ttf", "LiberationSans-Regular.ttf",
+              "arial.ttf", "Arial.ttf", "times.ttf", "Helvetica.ttc"],
+    "devanagari": ["NotoSansDevanagari-Regular.ttf", "Lohit-Devanagari.ttf", "Nirmala.ttf", "mangal.ttf",
+                   "Kohinoor.ttc"],
+    "cyrillic": ["DejaVuSans.ttf", "DejaVuSerif-Bold.ttf", "arial.ttf", "Arial.ttf"],
+    "greek": ["DejaVuSans.ttf", "DejaVuSerif-Bold.ttf", "arial.ttf", "Arial.ttf"],
+}
+FONT_DIRS = ["/usr/share/fonts", "/usr/local/share/fonts", os.path.expanduser("~/.fonts"),
+             "/Library/Fonts", "/System/Library/Fonts", r"C:\Windows\Fonts"]
+DEGRADATIONS = ("noise", "blur", "perspective")
+# (width, height): 0.3, 2 and 8 megapixels
+RESOLUTIONS = [(640, 480), (1600, 1200), (3264, 2448)]
+DENOISE_METHODS = ("gaussian", "bilateral", "nlmeans")
+SEED = 1234
+
+
+def find_fonts() -> dict:
+    """Map each script to the candidate font files installed on this machine."""
+    installed = {}
+    for root_dir in FONT_DIRS:
+        for root, _, files in os.walk(root_dir):
+            for name in files:
+                installed.setdefault(name.lower(), os.path.join(root, name))
+    fonts = {}
+    for script, names in FONT_CANDIDATES.items():
+        found = [installed[n.lower()] for n in names if n.lower() in installed]
+        fonts[script] = list(dict.fromkeys(found))
+    return fonts
+
+
+def render_sign(text: str, font_path: str, size: tuple, degradation: str, seed: int) -> np.ndarray:
+    """Dark text filling about 70% of a light board, then one degradation. Returns BGR."""
+    width, height = size
+    rng = np.random.default_rng(seed)
+    img = Image.new("RGB", size, (200, 205, 195))
+    draw = ImageDraw.Draw(img)
+
+    # Size the font so the text block is 70% of the width (or 60% of the height)
+    probe = ImageFont.truetype(font_path, 100)
+    left, top, right, bottom = draw.multiline_textbbox((0, 0), text, font=probe, align="center")
+    scale = min(0.7 * width / max(1, right - left), 0.6 * height / max(1, bottom - top))
+    font = ImageFont.truetype(font_path, max(8, int(100 * scale)))
+    left, top, right, bottom = draw.multiline_textbbox((0, 0), text, font=font, align="center")
+    origin = ((width - (right - left)) // 2 - left, (height - (bottom - top)) // 2 - top)
+    draw.multiline_text(origin, text, font=font, fill=(25, 30, 40), align="center")
+    bgr = cv2.cvtColor(np.asarray(img), cv2.COLOR_RGB2BGR)
+
+    if degradation == "blur":
+        bgr = cv2.GaussianBlur(bgr, (0, 0), max(0.8, width / 1000))
+    elif degradation == "perspective":
+        jitter = 0.08 * np.array([width, height], np.float32)
+        src = np.float32([[0, 0], [width, 0], [width, height], [0, height]])
+        dst = src + rng.uniform(-1, 1, src.shape).astype(np.float32) * jitter
+        warp = cv2.getPerspectiveTransform(src, dst)
+        bgr = cv2.warpPerspective(bgr, warp, size, borderMode=cv2.BORDER_REPLICATE)
+    noise = rng.normal(0, 14 if degradation == "noise" else 4, bgr.shape)
+    return np.clip(bgr + noise, 0, 255).astype(np.uint8)
+
+
+def build_corpus(fonts: dict, resolution: tuple, directory: str) -> list:
+    """Render every phrase once per resolution; returns [{'path', 'text', 'script', ...}]."""
+    corpus = []
+    index = 0
+    for script, phrases in PHRASES.items():
+        if not fonts[script]:
+            continue
+        for i, text in enumerate(phrases):
+            font = fonts[script][i % len(fonts[script])]
+            degradation = DEGRADATIONS[index % len(DEGRADATIONS)]
+            img = render_sign(text, font, resolution, degradation, SEED + index)
+            path = os.path.join(directory, f"{resolution[0]}x{resolution[1]}_{index:02d}_{script}.png")
+            cv2.imwrite(path, img)
+            corpus.append({"path": path, "text": text, "script": script,
+                           "font": os.path.basename(font), "degradation": degradation})
+            index += 1
+    return corpus
+
+
+def _reset_peak_rss() -> None:
+    # Linux: writing 5 to clear_refs resets VmHWM, so each case reports its own peak
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:  # Windows
+        return None
+
+
+def measure(fn, items: list, repeat: int) -> dict:
+    """Call fn(item) for every item, `repeat` times; returns latency statistics."""
+    fn(items[0])  # warm-up: imports, OpenCV kernels, connection setup
+    _reset_peak_rss()
+    times = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            t0 = time.perf_counter()
+            fn(item)
+            times.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    times.sort()
+    return {
+        "n": len(times),
+        "p50_ms": round(times[len(times) // 2] * 1000, 3),
+        "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))] * 1000, 3),
+        "mean_ms": round(sum(times) / len(times) * 1000, 3),
+        "throughput_per_s": round(len(times) / elapsed, 3) if elapsed > 0 else None,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def accuracy(expected: str, actual: str) -> float:
+    return difflib.SequenceMatcher(None, " ".join(expected.split()), " ".join(actual.split())).ratio()
+
+
+def bench_images(corpus: list, resolution: str, repeat: int, have_ocr: bool, workdir: str) -> list:
+    results = []
+    for method in DENOISE_METHODS:
+        out = os.path.join(workdir, f"denoised_{method}.png")
+        stats = measure(lambda item: denoise_image(item["path"], out, method=method), corpus, repeat)
+        results.append({"stage": "denoise", "variant": method, "resolution": resolution, **stats})
+        print_case(results[-1])
+
+    if have_ocr:
+        texts = {}
+
+        def ocr(item):
+            texts[item["path"]] = extract_text(item["path"])
+
+        stats = measure(ocr, corpus, repeat)
+        stats["accuracy"] = round(sum(accuracy(i["text"], texts[i["path"]]) for i in corpus) / len(corpus), 3)
+        results.append({"stage": "extract_text", "variant": "default", "resolution": resolution, **stats})
+        print_case(results[-1])
+    return results
+
+
+def bench_text(phrases: list, repeat: int, lang: str) -> list:
+    """Stages that take text, not images: run once, independent of resolution."""
+    results = []
+    stats = measure(generate_guidance, phrases, repeat * 50)
+    results.append({"stage": "guidance", "variant": "default", "resolution": None, **stats})
+    print_case(results[-1])
+
+    # Network path, against a local stub with no added latency
+    server = translate_stub.serve(port=0)
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}/translate_a/single"
+    loop = asyncio.new_event_loop()
+    try:
+        client = AsyncTranslator(endpoint=endpoint, use_memory=False, use_local=False)
+        stats = measure(lambda text: loop.run_until_complete(client.translate(text, lang)), phrases, repeat * 5)
+        loop.run_until_complete(client.aclose())
+    finally:
+        loop.close()
+        server.shutdown()
+    results.append({"stage": "translate", "variant": "async_stub", "resolution": None, **stats})
+    print_case(results[-1])
+
+    # Translation memory hits never reach the network; leave the phrase table
+    # out of the chain so the memory answers
+    memory = get_translation_memory()
+    for text in phrases:
+        for line in text.split("\n"):
+            memory.put(memory_key(line, lang), f"[{lang}] {line}")
+    previous = os.environ.get("TRANSLATION_BACKENDS")
+    os.environ["TRANSLATION_BACKENDS"] = "google"
+    try:
+        stats = measure(lambda text: translate_text(text, lang), phrases, repeat * 50)
+    finally:
+        if previous is None:
+            del os.environ["TRANSLATION_BACKENDS"]
+        else:
+            os.environ["TRANSLATION_BACKENDS"] = previous
+    results.append({"stage": "translate_memory", "variant": "hit", "resolution": None, **stats})
+    print_case(results[-1])
+
+    # Offline phrase table (lines it does not know fall through to the memory)
+    stats = measure(lambda text: translate_text(text, lang), phrases, repeat * 50)
+    results.append({"stage": "translate_phrases", "variant": "default", "resolution": None, **stats})
+    print_case(results[-1])
+    return results
+
+
+def print_case(case: dict) -> None:
+    rss = "-" if case["peak_rss_mb"] is None else f"{case['peak_rss_mb']:.0f}"
+    acc = f"{case['accuracy']:.2f}" if "accuracy" in case else "-"
+    print(f"{case['stage']:>16} {case['variant']:>10} {case['resolution'] or '-':>10} {case['n']:>5} "
+          f"{case['p50_ms']:>9.2f} {case['p95_ms']:>9.2f} {case['throughput_per_s']:>9.1f} {rss:>8} {acc:>6}")
+
+
+def run(resolutions: list, repeat: int, lang: str, corpus_dir: str = None) -> dict:
+    fonts = find_fonts()
+    missing = [script for script, found in fonts.items() if not found]
+    if missing:
+        print(f"No font found for: {', '.join(missing)} (those phrases are skipped)")
+    try:
+        get_backend()
+        have_ocr = True
+    except RuntimeError as e:
+        print(f"OCR unavailable ({e}); extract_text is skipped.")
+        have_ocr = False
+
+    print(f"{'stage':>16} {'variant':>10} {'resolution':>10} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'per sec':>9} {'peak MB':>8} {'acc':>6}")
+    results = []
+    phrases = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for width, height in resolutions:
+            directory = corpus_dir or workdir
+            os.makedirs(directory, exist_ok=True)
+            corpus = build_corpus(fonts, (width, height), directory)
+            if not corpus:
+                raise RuntimeError("No usable fonts found; cannot render the corpus.")
+            phrases = [item["text"] for item in corpus]
+            results += bench_images(corpus, f"{width}x{height}", repeat, have_ocr, workdir)
+        results += bench_text(phrases, repeat, lang)
+
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+            "ocr": have_ocr,
+            "seed": SEED,
+            "repeat": repeat,
+            "fonts": {script: [os.path.basename(f) for f in found] for script, found in fonts.items()},
+        },
+        "results": results,
+    }
+
+
+def _case_key(case: dict) -> tuple:
+    return case["stage"], case["variant"], case["resolution"]
+
+
+def compare(current: dict, baseline: dict, tolerance: float, min_delta_ms: float = 0.1) -> bool:
+    """Print the change of every case against the baseline; True if any regressed.
+
+    A case regresses when its p50 or p95 latency grows, or its throughput
+    drops, by more than `tolerance` (a fraction) and by more than
+    `min_delta_ms` in absolute terms (so microsecond stages do not flap),
+    or when its OCR accuracy drops by more than 0.02.
+    """
+    if baseline["meta"].get("fonts") != current["meta"]["fonts"]:
+        print("Warning: baseline was rendered with different fonts; results may not be comparable.")
+    old_cases = {_case_key(case): case for case in baseline["results"]}
+    regressed = False
+    print(f"\n{'stage':>16} {'variant':>10} {'resolution':>10} {'p50':>9} {'p95':>9} {'per sec':>9}")
+    for case in current["results"]:
+        old = old_cases.get(_case_key(case))
+        if old is None:
+            continue
+        changes = {
+            "p50": case["p50_ms"] / old["p50_ms"] - 1 if old["p50_ms"] else 0.0,
+            "p95": case["p95_ms"] / old["p95_ms"] - 1 if old["p95_ms"] else 0.0,
+            "per sec": case["throughput_per_s"] / old["throughput_per_s"] - 1 if old["throughput_per_s"] else 0.0,
+        }
+        worse = [
+            changes["p50"] > tolerance and case["p50_ms"] - old["p50_ms"] > min_delta_ms,
+            changes["p95"] > tolerance and case["p95_ms"] - old["p95_ms"] > min_delta_ms,
+            changes["per sec"] < -tolerance and case["mean_ms"] - old["mean_ms"] > min_delta_ms,
+        ]
+        if "accuracy" in case and "accuracy" in old and case["accuracy"] < old["accuracy"] - 0.02:
+            worse.append(True)
+        flag = "  REGRESSION" if any(worse) else ""
+        regressed = regressed or any(worse)
+        print(f"{case['stage']:>16} {case['variant']:>10} {case['resolution'] or '-':>10} "
+              f"{changes['p50']:>+9.1%} {changes['p95']:>+9.1%} {changes['per sec']:>+9.1%}{flag}")
+    return regressed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every interpreter stage on a synthetic corpus")
+    parser.add_argument("-o", "--output", default="bench_results.json",
+                        help="JSON results file (default: bench_results.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare against a saved results file")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Allowed slowdown before a case counts as regressed (default: 0.10 = 10%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.1,
+                        help="Ignore latency changes smaller than this many ms (default: 0.1)")
+    parser.add_argument("--max-mp", type=float, default=8,
+                        help="Largest corpus resolution in megapixels (default: 8)")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the corpus per case (default: 1)")
+    parser.add_argument("-l", "--lang", default="hi", help="Target language for translation (default: hi)")
+    parser.add_argument("--corpus-dir", help="Keep the rendered corpus in this directory")
+    args = parser.parse_args()
+
+    report = run([r for r in RESOLUTIONS if r[0] * r[1] <= args.max_mp * 1e6], args.repeat, args.lang,
+                 args.corpus_dir)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nResults written to: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.tolerance, args.min_delta_ms):
+            print(f"\nPerformance regressed by more than {args.tolerance:.0%} against {args.compare}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.compare}")
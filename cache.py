@@ -0,0 +1,243 @@
+"""
+Two-tier result cache: an in-memory LRU backed by a size-bounded SQLite file.
+
+Both tiers support an optional TTL, after which entries are treated as misses.
+
+Values must be JSON-serializable. Keys are strings; make_image_key() builds a
+content-addressed key from decoded pixels plus the parameters that affect
+the result.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def make_image_key(img: np.ndarray, **params) -> str:
+    """Hash decoded pixels together with the parameters used to process them.
+
+    Two uploads with identical pixels (even if their encoded bytes differ)
+    share a key, while any change to a parameter produces a new one.
+    """
+    h = hashlib.sha256()
+    img = np.ascontiguousarray(img)
+    h.update(f"{img.shape}|{img.dtype}|".encode())
+    h.update(img.data)
+    h.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU cache with a fixed number of entries."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            if key not in self._data:
+                return None
+            expires, value = self._data[key]
+            if expires is not None and expires < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value, expires_at: float = None) -> None:
+        """Store a value; `expires_at` (a time.time() value) can only shorten the TTL."""
+        expires = time.time() + self.ttl if self.ttl else None
+        if expires_at is not None:
+            expires = expires_at if expires is None else min(expires, expires_at)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class DiskStore:
+    """Persistent key/value store in a SQLite file, evicting least recently used entries.
+
+    The total size of stored values is kept under `max_bytes`, and entries
+    older than `ttl` seconds (if set) are dropped on read. Several processes
+    (e.g. batch workers) can share the same file. A store inherited through
+    fork opens its own connection in the child on first use, since SQLite
+    connections must not be carried across fork.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, ttl: float = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        outdir = os.path.dirname(path) or "."
+        os.makedirs(outdir, exist_ok=True)
+        self._connection = self._connect()
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            INSERT OR IGNORE INTO meta VALUES ('total_size', 0);
+            CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+                UPDATE meta SET value = value + NEW.size WHERE name = 'total_size';
+            END;
+            CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+                UPDATE meta SET value = value - OLD.size WHERE name = 'total_size';
+            END;
+        """)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        self._pid = os.getpid()
+        return conn
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            # Forked (e.g. a process-pool worker): never touch the parent's connection
+            self._connection = self._connect()
+        return self._connection
+
+    def get(self, key: str):
+        entry = self.get_entry(key)
+        return None if entry is None else entry[0]
+
+    def get_entry(self, key: str):
+        """Return (value, expires_at) for a key, or None; expires_at is None without a TTL."""
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            expires_at = row[1] + self.ttl if self.ttl else None
+            if expires_at is not None and expires_at < now:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        return json.loads(row[0]), expires_at
+
+    def put(self, key: str, value) -> None:
+        data = json.dumps(value, ensure_ascii=False)
+        size = len(data.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Delete + insert (rather than REPLACE) so the size triggers fire
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.execute("INSERT INTO entries VALUES (?, ?, ?, ?, ?)", (key, data, size, now, now))
+                self._evict()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the store fits in max_bytes."""
+        excess = self._total_size() - self.max_bytes
+        if excess <= 0:
+            return
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+    def _total_size(self) -> int:
+        return self._conn.execute("SELECT value FROM meta WHERE name = 'total_size'").fetchone()[0]
+
+    def total_size(self) -> int:
+        """Total size in bytes of all stored values."""
+        with self._lock:
+            return self._total_size()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+class TieredCache:
+    """In-memory LRU in front of an optional DiskStore, with hit/miss counters."""
+
+    def __init__(self, memory: LRUCache, disk: DiskStore = None):
+        self.memory = memory
+        self.disk = disk
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def _count(self, *names) -> None:
+        with self._lock:
+            for name in names:
+                self._counts[name] += 1
+
+    def get(self, key: str):
+        value = self.memory.get(key)
+        if value is not None:
+            self._count("hits", "memory_hits")
+            return value
+        if self.disk is not None:
+            entry = self.disk.get_entry(key)
+            if entry is not None:
+                # Promote, keeping the entry's original expiry: a disk hit
+                # must not extend its life
+                value, expires_at = entry
+                self.memory.put(key, value, expires_at=expires_at)
+                self._count("hits", "disk_hits")
+                return value
+        self._count("misses")
+        return None
+
+    def put(self, key: str, value) -> None:
+        self.memory.put(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current entry counts."""
+        with self._lock:
+            stats = dict(self._counts)
+        stats["memory_entries"] = len(self.memory)
+        if self.disk is not None:
+            stats["disk_entries"] = len(self.disk)
+            stats["disk_bytes"] = self.disk.total_size()
+        return stats
@@ -0,0 +1,331 @@
+"""
+Threaded camera engine shared by the webcam tools.
+
+The preview never waits on OCR or the network:
+
+    capture thread --latest frame--> preview loop (main thread, imshow/waitKey)
+                                         |  's' key, or continuous mode
+                                         |  when FrameGate sees a new scene
+                                         v
+                          OCR queue (latest wins) --> OCR worker
+                                                         |
+                          translate queue (latest wins) --> translate worker
+                                                         |
+                                  overlay <-- latest result
+
+Each queue holds only the newest item, so a slow OCR or translate call
+drops stale frames instead of building a backlog, and the preview keeps
+running at camera rate. In continuous mode an optional FrameGate skips
+frames that show the same scene as the last OCR'd one, or that were taken
+mid-pan, so OCR runs follow scene changes rather than the frame rate.
+
+Keys: s = OCR the current frame, c = toggle continuous mode, q = quit.
+"""
+
+import time
+import threading
+from collections import deque
+from typing import NamedTuple
+
+import cv2
+import numpy as np
+
+from ocr import get_backend, ocr_best_psm
+from frame_gate import FrameGate
+from preprocess import CAMERA_PIPELINE, FramePreprocessor, Pipeline
+from translate import translate_text
+
+
+class CameraResult(NamedTuple):
+    """OCR (and, once available, translation) of one captured frame."""
+    frame_id: int
+    text: str
+    translation: str          # None while pending or when not translating
+    processed: np.ndarray     # preprocessed image that was OCR'd (if show_processed)
+    ocr_seconds: float
+    translate_seconds: float
+
+
+class LatestQueue:
+    """Bounded queue where putting into a full queue drops the oldest item."""
+
+    def __init__(self, maxsize: int = 1):
+        self._items = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item) -> None:
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout: float = None):
+        """Return the oldest queued item, or None on timeout or after close()."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._items or self._closed, timeout)
+            return self._items.popleft() if self._items else None
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+def draw_overlay(frame: np.ndarray, result: CameraResult, status: str = "", max_lines: int = 4) -> np.ndarray:
+    """Draw the latest result on a frame (in place) and return it.
+
+    OpenCV's Hershey fonts are ASCII only; other scripts show as '?', so
+    translations are also reported through the engine's on_result callback.
+    """
+    font, scale, thickness = cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1
+    lines = []
+    if result is not None:
+        lines += [line for line in result.text.splitlines() if line.strip()][:max_lines] or ["[no text]"]
+        if result.translation:
+            lines += ["-> " + line for line in result.translation.splitlines() if line.strip()][:max_lines]
+        elif result.text.strip():
+            lines.append("-> translating...")
+
+    height, width = frame.shape[:2]
+    if lines:
+        band = 12 + 24 * len(lines)
+        top = max(0, height - band)
+        roi = frame[top:height]
+        cv2.addWeighted(roi, 0.35, np.zeros_like(roi), 0.65, 0, dst=roi)
+        for i, line in enumerate(lines):
+            cv2.putText(frame, line, (10, top + 24 * (i + 1)), font, scale, (255, 255, 255), thickness, cv2.LINE_AA)
+    if status:
+        cv2.putText(frame, status, (10, 22), font, scale, (0, 255, 255), thickness, cv2.LINE_AA)
+    return frame
+
+
+class CameraEngine:
+    """Webcam preview with OCR and translation on background threads.
+
+    Example:
+        engine = CameraEngine(0, target_lang="hi", interval=0.5, gate=FrameGate(), on_result=print)
+        engine.run()   # blocks until 'q'
+    """
+
+    def __init__(self, source=0, target_lang: str = None, pipeline: Pipeline = CAMERA_PIPELINE,
+                 psm_modes=(6, 3, 11), interval: float = None, window: str = "Camera",
+                 show_processed: bool = True, on_result=None, gate: FrameGate = None):
+        """
+        Args:
+            source: Camera index, video file/URL, or an opened cv2.VideoCapture.
+            target_lang: Translate OCR text into this language (None = OCR only).
+            pipeline: Preprocessing applied to a frame before OCR.
+            psm_modes: Tesseract page segmentation modes to try (see ocr_best_psm).
+            interval: Minimum seconds between automatic OCR runs in continuous
+                mode (None = only on 's'; 'c' toggles continuous mode at runtime).
+            window: Preview window title.
+            show_processed: Show the preprocessed image of each result.
+            on_result: Called with each CameraResult from a worker thread:
+                once after OCR and, when translating, again with the translation.
+            gate: FrameGate consulted in continuous mode; unchanged, moving
+                or blurred frames are not OCR'd and the last result stays up.
+        """
+        # Fail early if no OCR backend is available
+        get_backend()
+
+        self._cap = source if hasattr(source, "read") else cv2.VideoCapture(source)
+        if not self._cap.isOpened():
+            raise RuntimeError("Cannot open camera")
+
+        self.target_lang = target_lang
+        self.pipeline = pipeline
+        try:
+            # Only the OCR thread preprocesses, so one set of reused buffers is enough
+            self._preprocessor = FramePreprocessor(pipeline)
+        except ValueError:
+            self._preprocessor = None  # e.g. NL-means: use the allocating Pipeline.run()
+        self.psm_modes = tuple(psm_modes)
+        self.interval = interval
+        self.continuous = interval is not None
+        self.window = window
+        self.show_processed = show_processed
+        self.on_result = on_result
+        self.gate = gate
+        self._gate_reason = ""
+
+        self._stop = threading.Event()
+        self._frame = None
+        self._frame_id = 0
+        self._capture_failed = False
+        self._frame_cond = threading.Condition()
+        self._result = None
+        self._result_lock = threading.Lock()
+        self._ocr_queue = LatestQueue()
+        self._translate_queue = LatestQueue()
+        self._ocr_busy = False
+        self._last_translation = (None, None)  # (text, translation), reused when text repeats
+        self.stats = {"frames": 0, "shown": 0, "ocr_runs": 0, "translations": 0, "preview_fps": 0.0}
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="camera-capture", daemon=True),
+            threading.Thread(target=self._ocr_loop, name="camera-ocr", daemon=True),
+            threading.Thread(target=self._translate_loop, name="camera-translate", daemon=True),
+        ]
+
+    @property
+    def result(self) -> CameraResult:
+        """The most recent result (None before the first OCR)."""
+        with self._result_lock:
+            return self._result
+
+    def _publish(self, result: CameraResult) -> None:
+        with self._result_lock:
+            # A slow translation must not overwrite a newer frame's result
+            if self._result is not None and result.frame_id < self._result.frame_id:
+                return
+            self._result = result
+        if self.on_result is not None:
+            self.on_result(result)
+
+    def _capture_loop(self) -> None:
+        while not self._stop.is_set():
+            ok, frame = self._cap.read()
+            with self._frame_cond:
+                if not ok:
+                    self._capture_failed = True
+                    self._frame_cond.notify_all()
+                    return
+                self._frame = frame
+                self._frame_id += 1
+                self.stats["frames"] += 1
+                self._frame_cond.notify_all()
+
+    def _ocr_loop(self) -> None:
+        while not self._stop.is_set():
+            item = self._ocr_queue.get(timeout=0.5)
+            if item is None:
+                continue
+            frame_id, frame = item
+            self._ocr_busy = True
+            start = time.perf_counter()
+            processed = None
+            try:
+                if self._preprocessor is not None:
+                    processed = self._preprocessor.run(frame)
+                else:
+                    processed = self.pipeline.run(frame).image
+                text = ocr_best_psm(processed, psm_modes=self.psm_modes).text
+                ok = True
+            except Exception as e:
+                text, ok = f"[OCR error] {e}", False
+            self._ocr_busy = False
+            self.stats["ocr_runs"] += 1
+            # The preprocessor reuses its buffer on the next frame, so keep a copy for display
+            shown = processed.copy() if self.show_processed and processed is not None else None
+            result = CameraResult(frame_id, text, None, shown, time.perf_counter() - start, 0.0)
+            self._publish(result)
+            if self.target_lang and text.strip() and ok:
+                self._translate_queue.put(result)
+
+    def _translate_loop(self) -> None:
+        while not self._stop.is_set():
+            result = self._translate_queue.get(timeout=0.5)
+            if result is None:
+                continue
+            start = time.perf_counter()
+            last_text, last_translation = self._last_translation
+            if result.text == last_text:
+                translation = last_translation
+            else:
+                translation = translate_text(result.text, self.target_lang)
+                self._last_translation = (result.text, translation)
+                self.stats["translations"] += 1
+            self._publish(result._replace(translation=translation,
+                                          translate_seconds=time.perf_counter() - start))
+
+    def _status(self) -> str:
+        mode = f"auto {self.interval:g}s" if self.continuous else "manual"
+        if self.continuous and self._gate_reason:
+            mode += f" ({self._gate_reason})"
+        busy = " | OCR..." if self._ocr_busy or len(self._ocr_queue) else ""
+        return f"{self.stats['preview_fps']:.0f} fps | {mode}{busy}"
+
+    def run(self) -> None:
+        """Show the preview and handle keys until 'q'; must run on the main thread."""
+        for thread in self._threads:
+            thread.start()
+
+        last_id = 0
+        last_submit = 0.0
+        shown_result = None
+        tick = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                with self._frame_cond:
+                    self._frame_cond.wait_for(
+                        lambda: self._frame_id != last_id or self._capture_failed, timeout=1.0)
+                    if self._frame_id == last_id:
+                        if self._capture_failed:
+                            print("Failed to grab frame")
+                            break
+                        continue
+                    frame, last_id = self._frame, self._frame_id
+
+                now = time.perf_counter()
+                self.stats["preview_fps"] = 0.9 * self.stats["preview_fps"] + 0.1 / max(now - tick, 1e-6)
+                tick = now
+
+                if self.continuous:
+                    # The gate sees every frame, so it can tell a held camera from a pan
+                    decision = self.gate.check(frame) if self.gate is not None else None
+                    if decision is not None:
+                        self._gate_reason = decision.reason
+                    if now - last_submit >= self.interval and (decision is None or decision.run):
+                        self._ocr_queue.put((last_id, frame))
+                        last_submit = now
+                        if self.gate is not None:
+                            self.gate.commit()
+
+                result = self.result
+                # The capture thread never reuses a frame buffer, but OCR may be
+                # reading this one, so draw on a copy
+                cv2.imshow(self.window, draw_overlay(frame.copy(), result, self._status()))
+                self.stats["shown"] += 1
+                if self.show_processed and result is not None and result.processed is not None \
+                        and result.frame_id != shown_result:
+                    cv2.imshow("Captured Image", result.processed)
+                    shown_result = result.frame_id
+
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord('s'):
+                    self._ocr_queue.put((last_id, frame))
+                elif key == ord('c'):
+                    self.continuous = not self.continuous
+                    if self.continuous and self.interval is None:
+                        self.interval = 1.0
+                    if self.gate is not None:
+                        self.gate.reset()
+                elif key == ord('q'):
+                    break
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._ocr_queue.close()
+        self._translate_queue.close()
+        for thread in self._threads:
+            if thread.is_alive() and thread is not threading.current_thread():
+                thread.join(timeout=2.0)
+        self._cap.release()
+        cv2.destroyAllWindows()
+
+
+def print_result(result: CameraResult) -> None:
+    """Console reporter for CameraEngine(on_result=...)."""
+    if result.translation is None:
+        print(f"\n===== DETECTED TEXT (frame {result.frame_id}, {result.ocr_seconds:.2f}s) =====")
+        print(result.text if result.text.strip() else "[No text detected]")
+    else:
+        print(f"\n===== TRANSLATED TEXT (frame {result.frame_id}, {result.translate_seconds:.2f}s) =====")
+        print(result.translation)
@@ -1,48 +1,22 @@
-import cv2
-import pytesseract
-import shutil
-import os
-
-# ====== Set Tesseract path (Windows) ======
-tesseract_path = shutil.which('tesseract')
-if tesseract_path:
-    pytesseract.pytesseract.tesseract_cmd = tesseract_path
-else:
-    common_path = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
-    if os.path.exists(common_path):
-        pytesseract.pytesseract.tesseract_cmd = common_path
-    else:
-        raise Exception("Tesseract not found. Install it from https://github.com/tesseract-ocr/tesseract")
-
-# ====== Open Webcam ======
-cap = cv2.VideoCapture(0)
-
-if not cap.isOpened():
-    raise Exception("Cannot open camera")
-
-print("Press 's' to capture image and run OCR, 'q' to quit.")
-
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        print("Failed to grab frame")
-        break
-
-    cv2.imshow("Camera", frame)
-    key = cv2.waitKey(1) & 0xFF
-
-    if key == ord('s'):  # Press 's' to capture
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        gray = cv2.medianBlur(gray, 3)  # Optional denoise
-
-        text = pytesseract.image_to_string(gray)
-        print("\nDetected Text:")
-        print(text)
-
-        cv2.imshow("Captured Image", gray)
-
-    elif key == ord('q'):  # Press 'q' to quit
-        break
-
-cap.release()
-cv2.destroyAllWindows()
+import argparse
+
+from camera_engine import CameraEngine, print_result
+from frame_gate import FrameGate
+from preprocess import CAMERA_GRAY_PIPELINE
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Live webcam OCR")
+    parser.add_argument("--camera", default="0", help="Camera index or video file/URL (default: 0)")
+    parser.add_argument("-i", "--interval", type=float, default=None,
+                        help="Continuous mode: OCR at most every N seconds, on scene changes")
+    parser.add_argument("--no-gate", action="store_true",
+                        help="Continuous mode: OCR even when the scene has not changed")
+    args = parser.parse_args()
+
+    source = int(args.camera) if args.camera.isdigit() else args.camera
+    engine = CameraEngine(source, pipeline=CAMERA_GRAY_PIPELINE, psm_modes=(3,),
+                          interval=args.interval, on_result=print_result,
+                          gate=None if args.no_gate else FrameGate())
+
+    print("Press 's' to capture image and run OCR, 'c' to toggle continuous mode, 'q' to quit.")
+    engine.run()
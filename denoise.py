@@ -1,16 +1,55 @@
 import cv2
+import numpy as np
 import os
 import argparse
 
+import metrics
+from preprocess import DENOISE_PIPELINES, ProcessedImage
 
-def denoise_image(input_path: str, output_path: str = None, method: str = "gaussian") -> str:
-    """Denoise an image using OpenCV.
+
+@metrics.stage("denoise")
+def denoise_processed(img, method: str = "gaussian") -> ProcessedImage:
+    """Denoise an in-memory image, keeping a record of the stages applied.
+
+    Passing the result to ocr.extract_text_from_array() lets OCR skip its own
+    denoising pass instead of running a second one.
+    
+    Args:
+        img: Decoded BGR image, or a ProcessedImage
+        method: Denoising method ('gaussian', 'nlmeans', 'bilateral')
+    
+    Returns:
+        ProcessedImage with the denoised image and its applied stages
+    """
+    pipeline = DENOISE_PIPELINES.get(method.lower())
+    if pipeline is None:
+        raise ValueError(f"Unknown denoising method: {method}. Use 'gaussian', 'nlmeans', or 'bilateral'.")
+    return pipeline.run(img)
+
+
+def denoise_array(img: np.ndarray, method: str = "gaussian") -> np.ndarray:
+    """Denoise an in-memory image using OpenCV.
     
     Methods:
         gaussian: Convert to grayscale and apply Gaussian blur (simple, fast)
         nlmeans: Non-local means denoising (preserves color, slower, better quality)
         bilateral: Bilateral filter (preserves edges, medium speed)
     
+    Args:
+        img: Decoded BGR image (as returned by cv2.imread / cv2.imdecode)
+        method: Denoising method ('gaussian', 'nlmeans', 'bilateral')
+    
+    Returns:
+        Denoised image (grayscale for 'gaussian', BGR otherwise)
+    """
+    return denoise_processed(img, method).image
+
+
+def denoise_image(input_path: str, output_path: str = None, method: str = "gaussian") -> str:
+    """Denoise an image file and save the result.
+
+    Path-based wrapper around denoise_array(); see it for the available methods.
+    
     Args:
         input_path: Path to input image
         output_path: Path to save denoised image (default: next to input with .denoised suffix)
@@ -37,19 +76,7 @@ def denoise_image(input_path: str, output_path: str = None, method: str = "gauss
         output_path = f"{base}.denoised{ext}"
     
     # Apply selected denoising method
-    method = method.lower()
-    if method == "gaussian":
-        # Convert to grayscale and apply Gaussian blur
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        denoised = cv2.GaussianBlur(gray, (5, 5), 0)
-    elif method == "nlmeans":
-        # Non-local means denoising (color)
-        denoised = cv2.fastNlMeansDenoisingColored(img, None, h=10, templateWindowSize=7, searchWindowSize=21)
-    elif method == "bilateral":
-        # Bilateral filter (preserves edges)
-        denoised = cv2.bilateralFilter(img, d=9, sigmaColor=75, sigmaSpace=75)
-    else:
-        raise ValueError(f"Unknown denoising method: {method}. Use 'gaussian', 'nlmeans', or 'bilateral'.")
+    denoised = denoise_array(img, method)
     
     # Ensure output directory exists
     outdir = os.path.dirname(output_path) or "."
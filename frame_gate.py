@@ -0,0 +1,141 @@
+"""
+Frame-change gating for continuous camera OCR.
+
+Re-running preprocessing, Tesseract and translation on every frame of a
+stationary sign wastes CPU and translation quota. FrameGate looks at a small
+thumbnail of each frame (a few milliseconds) and only lets a frame
+through to OCR when:
+
+- the scene differs materially from the last frame that was OCR'd
+  (fraction of changed blocks in a coarse brightness grid), and
+- the camera is holding still (the last few consecutive frames are
+  similar), and
+- the frame is not motion blurred (Laplacian variance well below that of
+  the sharpest recent frames).
+
+So the number of OCR runs follows scene changes, not the frame rate.
+"""
+
+from collections import deque
+from typing import NamedTuple
+
+import cv2
+import numpy as np
+
+
+class GateDecision(NamedTuple):
+    """Whether to OCR a frame, and why."""
+    run: bool
+    reason: str          # 'first', 'changed', 'unchanged', 'moving' or 'blurred'
+    change: float        # fraction of blocks changed since the last OCR'd frame
+    sharpness: float     # Laplacian variance of the thumbnail
+
+
+def _thumbnail(frame: np.ndarray, width: int) -> np.ndarray:
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    height = max(1, round(gray.shape[0] * width / gray.shape[1]))
+    return cv2.resize(gray, (width, height), interpolation=cv2.INTER_AREA)
+
+
+def block_signature(gray: np.ndarray, blocks: int = 48) -> np.ndarray:
+    """Mean brightness of a `blocks`-wide grid, minus the overall mean.
+
+    Subtracting the mean makes the signature insensitive to auto-exposure
+    drift; averaging over blocks removes sensor noise. Unlike a 64-bit
+    perceptual hash it still notices new text on the same signboard.
+    """
+    rows = max(1, round(gray.shape[0] * blocks / gray.shape[1]))
+    grid = cv2.resize(gray, (blocks, rows), interpolation=cv2.INTER_AREA).astype(np.float32)
+    return grid - grid.mean()
+
+
+def block_change(a: np.ndarray, b: np.ndarray, level: float = 12.0) -> float:
+    """Fraction of blocks whose brightness differs by more than `level` (0.0 = same scene)."""
+    return float(np.count_nonzero(np.abs(a - b) > level)) / a.size
+
+
+def sharpness(gray: np.ndarray) -> float:
+    """Variance of the Laplacian; drops sharply for blurred frames."""
+    return float(cv2.Laplacian(gray, cv2.CV_32F).var())
+
+
+class FrameGate:
+    """Decide per frame whether the scene changed enough to be worth OCR.
+
+    Usage (once per captured frame):
+        decision = gate.check(frame)
+        if decision.run:
+            ocr(frame)
+            gate.commit()     # this frame is now the reference
+    """
+
+    def __init__(self, change_threshold: float = 0.02, motion_threshold: float = 0.01,
+                 steady_frames: int = 3, blur_ratio: float = 0.5, min_sharpness: float = 0.0,
+                 thumbnail_width: int = 320, history: int = 60):
+        """
+        Args:
+            change_threshold: Fraction of changed blocks since the last OCR'd
+                frame that counts as a new scene.
+            motion_threshold: Fraction of changed blocks between consecutive
+                frames above which the camera is considered to be moving.
+            steady_frames: Consecutive still frames required after movement.
+            blur_ratio: A frame is blurred if its sharpness is below this
+                fraction of the 90th percentile of recent frames.
+            min_sharpness: Absolute sharpness floor (0 disables it).
+            thumbnail_width: Width of the analysis thumbnail.
+            history: Number of recent frames used for the sharpness reference.
+        """
+        self.change_threshold = change_threshold
+        self.motion_threshold = motion_threshold
+        self.steady_frames = steady_frames
+        self.blur_ratio = blur_ratio
+        self.min_sharpness = min_sharpness
+        self.thumbnail_width = thumbnail_width
+        self._sharpness = deque(maxlen=history)
+        self._previous = None     # signature of the previous frame
+        self._reference = None    # signature of the last OCR'd frame
+        self._candidate = None    # signature of the frame last passed to check()
+        self._steady = 0          # consecutive still frames
+        self.stats = {"frames": 0, "passed": 0, "unchanged": 0, "moving": 0, "blurred": 0}
+
+    def check(self, frame: np.ndarray) -> GateDecision:
+        """Inspect a frame; call commit() if it is then actually OCR'd."""
+        gray = _thumbnail(frame, self.thumbnail_width)
+        current = block_signature(gray)
+        score = sharpness(gray)
+        previous, self._previous, self._candidate = self._previous, current, current
+        self._sharpness.append(score)
+        self.stats["frames"] += 1
+
+        if previous is not None and block_change(current, previous) > self.motion_threshold:
+            self._steady = 0
+        else:
+            self._steady += 1
+
+        change = 1.0 if self._reference is None else block_change(current, self._reference)
+        # Compare against the sharpest recent frames, so a long pan of blurred
+        # frames does not lower the bar
+        reference_sharpness = float(np.percentile(self._sharpness, 90))
+        if self._steady < self.steady_frames:
+            reason = "moving"
+        elif score < self.min_sharpness or score < self.blur_ratio * reference_sharpness:
+            reason = "blurred"
+        elif self._reference is None:
+            reason = "first"
+        elif change >= self.change_threshold:
+            reason = "changed"
+        else:
+            reason = "unchanged"
+
+        run = reason in ("first", "changed")
+        self.stats["passed" if run else reason] += 1
+        return GateDecision(run, reason, change, score)
+
+    def commit(self) -> None:
+        """Make the frame last passed to check() the reference for future changes."""
+        if self._candidate is not None:
+            self._reference = self._candidate
+
+    def reset(self) -> None:
+        """Forget the reference, so the next steady frame is OCR'd."""
+        self._reference = None
@@ -1,13 +1,92 @@
+import os
+import json
+import threading
+
+import metrics
+from keyword_matcher import KeywordMatcher
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "guidance_rules.json")
+NO_TEXT_MESSAGE = "No meaningful text found on signboard."
+
+
+class GuidanceEngine:
+    """Keyword rules compiled into a single-pass multi-pattern matcher.
+
+    Rule file format (JSON):
+        {
+          "default": "<message when no rule matches>",
+          "rules": [
+            {"id": "danger", "priority": 100, "alert": true, "match": "substring",
+             "message": "...", "keywords": {"en": ["danger"], "hi": ["खतरा"]}},
+            ...
+          ]
+        }
+
+    `match` is "substring" (default) or "word" (keyword must be a whole word).
+    `keywords` may also be a plain list. When several rules match, the one
+    with the highest priority wins.
+    """
+
+    def __init__(self, rules: list, default: str):
+        self.rules = rules
+        self.default = default
+        self.matcher = KeywordMatcher()
+        for rule in rules:
+            keywords = rule.get("keywords", [])
+            if isinstance(keywords, dict):
+                keywords = [k for words in keywords.values() for k in words]
+            whole_word = rule.get("match", "substring") == "word"
+            for keyword in keywords:
+                self.matcher.add(keyword, payload=rule, whole_word=whole_word)
+        self.matcher.build()
+
+    @classmethod
+    def from_file(cls, path: str) -> "GuidanceEngine":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["rules"], data.get("default", ""))
+
+    def match(self, text: str):
+        """Return the highest-priority rule matching text, or None."""
+        best = None
+        for _, _, rule in self.matcher.find_all(text):
+            if best is None or rule.get("priority", 0) > best.get("priority", 0):
+                best = rule
+        return best
+
+    def is_alert(self, text: str) -> bool:
+        """True if any matching rule is marked as an alert (danger, stop, warning...)."""
+        return any(rule.get("alert") for _, _, rule in self.matcher.find_all(text))
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> GuidanceEngine:
+    """Return the shared engine, loading the rule file once.
+
+    The rule file is `guidance_rules.json` next to this module unless the
+    GUIDANCE_RULES environment variable points elsewhere.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = GuidanceEngine.from_file(os.environ.get("GUIDANCE_RULES", RULES_PATH))
+        return _engine
+
+
+@metrics.stage("guidance")
 def generate_guidance(text: str) -> str:
     """Generate a simple interpretation or advice based on the text."""
-    if not text or text.lower().strip() == "":
-        return "No meaningful text found on signboard."
-    
-    if "danger" in text.lower():
-        return "Warning: This signboard indicates a danger or hazard. Stay safe."
-    if "stop" in text.lower():
-        return "This signboard instructs you to stop immediately."
-    if "parking" in text.lower():
-        return "This signboard is related to parking instructions."
-
-    return "General signboard detected. Follow the instructions as written."
+    if not text or not text.strip():
+        return NO_TEXT_MESSAGE
+
+    engine = get_engine()
+    rule = engine.match(text)
+    return rule["message"] if rule else engine.default
+
+
+def is_alert(text: str) -> bool:
+    """True if the text contains a danger/stop/warning keyword in any supported language."""
+    return bool(text) and get_engine().is_alert(text)
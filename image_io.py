@@ -0,0 +1,136 @@
+"""
+Decoding uploaded and on-disk images for OCR.
+
+All images are decoded from an in-memory buffer with cv2.imdecode (files
+are read with np.fromfile, which also handles non-ASCII paths that
+cv2.imread cannot open on Windows). OpenCV applies the EXIF orientation
+tag while decoding, so phone photos taken sideways come out upright.
+
+OCR only needs luminance, and usually far fewer pixels than a phone camera
+delivers: a 12 MP photo of a signboard typically has text 100-300 px tall,
+which TEXT_SIZE_PIPELINE then shrinks to about 32 px. decode_for_ocr()
+therefore decodes straight to grayscale and, for JPEGs, lets libjpeg
+scale the image down by 2, 4 or 8 while decoding (IMREAD_REDUCED_*),
+which skips most of the inverse DCT and colour conversion work:
+
+    img = decode_for_ocr(data, normalize_text_size=True)
+
+picks the reduction from the text height measured on a small preview, so
+the text is never decoded smaller than the OCR target. Other formats have
+no cheap reduced decode and are decoded once at full size.
+"""
+
+import io
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from preprocess import estimate_text_height
+
+REDUCTIONS = (1, 2, 4, 8)
+_REDUCED_FLAGS = {
+    (2, False): cv2.IMREAD_REDUCED_COLOR_2,
+    (4, False): cv2.IMREAD_REDUCED_COLOR_4,
+    (8, False): cv2.IMREAD_REDUCED_COLOR_8,
+    (2, True): cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    (4, True): cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    (8, True): cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+# Side length estimate_text_height() analyses at; the preview is no smaller
+PREVIEW_MIN_SIDE = 1000
+
+
+def is_jpeg(data) -> bool:
+    return bytes(data[:3]) == b"\xff\xd8\xff"
+
+
+def image_size(data):
+    """(width, height) from the image header without decoding pixels, or None if unknown."""
+    try:
+        with Image.open(io.BytesIO(data)) as im:
+            return im.size
+    except Exception:
+        return None
+
+
+def decode_image(data, grayscale: bool = False, reduce: int = 1):
+    """Decode an encoded image held in memory.
+
+    Args:
+        data: Encoded image (bytes, memoryview or uint8 array)
+        grayscale: Decode to a single channel instead of BGR
+        reduce: Decode at 1/2, 1/4 or 1/8 of the full size (1 = full size);
+            cheap for JPEG, a resize after a full decode for other formats
+
+    Returns:
+        The decoded image (BGR or grayscale), upright according to its EXIF
+        orientation, or None if the data is empty or not a readable image.
+    """
+    buf = np.frombuffer(data, np.uint8)
+    # imdecode asserts on an empty buffer instead of returning None
+    if buf.size == 0:
+        return None
+    if reduce == 1:
+        return cv2.imdecode(buf, cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR)
+    flag = _REDUCED_FLAGS.get((reduce, grayscale))
+    if flag is None:
+        raise ValueError(f"Unsupported reduction: {reduce}. Use one of {REDUCTIONS}.")
+    return cv2.imdecode(buf, flag)
+
+
+def _preview_reduction(size) -> int:
+    """Largest reduction that keeps the preview's long side at PREVIEW_MIN_SIDE or more."""
+    long_side = max(size)
+    return max(r for r in REDUCTIONS if r == 1 or long_side / r >= PREVIEW_MIN_SIDE)
+
+
+def decode_for_ocr(data, normalize_text_size: bool = False, target_text_height: int = 32,
+                   tolerance: float = 0.15):
+    """Decode an image at the lowest resolution OCR needs, as grayscale.
+
+    Without normalize_text_size the image is decoded at full size, since
+    OCR will run at that size. With it, a JPEG is first decoded at a
+    reduction that keeps its long side at least PREVIEW_MIN_SIDE, the text
+    height is estimated on that preview, and the preview is kept if its
+    text is still at least target_text_height tall (within tolerance, as
+    TEXT_SIZE_PIPELINE allows); otherwise the image is decoded again at the
+    largest reduction that keeps the text that tall, or at full size if no
+    text was found.
+
+    Returns:
+        Grayscale image, or None if the data is not a readable image.
+    """
+    if not normalize_text_size or not is_jpeg(data):
+        return decode_image(data, grayscale=True)
+    size = image_size(data)
+    preview_reduce = _preview_reduction(size) if size else 1
+    if preview_reduce == 1:
+        return decode_image(data, grayscale=True)
+
+    preview = decode_image(data, grayscale=True, reduce=preview_reduce)
+    if preview is None:
+        return None
+    text_height = estimate_text_height(preview) * preview_reduce
+    reduce = 1
+    if text_height > 0:
+        min_height = target_text_height * (1.0 - tolerance)
+        reduce = max(r for r in REDUCTIONS if r == 1 or text_height / r >= min_height)
+    if reduce >= preview_reduce:
+        # TEXT_SIZE_PIPELINE shrinks it the rest of the way
+        return preview
+    return decode_image(data, grayscale=True, reduce=reduce)
+
+
+def read_for_ocr(path: str, normalize_text_size: bool = False):
+    """Read an image file and decode it with decode_for_ocr().
+
+    Returns:
+        Grayscale image, or None if the file cannot be read or decoded
+        (like cv2.imread).
+    """
+    try:
+        data = np.fromfile(path, np.uint8)
+    except OSError:
+        return None
+    return decode_for_ocr(data, normalize_text_size=normalize_text_size)
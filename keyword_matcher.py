@@ -0,0 +1,98 @@
+"""
+Multi-pattern keyword matcher (Aho-Corasick).
+
+All keywords are compiled into one automaton, so a text is scanned once no
+matter how many keywords there are. Matching is case-insensitive and each
+keyword can optionally require word boundaries.
+"""
+
+import unicodedata
+from collections import deque
+
+
+def _is_word_char(ch: str) -> bool:
+    # Combining marks (Devanagari/Tamil/Bengali vowel signs, viramas) belong to the word
+    return ch.isalnum() or ch == "_" or unicodedata.category(ch).startswith("M")
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over lower-cased keywords.
+
+    Usage:
+        matcher = KeywordMatcher()
+        matcher.add("no parking", payload="parking", whole_word=True)
+        matcher.build()
+        for start, end, payload in matcher.find_all(text): ...
+    """
+
+    def __init__(self):
+        self._goto = [{}]      # state -> {char: next state}
+        self._fail = [0]       # state -> failure link
+        self._own = [[]]       # state -> indexes of keywords ending exactly here
+        self._output = [[]]    # state -> _own plus those of its failure chain (built)
+        self._keywords = []    # (length, payload, whole_word)
+        self._built = False
+
+    def add(self, keyword: str, payload=None, whole_word: bool = False) -> None:
+        """Add a keyword; `payload` is returned with each match."""
+        keyword = keyword.lower()
+        if not keyword:
+            return
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._own.append([])
+            state = nxt
+        self._own[state].append(len(self._keywords))
+        self._keywords.append((len(keyword), payload, whole_word))
+        self._built = False
+
+    def build(self) -> None:
+        """Compute failure links and outputs; called automatically before a search.
+
+        Rebuilt from scratch, so keywords can be added after a build.
+        """
+        self._output = [list(own) for own in self._own]
+        queue = deque()
+        for nxt in self._goto[0].values():
+            self._fail[nxt] = 0
+            queue.append(nxt)
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+        self._built = True
+
+    def find_all(self, text: str):
+        """Yield (start, end, payload) for every keyword occurrence in text."""
+        if not self._built:
+            self.build()
+        text = text.lower()
+        goto, fail, output, keywords = self._goto, self._fail, self._output, self._keywords
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for index in output[state]:
+                length, payload, whole_word = keywords[index]
+                start = i - length + 1
+                if whole_word:
+                    if start > 0 and _is_word_char(text[start - 1]):
+                        continue
+                    if i + 1 < len(text) and _is_word_char(text[i + 1]):
+                        continue
+                yield start, i + 1, payload
+
+    def __len__(self) -> int:
+        return len(self._keywords)
@@ -1,7 +1,50 @@
-from fastapi import FastAPI, UploadFile, Form
+import io
+import os
+import json
+import asyncio
+import zipfile
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.formparsers import MultiPartParser
+
+import metrics
+from async_translate import AsyncTranslator
+from batch import IMAGE_EXTENSIONS
+from guidance import generate_guidance
+from ocr import ocr_cache_stats
+from pipeline import init_worker, ocr_image_bytes
+from resilience import DeadlineExceeded, request_deadline, time_left
+from translate import phrase_report
+
+# Server settings (environment variables)
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", str(os.cpu_count() or 1)))
+MAX_INFLIGHT = int(os.environ.get("MAX_INFLIGHT", str(OCR_WORKERS * 4)))
+MAX_UPLOAD_BYTES = int(float(os.environ.get("MAX_UPLOAD_MB", "20")) * 1024 * 1024)
+NORMALIZE_TEXT_SIZE = os.environ.get("OCR_NORMALIZE_TEXT_SIZE", "1") != "0"
+MAX_BATCH_FILES = int(os.environ.get("MAX_BATCH_FILES", "50"))
+MAX_BATCH_UPLOAD_BYTES = int(float(os.environ.get("MAX_BATCH_UPLOAD_MB", "200")) * 1024 * 1024)
+
+# Keep accepted uploads in memory instead of spooling them to temp files
+MultiPartParser.spool_max_size = MAX_UPLOAD_BYTES
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.pool = ProcessPoolExecutor(max_workers=OCR_WORKERS, initializer=init_worker)
+    app.state.translator = AsyncTranslator()
+    app.state.inflight = 0
+    yield
+    await app.state.translator.aclose()
+    app.state.pool.shutdown(wait=False, cancel_futures=True)
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -10,12 +53,275 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """Reject oversized uploads from Content-Length, before the body is read."""
+    limit = MAX_BATCH_UPLOAD_BYTES if request.url.path.endswith("/batch") else MAX_UPLOAD_BYTES
+    length = request.headers.get("content-length")
+    if request.method == "POST" and length and length.isdigit() and int(length) > limit + 64 * 1024:
+        return JSONResponse({"detail": f"Upload larger than {limit // (1024 * 1024)} MB"},
+                            status_code=413)
+    return await call_next(request)
+
+
+async def run_ocr(data: bytes, deadline=None) -> str:
+    """OCR encoded image bytes on the worker process pool.
+
+    The "ocr_pool" stage includes time queued for a free worker; the
+    worker's own stages (decode, preprocess, tesseract) are merged into
+    this process's metrics when the result comes back. The deadline goes
+    along to the worker, which drops the job if it was queued past it.
+
+    Raises:
+        HTTPException: 400 for unreadable images, 503 if OCR is unavailable,
+            504 if the deadline expires first
+    """
+    loop = asyncio.get_running_loop()
+    pool = app.state.pool
+    try:
+        with metrics.stage("ocr_pool"):
+            text, samples = await asyncio.wait_for(loop.run_in_executor(
+                pool, partial(metrics.collect, ocr_image_bytes, data,
+                                        normalize_text_size=NORMALIZE_TEXT_SIZE, deadline=deadline)),
+                time_left(deadline))
+        metrics.merge(samples)
+        return text
+    except (asyncio.TimeoutError, TimeoutError) as e:
+        # Distinct classes before Python 3.11: wait_for raises the asyncio one,
+        # a worker that ran out of time DeadlineExceeded (a builtin TimeoutError)
+        if deadline is not None and not isinstance(e, DeadlineExceeded):
+            e = deadline.exceeded("ocr_pool")
+        raise HTTPException(status_code=504, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except BrokenProcessPool:
+        # A worker died (e.g. out of memory); replace the pool for later requests.
+        # Checked before RuntimeError, which BrokenProcessPool derives from.
+        replace_pool(pool)
+        raise HTTPException(status_code=503, detail="OCR worker crashed, retry later",
+                            headers={"Retry-After": "1"})
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=f"OCR unavailable: {e}")
+
+
+def replace_pool(broken: ProcessPoolExecutor) -> None:
+    """Swap in a fresh OCR pool for a broken one (once, however many requests saw it break)."""
+    if app.state.pool is broken:
+        app.state.pool = ProcessPoolExecutor(max_workers=OCR_WORKERS, initializer=init_worker)
+        broken.shutdown(wait=False, cancel_futures=True)
+
+
 @app.post("/interpret-signboard")
 async def interpret_signboard(
     file: UploadFile,
     lang: str = Form(...)
 ):
+    """OCR an uploaded signboard photo, translate the text and add guidance.
+
+    Returns 429 when MAX_INFLIGHT requests are already being processed, so a
+    load balancer can retry elsewhere instead of queueing behind a busy node.
+    Each request has REQUEST_DEADLINE seconds (see resilience.py): if OCR
+    does not finish in time it fails with 504; if translation does not,
+    or the translation circuit breaker is open, the OCR text and guidance
+    are returned with a translation error.
+    """
+    if app.state.inflight >= MAX_INFLIGHT:
+        raise HTTPException(status_code=429, detail="Server busy, retry later",
+                            headers={"Retry-After": "1"})
+    app.state.inflight += 1
+    try:
+        with metrics.stage("request"):
+            return await _interpret_upload(file, lang, request_deadline())
+    finally:
+        app.state.inflight -= 1
+
+
+async def _interpret_upload(file: UploadFile, lang: str, deadline) -> dict:
+    data = await file.read()
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413,
+                            detail=f"Upload larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+    if not data:
+        raise HTTPException(status_code=400, detail="Empty upload")
+
+    extracted = await run_ocr(data, deadline)
+    guidance = generate_guidance(extracted)
     return {
-        "message": f"Received file {file.filename}",
-        "language": lang
+        "extracted_text": extracted,
+        "translated_text": await translate(extracted, lang, deadline),
+        "guidance": guidance,
+        "language": lang,
     }
+
+
+async def translate(text: str, lang: str, deadline=None):
+    """Translate OCR output; None if there is no text, an error string on failure.
+
+    Fails fast (with an error string) when the deadline is spent or the
+    translation circuit breaker is open.
+    """
+    if not text.strip():
+        return None
+    try:
+        with metrics.stage("translate"):
+            return await app.state.translator.translate(text, lang, deadline=deadline)
+    except Exception as e:
+        metrics.inc(metrics.TRANSLATION_ERRORS)
+        return f"Translation Error: {e}"
+
+
+def expand_uploads(uploads: list) -> list:
+    """Turn uploaded (filename, bytes) pairs into batch items, unpacking zip archives.
+
+    Returns:
+        List of (name, data, error) tuples; `error` is set instead of `data`
+        for archive entries that cannot be used.
+    """
+    items = []
+    for filename, data in uploads:
+        if not (filename.lower().endswith(".zip") or zipfile.is_zipfile(io.BytesIO(data))):
+            items.append((filename, data, None))
+            continue
+        try:
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                for entry in archive.infolist():
+                    if entry.is_dir() or not entry.filename.lower().endswith(IMAGE_EXTENSIONS):
+                        continue
+                    name = f"{filename}/{entry.filename}"
+                    if entry.file_size > MAX_UPLOAD_BYTES:
+                        items.append((name, None, f"Larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB"))
+                    else:
+                        items.append((name, archive.read(entry), None))
+                    if len(items) > MAX_BATCH_FILES:
+                        break
+        except zipfile.BadZipFile as e:
+            items.append((filename, None, f"Bad zip archive: {e}"))
+    return items
+
+
+async def interpret_item(index: int, name: str, data: bytes, error: str, lang: str) -> dict:
+    """Interpret one batch item; failures are reported in the result, never raised.
+
+    Each item gets its own REQUEST_DEADLINE, counted from when it starts.
+    """
+    result = {
+        "index": index,
+        "image": name,
+        "status": "ok",
+        "extracted_text": None,
+        "translated_text": None,
+        "guidance": None,
+        "error": error,
+    }
+    if error:
+        result["status"] = "error"
+        return result
+    deadline = request_deadline()
+    try:
+        extracted = await run_ocr(data, deadline)
+    except HTTPException as e:
+        result.update(status="error", error=e.detail)
+        return result
+    except Exception as e:
+        # One bad image must not end the stream for the rest of the batch
+        result.update(status="error", error=str(e))
+        return result
+
+    result["extracted_text"] = extracted
+    if not extracted.strip():
+        result["status"] = "no_text"
+        return result
+    result["guidance"] = generate_guidance(extracted)
+    result["translated_text"] = await translate(extracted, lang, deadline)
+    return result
+
+
+@app.post("/interpret-signboard/batch")
+async def interpret_signboard_batch(
+    files: list[UploadFile] = File(...),
+    lang: str = Form(...)
+):
+    """Interpret several photos (or zip archives of photos) in one request.
+
+    Streams one NDJSON line per image as soon as it finishes (completion
+    order; `index` is the position in the upload). Failed images are
+    reported inline with status "error". A batch occupies one in-flight
+    slot and keeps at most OCR_WORKERS images on the pool at a time, so it
+    shares the workers with single-image requests.
+    """
+    if app.state.inflight >= MAX_INFLIGHT:
+        raise HTTPException(status_code=429, detail="Server busy, retry later",
+                            headers={"Retry-After": "1"})
+    app.state.inflight += 1
+    try:
+        uploads = [(f.filename or f"file{i}", await f.read()) for i, f in enumerate(files)]
+        # Unzipping is CPU work; keep it off the event loop
+        items = await asyncio.to_thread(expand_uploads, uploads)
+        if not items:
+            raise HTTPException(status_code=400, detail="No images in upload")
+        if len(items) > MAX_BATCH_FILES:
+            raise HTTPException(status_code=413, detail=f"More than {MAX_BATCH_FILES} images in one batch")
+    except BaseException:
+        app.state.inflight -= 1
+        raise
+
+    async def stream():
+        pending = set()
+        remaining = iter(enumerate(items))
+        try:
+            while True:
+                while len(pending) < OCR_WORKERS:
+                    nxt = next(remaining, None)
+                    if nxt is None:
+                        break
+                    index, (name, data, error) = nxt
+                    pending.add(asyncio.create_task(interpret_item(index, name, data, error, lang)))
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield json.dumps(task.result(), ensure_ascii=False) + "\n"
+        finally:
+            # Client went away or we finished: drop unfinished work, free the slot
+            for task in pending:
+                task.cancel()
+            app.state.inflight -= 1
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.get("/health")
+async def health():
+    """Liveness plus current load and translation breaker state, for the load balancer."""
+    return {"status": "ok", "inflight": app.state.inflight, "max_inflight": MAX_INFLIGHT,
+            "workers": OCR_WORKERS, "translation": app.state.translator.breaker.state}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Stage latency histograms, counters and gauges in Prometheus text format."""
+    metrics.set_gauge(metrics.INFLIGHT_REQUESTS, app.state.inflight)
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/translation/phrases")
+async def translation_phrases(top: int = 50, format: str = "json"):
+    """Phrase table hit rate and its most frequent misses.
+
+    With format=tsv the misses are returned as phrase-file lines with an
+    empty translation column, ready to be filled in and appended.
+    """
+    report = phrase_report(top)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Phrase table not in use")
+    if format == "tsv":
+        lines = [f"{miss['lang']}\t{miss['text']}\t" for miss in report["top_misses"]]
+        return PlainTextResponse("\n".join(lines) + "\n", media_type="text/tab-separated-values")
+    return report
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss counts of the OCR result cache in the workers and the size of its disk tier."""
+    return await asyncio.to_thread(ocr_cache_stats)
@@ -0,0 +1,262 @@
+"""
+Per-stage latency histograms, counters and gauges for the interpreter.
+
+Stages record into a process-local registry:
+
+    with metrics.stage("preprocess"):
+        processed = pipeline.run(img)
+    metrics.inc(metrics.CACHE_REQUESTS, cache="ocr", result="hit")
+
+main.py serves the registry in Prometheus text format on GET /metrics, and
+MAIN1.PY prints summary() at exit. Process-pool workers have their own
+registry: run the task through collect() and merge() the returned samples
+in the parent so worker-side stages (decode, denoise, Tesseract) show up
+too. Recording is a dict update under a lock, cheap next to any stage.
+"""
+
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Metric names
+STAGE_SECONDS = "signboard_stage_seconds"
+TESSERACT_SECONDS = "signboard_tesseract_pass_seconds"
+STAGE_INFLIGHT = "signboard_stage_inflight"
+CACHE_REQUESTS = "signboard_cache_requests_total"
+PSM_FALLBACKS = "signboard_psm_fallbacks_total"
+REGION_FALLBACKS = "signboard_region_fallbacks_total"
+TRANSLATION_ERRORS = "signboard_translation_errors_total"
+INFLIGHT_REQUESTS = "signboard_inflight_requests"
+DEADLINE_EXCEEDED = "signboard_deadline_exceeded_total"
+BREAKER_STATE = "signboard_circuit_breaker_state"
+BREAKER_REJECTED = "signboard_circuit_breaker_rejected_total"
+QUEUE_DEPTH = "signboard_queue_depth"
+QUEUE_WAIT_SECONDS = "signboard_queue_wait_seconds"
+
+HELP = {
+    STAGE_SECONDS: ("histogram", "Latency of interpreter stages"),
+    TESSERACT_SECONDS: ("histogram", "Latency of single Tesseract passes by page segmentation mode"),
+    STAGE_INFLIGHT: ("gauge", "Stage executions currently running in this process"),
+    CACHE_REQUESTS: ("counter", "OCR cache and translation memory lookups"),
+    PSM_FALLBACKS: ("counter", "Extra PSM passes awaited because earlier ones were below min_confidence"),
+    REGION_FALLBACKS: ("counter", "Region OCR requests that found no text lines and OCR'd the whole frame"),
+    TRANSLATION_ERRORS: ("counter", "Translation requests that failed"),
+    INFLIGHT_REQUESTS: ("gauge", "HTTP requests currently being processed"),
+    DEADLINE_EXCEEDED: ("counter", "Stages skipped or cut short because the request deadline ran out"),
+    BREAKER_STATE: ("gauge", "Circuit breaker state (0 closed, 1 half-open, 2 open)"),
+    BREAKER_REJECTED: ("counter", "Calls failed fast because a circuit breaker was open"),
+    QUEUE_DEPTH: ("gauge", "Items waiting between pipelined batch stages"),
+    QUEUE_WAIT_SECONDS: ("histogram", "Time from handing an item to a pipelined stage until it is picked up"),
+}
+
+# Upper bounds in seconds; from cache hits (sub-millisecond) to NL-means on large photos
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: tuple, extra: tuple = ()) -> str:
+    items = labels + extra
+    if not items:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+
+def _quantile(counts: list, count: int, q: float) -> float:
+    """Estimate a quantile from bucket counts (linear within the bucket)."""
+    if not count:
+        return 0.0
+    rank = q * count
+    seen = 0
+    for i, n in enumerate(counts):
+        if n and seen + n >= rank:
+            lower = BUCKETS[i - 1] if i > 0 else 0.0
+            upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+            return lower + (upper - lower) * (rank - seen) / n
+        seen += n
+    return BUCKETS[-1]
+
+
+class MetricsRegistry:
+    """Thread-safe store of counters, gauges and fixed-bucket histograms.
+
+    Metrics are identified by name plus keyword labels, e.g.
+    observe(STAGE_SECONDS, 0.12, stage="ocr").
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}  # key -> [bucket counts (last = +Inf), sum, count]
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def add_gauge(self, name: str, delta: float, **labels) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + delta
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [[0] * (len(BUCKETS) + 1), 0.0, 0]
+            hist[0][bisect_left(BUCKETS, value)] += 1
+            hist[1] += value
+            hist[2] += 1
+
+    def counter(self, name: str, **labels) -> float:
+        """Current value of a counter (0 if never incremented)."""
+        with self._lock:
+            return self._counters.get(_key(name, labels), 0)
+
+    def snapshot(self, reset: bool = False) -> dict:
+        """Counters and histograms as plain (picklable) data.
+
+        Gauges describe this process's current state, so they are not
+        included. With reset=True the returned samples are also cleared.
+        """
+        with self._lock:
+            samples = {
+                "counters": dict(self._counters),
+                "histograms": {key: (list(h[0]), h[1], h[2]) for key, h in self._histograms.items()},
+            }
+            if reset:
+                self._counters.clear()
+                self._histograms.clear()
+        return samples
+
+    def merge(self, samples: dict) -> None:
+        """Add samples from snapshot() (e.g. taken in a worker process)."""
+        if not samples:
+            return
+        with self._lock:
+            for key, value in samples["counters"].items():
+                self._counters[key] = self._counters.get(key, 0) + value
+            for key, (counts, total, count) in samples["histograms"].items():
+                hist = self._histograms.get(key)
+                if hist is None:
+                    hist = self._histograms[key] = [[0] * (len(BUCKETS) + 1), 0.0, 0]
+                hist[0] = [a + b for a, b in zip(hist[0], counts)]
+                hist[1] += total
+                hist[2] += count
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            series = {}
+            for kind, store in (("counter", self._counters), ("gauge", self._gauges),
+                                ("histogram", self._histograms)):
+                for (name, labels), value in store.items():
+                    series.setdefault(name, (kind, []))[1].append((labels, value))
+
+        lines = []
+        for name in sorted(series):
+            kind, items = series[name]
+            lines.append(f"# HELP {name} {HELP.get(name, (kind, name))[1]}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(items):
+                if kind != "histogram":
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+                    continue
+                counts, total, count = value
+                cumulative = 0
+                for bound, n in zip(BUCKETS + ("+Inf",), counts):
+                    cumulative += n
+                    le = bound if isinstance(bound, str) else f"{bound:g}"
+                    lines.append(f"{name}_bucket{_format_labels(labels, (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """Human-readable table of stage latencies and counters."""
+        samples = self.snapshot()
+        if not samples["counters"] and not samples["histograms"]:
+            return "No metrics recorded."
+        lines = [f"{'stage':<28} {'count':>6} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'total s':>9}"]
+        for (name, labels), (counts, total, count) in sorted(samples["histograms"].items()):
+            label = ",".join(v for _, v in labels)
+            if name == TESSERACT_SECONDS:
+                label = "tesseract " + ",".join(f"{k}={v}" for k, v in labels)
+            elif name == QUEUE_WAIT_SECONDS:
+                label = f"queue wait {label}"
+            elif name != STAGE_SECONDS:
+                label = f"{name} {label}"
+            lines.append(f"{label:<28} {count:>6} {1000 * total / count:>9.1f} "
+                         f"{1000 * _quantile(counts, count, 0.5):>9.1f} "
+                         f"{1000 * _quantile(counts, count, 0.95):>9.1f} {total:>9.2f}")
+        for (name, labels), value in sorted(samples["counters"].items()):
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        return "\n".join(lines)
+
+
+REGISTRY = MetricsRegistry()
+
+inc = REGISTRY.inc
+counter = REGISTRY.counter
+add_gauge = REGISTRY.add_gauge
+set_gauge = REGISTRY.set_gauge
+observe = REGISTRY.observe
+merge = REGISTRY.merge
+reset = REGISTRY.reset
+render_prometheus = REGISTRY.render_prometheus
+summary = REGISTRY.summary
+
+
+@contextmanager
+def timed(name: str, **labels):
+    """Record the duration of the block in histogram `name`; also usable as a decorator."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe(name, time.perf_counter() - start, **labels)
+
+
+@contextmanager
+def stage(name: str):
+    """Time an interpreter stage and count it as in flight while it runs.
+
+    Usable as a context manager or a decorator:
+
+        @metrics.stage("guidance")
+        def generate_guidance(text): ...
+    """
+    REGISTRY.add_gauge(STAGE_INFLIGHT, 1, stage=name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe(STAGE_SECONDS, time.perf_counter() - start, stage=name)
+        REGISTRY.add_gauge(STAGE_INFLIGHT, -1, stage=name)
+
+
+def collect(fn, *args, **kwargs) -> tuple:
+    """Run fn in a worker process and return (result, samples recorded meanwhile).
+
+    Submit this instead of fn to a process pool, then merge() the samples
+    in the parent. Exceptions propagate as usual; their samples are dropped.
+    """
+    REGISTRY.snapshot(reset=True)
+    result = fn(*args, **kwargs)
+    return result, REGISTRY.snapshot(reset=True)
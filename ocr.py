@@ -1,11 +1,37 @@
 # ocr.py
 import os
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import NamedTuple
 import cv2
-from PIL import Image, ImageEnhance
 import pytesseract
 import numpy as np
 
+import metrics
+from cache import LRUCache, DiskStore, TieredCache, make_image_key
+from resilience import check_deadline, time_left
+from preprocess import OCR_PIPELINE, TEXT_SIZE_PIPELINE, Pipeline, ProcessedImage
+from text_regions import TextRegion, detect_text_regions, reading_order, regions_to_text
+
+try:
+    import tesserocr
+except ImportError:  # optional: in-process backend
+    tesserocr = None
+
+OCR_LANG = "eng"
+PSM_MODES = (3, 6, 11)  # Fully automatic, single block, sparse text
+MIN_CONFIDENCE = 80.0   # stop trying other PSM modes once one scores this high
+LINE_PSM = 7            # single text line, for detected region crops
+
+
+class OcrResult(NamedTuple):
+    """Text recognized by one PSM mode and its mean word confidence (0-100)."""
+    text: str
+    psm: int
+    confidence: float
+
 
 def _ensure_tesseract_available() -> None:
     """Ensure pytesseract knows where the tesseract binary is.
@@ -46,57 +72,531 @@ def _ensure_tesseract_available() -> None:
     )
 
 
-def extract_text(image_path: str) -> str:
+class PytesseractBackend:
+    """OCR backend that shells out to the tesseract binary via pytesseract.
+
+    Every call writes a temp image and starts a new tesseract process, so
+    this is the slow but always-available fallback.
+    """
+
+    name = "pytesseract"
+
+    def __init__(self, lang: str = OCR_LANG):
+        _ensure_tesseract_available()
+        self.lang = lang
+
+    def image_to_string(self, img: np.ndarray, psm: int = 3) -> str:
+        config = f"--oem 3 --psm {psm}"
+        return pytesseract.image_to_string(img, lang=self.lang, config=config)
+
+    def image_to_data(self, img: np.ndarray, psm: int = 3, timeout: float = None) -> tuple:
+        """Return (text, mean word confidence) from a single tesseract run.
+
+        Raises:
+            TimeoutError: If the run takes longer than `timeout` seconds (it is killed)
+        """
+        config = f"--oem 3 --psm {psm}"
+        try:
+            # pytesseract treats a timeout of 0 as "no timeout"
+            data = pytesseract.image_to_data(img, lang=self.lang, config=config,
+                                             output_type=pytesseract.Output.DICT,
+                                             timeout=max(timeout, 0.001) if timeout is not None else 0)
+        except RuntimeError as e:
+            if timeout is not None and "timeout" in str(e):
+                raise TimeoutError(f"Tesseract run exceeded {timeout:.2f}s")
+            raise
+        lines = {}
+        confidences = []
+        for i, word in enumerate(data["text"]):
+            conf = float(data["conf"][i])
+            if conf < 0 or not word.strip():
+                continue
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            lines.setdefault(key, []).append(word)
+            confidences.append(conf)
+        text = "\n".join(" ".join(words) for _, words in sorted(lines.items()))
+        confidence = sum(confidences) / len(confidences) if confidences else 0.0
+        return text, confidence
+
+
+class TesserocrBackend:
+    """OCR backend that keeps Tesseract initialized in-process via tesserocr.
+
+    The traineddata is loaded once per thread and the same engine is reused
+    across calls and PSM modes; pixels are handed over as a raw buffer with
+    no temp files or subprocesses.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, lang: str = OCR_LANG):
+        if tesserocr is None:
+            raise RuntimeError("tesserocr is not installed. Install it with 'pip install tesserocr'.")
+        self.lang = lang
+        self._local = threading.local()
+
+    def _api(self):
+        # TessBaseAPI is not thread-safe, so each thread gets its own engine
+        api = getattr(self._local, "api", None)
+        if api is None:
+            kwargs = {"lang": self.lang, "oem": tesserocr.OEM.DEFAULT}
+            tessdata = os.environ.get("TESSDATA_PREFIX")
+            if tessdata:
+                kwargs["path"] = tessdata
+            api = tesserocr.PyTessBaseAPI(**kwargs)
+            self._local.api = api
+        return api
+
+    def _set_image(self, img: np.ndarray, psm: int):
+        img = np.ascontiguousarray(img)
+        height, width = img.shape[:2]
+        bytes_per_pixel = 1 if img.ndim == 2 else img.shape[2]
+        api = self._api()
+        api.SetPageSegMode(psm)
+        api.SetImageBytes(img.tobytes(), width, height, bytes_per_pixel, img.strides[0])
+        return api
+
+    def image_to_string(self, img: np.ndarray, psm: int = 3) -> str:
+        return self._set_image(img, psm).GetUTF8Text()
+
+    def image_to_data(self, img: np.ndarray, psm: int = 3, timeout: float = None) -> tuple:
+        """Return (text, mean word confidence) from a single recognition pass.
+
+        Raises:
+            TimeoutError: If recognition is cancelled after `timeout` seconds
+        """
+        api = self._set_image(img, psm)
+        if timeout is None:
+            api.Recognize()
+        elif not api.Recognize(max(1, int(timeout * 1000))):
+            raise TimeoutError(f"Tesseract recognition exceeded {timeout:.2f}s")
+        confidences = api.AllWordConfidences()
+        confidence = sum(confidences) / len(confidences) if confidences else 0.0
+        return api.GetUTF8Text(), float(confidence)
+
+
+OCR_BACKENDS = {
+    "pytesseract": PytesseractBackend,
+    "tesserocr": TesserocrBackend,
+}
+
+_backend_cache = {}
+_backend_lock = threading.Lock()
+
+
+def get_backend(name: str = None, lang: str = OCR_LANG):
+    """Return a shared OCR backend instance.
+
+    Args:
+        name: 'tesserocr', 'pytesseract' or 'auto' (default: the
+            `OCR_BACKEND` environment variable, else 'auto'). 'auto' prefers
+            the in-process tesserocr engine and falls back to pytesseract.
+        lang: Tesseract language code(s), e.g. 'eng' or 'eng+hin'.
+
+    Raises:
+        ValueError: If the backend name is unknown
+        RuntimeError: If the requested backend is not available
+    """
+    name = (name or os.environ.get("OCR_BACKEND") or "auto").lower()
+    if name != "auto" and name not in OCR_BACKENDS:
+        raise ValueError(f"Unknown OCR backend: {name}. Use 'auto', 'tesserocr' or 'pytesseract'.")
+
+    with _backend_lock:
+        key = (name, lang)
+        if key not in _backend_cache:
+            if name == "auto":
+                try:
+                    backend = TesserocrBackend(lang)
+                    backend._api()  # fail now if the traineddata can't be loaded
+                except Exception:
+                    backend = PytesseractBackend(lang)
+            else:
+                backend = OCR_BACKENDS[name](lang)
+            _backend_cache[key] = backend
+        return _backend_cache[key]
+
+
+_psm_executor = None
+_psm_executor_pid = None
+_psm_executor_lock = threading.Lock()
+
+
+def _get_psm_executor() -> ThreadPoolExecutor:
+    """Shared thread pool for PSM passes and region crops (tesseract runs outside the GIL).
+
+    Its size is the `OCR_THREADS` environment variable, default one thread
+    per CPU. Worker processes of a pool that already uses every core set it
+    to 1 (see pipeline.init_worker), so they do not oversubscribe the CPUs.
+    """
+    global _psm_executor, _psm_executor_pid
+    with _psm_executor_lock:
+        # Threads do not survive a fork; a child builds its own pool
+        if _psm_executor is None or _psm_executor_pid != os.getpid():
+            threads = int(os.environ.get("OCR_THREADS", "0")) or os.cpu_count() or 1
+            _psm_executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="ocr-psm")
+            _psm_executor_pid = os.getpid()
+        return _psm_executor
+
+
+def _image_to_data(ocr_backend, img: np.ndarray, psm: int, deadline=None) -> tuple:
+    with metrics.timed(metrics.TESSERACT_SECONDS, psm=psm):
+        if deadline is None:
+            return ocr_backend.image_to_data(img, psm)
+        return ocr_backend.image_to_data(img, psm, timeout=deadline.remaining())
+
+
+@metrics.stage("tesseract")
+def ocr_best_psm(img: np.ndarray, psm_modes=PSM_MODES, min_confidence: float = MIN_CONFIDENCE,
+                 backend: str = None, lang: str = OCR_LANG, deadline=None) -> OcrResult:
+    """Run PSM modes until one is confident enough and keep the most confident result.
+
+    Each mode is scored by the mean word confidence from Tesseract's data
+    output. The first mode runs alone; only if it scores below
+    `min_confidence` are the remaining modes run, concurrently, and as soon
+    as one of them reaches `min_confidence` the rest are cancelled (if not
+    yet started) and the best result is returned. Clear images therefore
+    cost a single Tesseract pass.
+
+    Args:
+        img: Preprocessed grayscale image.
+        psm_modes: Candidate Tesseract page segmentation modes, primary first.
+        min_confidence: Early-stop threshold (0-100); None runs every mode
+            concurrently.
+        backend: OCR backend name (see get_backend).
+        lang: Tesseract language code(s).
+        deadline: Optional resilience.Deadline; Tesseract runs are killed
+            when it expires and the best result so far is returned.
+
+    Returns:
+        OcrResult with the winning text, mode and confidence. If no mode finds
+        any text, text is "" and psm is None.
+
+    Raises:
+        DeadlineExceeded: If the deadline expires before any mode found text
     """
-    Extract text from an image using Tesseract OCR with preprocessing.
+    ocr_backend = get_backend(backend, lang)
+    best = OcrResult("", None, 0.0)
+    check_deadline(deadline, "tesseract")
+
+    def confident(psm, text, confidence) -> bool:
+        # Keep the result if it beats the best so far; True once good enough to stop
+        nonlocal best
+        candidate = OcrResult(text.strip(), psm, confidence)
+        if candidate.text and (candidate.confidence, len(candidate.text)) > (best.confidence, len(best.text)):
+            best = candidate
+        return min_confidence is not None and best.confidence >= min_confidence
+
+    fallbacks = list(psm_modes)
+    try:
+        if min_confidence is not None:
+            primary = fallbacks.pop(0)
+            if confident(primary, *_image_to_data(ocr_backend, img, primary, deadline)) or not fallbacks:
+                return best
+
+        executor = _get_psm_executor()
+        futures = {executor.submit(_image_to_data, ocr_backend, img, psm, deadline): psm for psm in fallbacks}
+        awaited = 0
+        try:
+            for future in as_completed(futures, timeout=time_left(deadline)):
+                awaited += 1
+                if confident(futures[future], *future.result()):
+                    break
+        finally:
+            for future in futures:
+                future.cancel()
+            if min_confidence is not None and awaited:
+                metrics.inc(metrics.PSM_FALLBACKS, awaited)
+    except (TimeoutError, FuturesTimeoutError):
+        # Out of time (a run was killed or as_completed gave up): settle for the best so far.
+        # Before Python 3.11 as_completed raises a TimeoutError of its own.
+        if deadline is None:
+            raise
+        exceeded = deadline.exceeded("tesseract")
+        if not best.text:
+            raise exceeded
+
+    return best
+
+
+def ocr_text_regions(img, backend: str = None, psm: int = LINE_PSM, lang: str = OCR_LANG,
+                     pipeline: Pipeline = OCR_PIPELINE, boxes: list = None, deadline=None) -> list:
+    """Detect text lines and OCR each crop concurrently.
+
+    Only the detected crops are preprocessed and passed to Tesseract, which
+    on wide street photos is a small fraction of the frame.
+
+    Args:
+        img: Decoded image, or a ProcessedImage (each crop keeps its applied stages).
+        backend: OCR backend name (see get_backend).
+        psm: Page segmentation mode for each crop (default: single line).
+        lang: Tesseract language code(s).
+        pipeline: Preprocessing applied to each crop (default: OCR_PIPELINE).
+        boxes: (x, y, w, h) boxes to OCR (default: detect_text_regions()).
+        deadline: Optional resilience.Deadline bounding the whole call.
+
+    Returns:
+        List of TextRegion in reading order; empty if nothing looks like text.
+
+    Raises:
+        DeadlineExceeded: If the deadline expires before every crop is done
+    """
+    ocr_backend = get_backend(backend, lang)
+    processed = img if isinstance(img, ProcessedImage) else ProcessedImage(img)
+    if boxes is None:
+        with metrics.stage("detect_regions"):
+            boxes = detect_text_regions(processed.image)
+
+    def recognize(box):
+        x, y, w, h = box
+        crop = ProcessedImage(processed.image[y:y + h, x:x + w], processed.applied)
+        with metrics.stage("preprocess"):
+            crop = pipeline.run(crop).image
+        return _image_to_data(ocr_backend, crop, psm, deadline)
+
+    executor = _get_psm_executor()
+    ordered = reading_order(boxes)
+    futures = [executor.submit(recognize, box) for _, box in ordered]
+    regions = []
+    try:
+        for (line, box), future in zip(ordered, futures):
+            text, confidence = future.result(timeout=time_left(deadline))
+            regions.append(TextRegion(box, text.strip(), confidence, line))
+    except (TimeoutError, FuturesTimeoutError):
+        for future in futures:
+            future.cancel()
+        if deadline is None:
+            raise
+        raise deadline.exceeded("tesseract")
+    return regions
+
+
+def extract_text_scored(img, backend: str = None, psm_modes=PSM_MODES,
+                        min_confidence: float = MIN_CONFIDENCE, lang: str = OCR_LANG,
+                        pipeline: Pipeline = OCR_PIPELINE, normalize_text_size: bool = False,
+                        detect_regions: bool = False, deadline=None) -> OcrResult:
+    """
+    Preprocess an in-memory image and OCR it, returning the winning PSM mode and score.
+    
+    Args:
+        img: Decoded image (BGR as returned by cv2, or grayscale), or a
+            ProcessedImage whose already-applied stages are skipped.
+        backend (str): OCR backend name (see get_backend).
+        psm_modes: Candidate Tesseract page segmentation modes.
+        min_confidence (float): Early-stop confidence threshold (see ocr_best_psm).
+        lang (str): Tesseract language code(s).
+        pipeline (Pipeline): Preprocessing applied before OCR (default: OCR_PIPELINE).
+        normalize_text_size (bool): Rescale the image so its text is about
+            32 px tall before any other preprocessing (see TEXT_SIZE_PIPELINE).
+        detect_regions (bool): OCR only detected text lines (see
+            ocr_text_regions) instead of the whole frame; falls back to the
+            whole frame if no region is found.
+        deadline: Optional resilience.Deadline; checked before each stage
+            and bounding the Tesseract runs.
+    
+    Returns:
+        OcrResult: Extracted text, PSM mode used and its mean word confidence.
+
+    Raises:
+        DeadlineExceeded: If the deadline expires before any text was recognized
+    """
+    # Fail early if no OCR backend is available
+    get_backend(backend, lang)
+    check_deadline(deadline, "preprocess")
+
+    array = img.image if isinstance(img, ProcessedImage) else img
+    if array is None or array.size == 0:
+        raise ValueError("Image is empty.")
+
+    # [Text size normalization ->] grayscale -> denoise -> sharpen ->
+    # adaptive threshold -> contrast, minus any stage already applied
+    if normalize_text_size:
+        pipeline = TEXT_SIZE_PIPELINE.then(pipeline)
+        with metrics.stage("normalize_text_size"):
+            img = TEXT_SIZE_PIPELINE.run(img)
+
+    if detect_regions:
+        regions = ocr_text_regions(img, backend=backend, lang=lang, pipeline=pipeline, deadline=deadline)
+        if regions:
+            found = [r for r in regions if r.text]
+            chars = sum(len(r.text) for r in found)
+            confidence = sum(r.confidence * len(r.text) for r in found) / chars if chars else 0.0
+            return OcrResult(regions_to_text(regions), LINE_PSM if found else None, confidence)
+        metrics.inc(metrics.REGION_FALLBACKS)
+
+    with metrics.stage("preprocess"):
+        processed = pipeline.run(img)
+
+    # OCR with the primary PSM mode, trying the others only if it is not confident
+    return ocr_best_psm(processed.image, psm_modes=psm_modes,
+                        min_confidence=min_confidence, backend=backend, lang=lang, deadline=deadline)
+
+
+def extract_text_from_array(img, backend: str = None, pipeline: Pipeline = OCR_PIPELINE,
+                            normalize_text_size: bool = False, detect_regions: bool = False,
+                            deadline=None) -> str:
+    """
+    Extract text from an in-memory image using Tesseract OCR with preprocessing.
+    
+    Args:
+        img: Decoded image (BGR as returned by cv2, or grayscale), or a ProcessedImage.
+        backend (str): OCR backend name (see get_backend).
+        pipeline (Pipeline): Preprocessing applied before OCR (default: OCR_PIPELINE).
+        normalize_text_size (bool): Rescale so text is about 32 px tall first.
+        detect_regions (bool): OCR only detected text lines.
+        deadline: Optional resilience.Deadline (see extract_text_scored).
+    
+    Returns:
+        str: Extracted text from the image.
+    """
+    return extract_text_scored(img, backend=backend, pipeline=pipeline,
+                               normalize_text_size=normalize_text_size,
+                               detect_regions=detect_regions, deadline=deadline).text
+
+
+def extract_text(image_path: str, backend: str = None, normalize_text_size: bool = False,
+                 detect_regions: bool = False) -> str:
+    """
+    Extract text from an image file using Tesseract OCR with preprocessing.
+
+    Path-based wrapper around extract_text_from_array().
     
     Args:
         image_path (str): Path to the image file.
+        backend (str): OCR backend name (see get_backend).
+        normalize_text_size (bool): Rescale so text is about 32 px tall before
+            denoising; much faster on multi-megapixel photos.
+        detect_regions (bool): OCR only detected text lines, concurrently,
+            instead of the whole frame.
     
     Returns:
         str: Extracted text from the image.
     """
-    # Ensure tesseract binary is available
-    _ensure_tesseract_available()
+    # Fail early if no OCR backend is available
+    get_backend(backend)
 
     # Read image
     img = cv2.imread(image_path)
     if img is None:
         raise ValueError("Image not found or unable to read.")
 
-    # Convert to grayscale
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    return extract_text_from_array(img, backend=backend, normalize_text_size=normalize_text_size,
+                                   detect_regions=detect_regions)
 
-    # Denoise
-    denoised = cv2.fastNlMeansDenoising(gray, h=10)
 
-    # Sharpen
-    kernel = np.array([[0, -1, 0],
-                       [-1, 5, -1],
-                       [0, -1, 0]])
-    sharpened = cv2.filter2D(denoised, -1, kernel)
+_ocr_cache = None
+_ocr_cache_lock = threading.Lock()
 
-    # Adaptive threshold
-    thresh = cv2.adaptiveThreshold(
-        sharpened, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-        cv2.THRESH_BINARY, 31, 10
-    )
 
-    # Convert to PIL image
-    pil_img = Image.fromarray(thresh)
+def _ocr_cache_path() -> str:
+    return os.environ.get("OCR_CACHE_PATH", os.path.join(".cache", "ocr_cache.sqlite"))
 
-    # Optional: Enhance contrast
-    enhancer = ImageEnhance.Contrast(pil_img)
-    pil_img = enhancer.enhance(2.0)
 
-    # OCR using multiple PSM modes for best accuracy
-    psm_modes = [3, 6, 11]  # Fully automatic, single block, sparse text
-    extracted_text = ""
-    for psm in psm_modes:
-        config = f"--oem 3 --psm {psm}"
-        text = pytesseract.image_to_string(pil_img, config=config).strip()
-        if text:
-            extracted_text = text
-            break
+def ocr_cache_stats() -> dict:
+    """Hit/miss counts and persistent tier size of the OCR cache, for a process that does not OCR.
+
+    In the HTTP service the cache is used by the worker processes. Their
+    lookups reach this process as metrics (signboard_cache_requests_total),
+    and the SQLite tier is read through a connection opened for this call,
+    so the cache is never opened here and inherited by forked workers.
+    """
+    hits = metrics.counter(metrics.CACHE_REQUESTS, cache="ocr", result="hit")
+    misses = metrics.counter(metrics.CACHE_REQUESTS, cache="ocr", result="miss")
+    stats = {"hits": int(hits), "misses": int(misses),
+             "hit_rate": hits / (hits + misses) if hits + misses else 0.0}
+    path = _ocr_cache_path()
+    if path and os.path.exists(path):
+        store = DiskStore(path)
+        try:
+            stats["disk_entries"] = len(store)
+            stats["disk_bytes"] = store.total_size()
+        finally:
+            store.close()
+    return stats
+
+
+def get_ocr_cache() -> TieredCache:
+    """Return the shared OCR result cache.
+
+    Configured through environment variables:
+        OCR_CACHE_PATH: SQLite file for the persistent tier
+            (default: .cache/ocr_cache.sqlite; empty string = memory only)
+        OCR_CACHE_MAX_MB: Size bound of the persistent tier (default: 256)
+        OCR_CACHE_ENTRIES: Entries kept in the in-memory LRU (default: 1024)
+    """
+    global _ocr_cache
+    with _ocr_cache_lock:
+        if _ocr_cache is None:
+            memory = LRUCache(int(os.environ.get("OCR_CACHE_ENTRIES", "1024")))
+            path = _ocr_cache_path()
+            disk = None
+            if path:
+                max_bytes = int(float(os.environ.get("OCR_CACHE_MAX_MB", "256")) * 1024 * 1024)
+                disk = DiskStore(path, max_bytes=max_bytes)
+            _ocr_cache = TieredCache(memory, disk)
+        return _ocr_cache
+
+
+def extract_text_cached(img: np.ndarray, preprocess=None, params: dict = None, backend: str = None,
+                        psm_modes=PSM_MODES, min_confidence: float = MIN_CONFIDENCE,
+                        lang: str = OCR_LANG, pipeline: Pipeline = OCR_PIPELINE,
+                        cache: TieredCache = None, normalize_text_size: bool = False,
+                        detect_regions: bool = False, deadline=None) -> OcrResult:
+    """
+    OCR an image through the content-addressed result cache.
+
+    The key is a hash of the decoded pixels of `img` plus `params` (the
+    caller's preprocessing settings, e.g. denoise method, upscale, contrast)
+    and the OCR settings (pipeline, PSM modes, confidence threshold,
+    language). On a hit, preprocessing and OCR are skipped entirely.
+    
+    Args:
+        img (np.ndarray): Decoded image, before any caller-side preprocessing.
+        preprocess: Optional callable applied to `img` on a cache miss; it may
+            return a ProcessedImage so OCR skips stages it already applied.
+            With `normalize_text_size` it receives the rescaled ProcessedImage.
+        params (dict): Settings of `preprocess` that affect the result.
+        backend (str): OCR backend name (see get_backend).
+        psm_modes: Candidate Tesseract page segmentation modes.
+        min_confidence (float): Early-stop confidence threshold (see ocr_best_psm).
+        lang (str): Tesseract language code(s).
+        pipeline (Pipeline): Preprocessing applied before OCR (default: OCR_PIPELINE).
+        cache (TieredCache): Cache to use (default: get_ocr_cache()).
+        normalize_text_size (bool): Rescale so text is about 32 px tall before
+            `preprocess` and the OCR pipeline run.
+        detect_regions (bool): OCR only detected text lines.
+        deadline: Optional resilience.Deadline, checked before `preprocess`
+            (e.g. denoising) and passed on to OCR. A result finished after
+            the deadline may come from fewer PSM modes and is not cached.
+    
+    Returns:
+        OcrResult: Extracted text, PSM mode used and its mean word confidence.
+
+    Raises:
+        DeadlineExceeded: If the deadline expires before any text was recognized
+    """
+    cache = cache or get_ocr_cache()
+    if normalize_text_size:
+        pipeline = TEXT_SIZE_PIPELINE.then(pipeline)
+    settings = dict(params=params or {}, pipeline=pipeline.describe(),
+                    psm_modes=list(psm_modes), min_confidence=min_confidence, lang=lang)
+    if detect_regions:
+        settings["detect_regions"] = True
+    key = make_image_key(img, **settings)
+    cached = cache.get(key)
+    metrics.inc(metrics.CACHE_REQUESTS, cache="ocr", result="miss" if cached is None else "hit")
+    if cached is not None:
+        return OcrResult(*cached)
 
-    return extracted_text
+    if normalize_text_size:
+        # Rescale first so the caller's denoising runs on the smaller image
+        with metrics.stage("normalize_text_size"):
+            img = TEXT_SIZE_PIPELINE.run(img)
+    if preprocess is not None:
+        check_deadline(deadline, "denoise")
+        img = preprocess(img)
+    result = extract_text_scored(img, backend=backend, psm_modes=psm_modes,
+                                 min_confidence=min_confidence, lang=lang, pipeline=pipeline,
+                                 detect_regions=detect_regions, deadline=deadline)
+    if deadline is None or not deadline.expired():
+        cache.put(key, list(result))
+    return result
@@ -0,0 +1,248 @@
+"""
+Compiled phrase table for offline translation of common signage text.
+
+Known phrases ("NO ENTRY", "EXIT", "PLATFORM {0}") are answered locally in
+microseconds instead of a network round trip. The source is the same
+tab-separated file format as TRANSLATION_PHRASES:
+
+    <target_lang>\t<source text>\t<translation>
+
+compile_phrase_table() turns it into a sorted binary index that PhraseTable
+memory-maps and binary-searches, so loading is instant and the table is
+shared between processes through the page cache. A line is looked up as:
+
+1. exact: the text with whitespace collapsed, case kept
+2. normalized: case folded, punctuation dropped ("No-Entry!" = "NO ENTRY")
+3. template: words containing digits replaced by {0}, {1}, ... so
+   "PLATFORM {0}" -> "प्लेटफ़ॉर्म {0}" also answers "Platform 12"
+
+Misses are counted per (language, normalized text); report() returns the
+hit rate and the most frequent misses, ready to be translated and added.
+
+Usage:
+    python phrase_table.py compile signage_phrases.tsv -o .cache/signage_phrases.bin
+    python phrase_table.py lookup .cache/signage_phrases.bin hi "Platform 12"
+"""
+
+import os
+import re
+import mmap
+import struct
+import argparse
+import threading
+import unicodedata
+from collections import Counter
+
+MAGIC = b"SBPT"
+VERSION = 1
+_HEADER = struct.Struct("<4sII")     # magic, version, record count
+_RECORD = struct.Struct("<IIII")     # key offset, key length, value offset, value length
+_PLACEHOLDER = re.compile(r"\{(\d+)\}")
+MAX_TRACKED_MISSES = 10000
+
+
+def _words(text: str) -> list:
+    """Split text into words, treating punctuation and symbols as spaces."""
+    kept = []
+    for ch in text:
+        if ch in "{}" or unicodedata.category(ch)[0] in "LMN":
+            kept.append(ch)
+        else:
+            kept.append(" ")
+    return "".join(kept).split()
+
+
+def exact_key(text: str, lang: str) -> str:
+    return f"e\x1f{lang.lower()}\x1f{' '.join(text.split())}"
+
+
+def normalized_key(text: str, lang: str) -> str:
+    return f"n\x1f{lang.lower()}\x1f{' '.join(w.replace('{', '').replace('}', '') for w in _words(text)).casefold()}"
+
+
+def template_key(text: str, lang: str) -> tuple:
+    """Key with every word containing a digit (or a {n} placeholder) replaced by {i}.
+
+    Returns:
+        (key, words): `words` are the replaced words in their original form.
+    """
+    parts, captured = [], []
+    for word in _words(text):
+        if _PLACEHOLDER.fullmatch(word) or any(ch.isdigit() for ch in word):
+            parts.append(f"{{{len(captured)}}}")
+            captured.append(word)
+        else:
+            parts.append(word.casefold())
+    return f"t\x1f{lang.lower()}\x1f{' '.join(parts)}", captured
+
+
+def read_phrases(path: str) -> list:
+    """Read a phrase file; returns (lang, source, translation) triples."""
+    phrases = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) == 3 and parts[1].strip() and parts[2].strip():
+                phrases.append(tuple(parts))
+    return phrases
+
+
+def compile_phrase_table(source_path: str, output_path: str) -> int:
+    """Compile a phrase file into the binary index read by PhraseTable.
+
+    Sources containing {n} placeholders become templates; all others get an
+    exact and a normalized entry. Later lines win over earlier duplicates.
+
+    Returns:
+        Number of records written.
+    """
+    entries = {}
+    for lang, source, translation in read_phrases(source_path):
+        if _PLACEHOLDER.search(source):
+            entries[template_key(source, lang)[0]] = translation
+        else:
+            entries[exact_key(source, lang)] = translation
+            entries[normalized_key(source, lang)] = translation
+
+    records = sorted((k.encode("utf-8"), v.encode("utf-8")) for k, v in entries.items())
+    blob_start = _HEADER.size + _RECORD.size * len(records)
+    index, blob = bytearray(), bytearray()
+    for key, value in records:
+        index += _RECORD.pack(blob_start + len(blob), len(key), blob_start + len(blob) + len(key), len(value))
+        blob += key + value
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_path = f"{output_path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(records)))
+        f.write(index)
+        f.write(blob)
+    os.replace(tmp_path, output_path)  # readers never see a half-written file
+    return len(records)
+
+
+class PhraseTable:
+    """Read-only, memory-mapped phrase table (see compile_phrase_table)."""
+
+    def __init__(self, path: str):
+        """
+        Raises:
+            ValueError: If the file is not a compiled phrase table
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+        if len(self._map) < _HEADER.size:
+            raise ValueError(f"Not a compiled phrase table: {path}")
+        magic, version, self._count = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a compiled phrase table (or unsupported version): {path}")
+        self._lock = threading.Lock()
+        self.stats = {"exact": 0, "normalized": 0, "template": 0, "misses": 0}
+        self.misses = Counter()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _get(self, key: str):
+        target = key.encode("utf-8")
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key_off, key_len, val_off, val_len = _RECORD.unpack_from(self._map, _HEADER.size + mid * _RECORD.size)
+            probe = self._map[key_off:key_off + key_len]
+            if probe < target:
+                lo = mid + 1
+            elif probe > target:
+                hi = mid
+            else:
+                return self._map[val_off:val_off + val_len].decode("utf-8")
+        return None
+
+    def lookup(self, text: str, lang: str, record: bool = True):
+        """Translation of one line of text, or None if the table does not know it."""
+        match, value = "exact", self._get(exact_key(text, lang))
+        if value is None:
+            match, value = "normalized", self._get(normalized_key(text, lang))
+        if value is None:
+            key, words = template_key(text, lang)
+            template = self._get(key) if words else None
+            if template is not None:
+                match = "template"
+                value = _PLACEHOLDER.sub(
+                    lambda m: words[int(m.group(1))] if int(m.group(1)) < len(words) else m.group(0), template)
+        if record:
+            with self._lock:
+                if value is None:
+                    self.stats["misses"] += 1
+                    miss = (lang.lower(), " ".join(text.split()))
+                    if miss in self.misses or len(self.misses) < MAX_TRACKED_MISSES:
+                        self.misses[miss] += 1
+                else:
+                    self.stats[match] += 1
+        return value
+
+    def report(self, top: int = 50) -> dict:
+        """Hit rate by match type and the most frequent misses."""
+        with self._lock:
+            stats = dict(self.stats)
+            misses = self.misses.most_common(top)
+        lookups = sum(stats.values())
+        hits = lookups - stats["misses"]
+        return {
+            "entries": self._count,
+            "lookups": lookups,
+            "hits": hits,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            **stats,
+            "top_misses": [{"lang": lang, "text": text, "count": count} for (lang, text), count in misses],
+        }
+
+    def write_misses(self, path: str, top: int = 500) -> int:
+        """Write the most frequent misses as phrase-file lines with an empty translation.
+
+        Fill in the third column and append them to the phrase file to grow the table.
+        """
+        misses = self.report(top)["top_misses"]
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("# Most frequent untranslated lines: <lang>\\t<source>\\t<translation to fill in>\n")
+            for miss in misses:
+                f.write(f"{miss['lang']}\t{miss['text']}\t\n")
+        return len(misses)
+
+
+def load_phrase_table(source_path: str, compiled_path: str = None) -> PhraseTable:
+    """Open a phrase table, (re)compiling it first if the source file is newer.
+
+    Args:
+        source_path: Tab-separated phrase file.
+        compiled_path: Binary index (default: .cache/<source name>.bin).
+    """
+    if compiled_path is None:
+        name = os.path.splitext(os.path.basename(source_path))[0]
+        compiled_path = os.path.join(".cache", f"{name}.bin")
+    if not os.path.exists(compiled_path) or os.path.getmtime(compiled_path) < os.path.getmtime(source_path):
+        compile_phrase_table(source_path, compiled_path)
+    return PhraseTable(compiled_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile or query a signage phrase table")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compile_cmd = sub.add_parser("compile", help="Compile a tab-separated phrase file")
+    compile_cmd.add_argument("source", help="Phrase file (<lang>\\t<source>\\t<translation>)")
+    compile_cmd.add_argument("-o", "--output", help="Binary table (default: .cache/<name>.bin)")
+    lookup_cmd = sub.add_parser("lookup", help="Look up a phrase in a compiled table")
+    lookup_cmd.add_argument("table", help="Compiled phrase table")
+    lookup_cmd.add_argument("lang", help="Target language code")
+    lookup_cmd.add_argument("text", help="Text to translate")
+    args = parser.parse_args()
+
+    if args.command == "compile":
+        output = args.output or os.path.join(".cache", os.path.splitext(os.path.basename(args.source))[0] + ".bin")
+        print(f"{compile_phrase_table(args.source, output)} entries written to {output}")
+    else:
+        result = PhraseTable(args.table).lookup(args.text, args.lang)
+        print(result if result is not None else "[not in table]")
@@ -0,0 +1,202 @@
+"""
+Single-image interpretation pipeline: OCR -> translation -> guidance.
+
+Unlike MAIN1.start(), which prints its progress, these helpers return a
+plain dict so results can be collected from worker processes and written
+out as JSON.
+"""
+
+import os
+from functools import partial
+
+import metrics
+from ocr import extract_text_cached
+from translate import translate_text
+from guidance import generate_guidance
+from denoise import denoise_processed
+from image_io import decode_for_ocr, read_for_ocr
+from resilience import Deadline, check_deadline
+
+
+def init_worker() -> None:
+    """Process-pool initializer: keep each tesseract process single-threaded
+    and run one OCR pass at a time per worker, since the pool already uses
+    every core, and drop metrics inherited from the parent on fork so they
+    are not merged back twice."""
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+    os.environ.setdefault("OCR_THREADS", "1")
+    metrics.reset()
+
+
+def _denoise(img, enable_denoise: bool, denoise_method: str):
+    if not enable_denoise:
+        return img
+    try:
+        return denoise_processed(img, method=denoise_method)
+    except Exception:
+        # Same as MAIN1.start(): fall back to the original image
+        return img
+
+
+def ocr_image_bytes(data: bytes, enable_denoise: bool = False, denoise_method: str = "gaussian",
+                    normalize_text_size: bool = False, detect_regions: bool = False,
+                    deadline: Deadline = None) -> str:
+    """Decode an uploaded image from memory and OCR it.
+
+    Meant to run in a worker process: only the encoded bytes cross the
+    process boundary, and nothing touches the filesystem (apart from the
+    shared OCR cache). The image is decoded as grayscale, and JPEGs at a
+    reduced size when normalize_text_size would shrink them anyway (see
+    image_io.decode_for_ocr).
+
+    Args:
+        data: Encoded image (JPEG, PNG, ...)
+        enable_denoise: If True, denoise image before OCR
+        denoise_method: Denoising method ('gaussian', 'nlmeans', 'bilateral')
+        normalize_text_size: If True, rescale so text is about 32 px tall before denoising
+        detect_regions: If True, OCR only detected text lines instead of the whole frame
+        deadline: Request deadline; work that was queued past it is dropped
+            before decoding, and OCR stops when it expires
+
+    Returns:
+        Extracted text ("" if none was found).
+
+    Raises:
+        ValueError: If the data is not a decodable image
+        RuntimeError: If no OCR backend is available
+        DeadlineExceeded: If the deadline expires before text was recognized
+    """
+    check_deadline(deadline, "decode")
+    with metrics.stage("decode"):
+        img = decode_for_ocr(data, normalize_text_size=normalize_text_size)
+    if img is None:
+        raise ValueError("Uploaded file is not a readable image.")
+    return extract_text_cached(
+        img, preprocess=partial(_denoise, enable_denoise=enable_denoise, denoise_method=denoise_method),
+        params={"denoise": denoise_method if enable_denoise else None},
+        normalize_text_size=normalize_text_size,
+        detect_regions=detect_regions,
+        deadline=deadline,
+    ).text
+
+
+def ocr_image_file(image_path: str, enable_denoise: bool = False, denoise_method: str = "gaussian",
+                   normalize_text_size: bool = False, detect_regions: bool = False,
+                   deadline: Deadline = None) -> dict:
+    """Decode and OCR one image file: the CPU-bound part of interpret_image().
+
+    Failures are recorded in the result instead of being raised.
+
+    Returns:
+        Result dict as from interpret_image(), with 'translated_text' and
+        'guidance' not yet filled in; 'status' is 'ok' only if text was found.
+    """
+    result = {
+        "image": image_path,
+        "status": "ok",
+        "extracted_text": None,
+        "translated_text": None,
+        "guidance": None,
+        "error": None,
+    }
+
+    # Decode once (grayscale, reduced where possible); denoising and OCR
+    # both work on the in-memory array
+    with metrics.stage("decode"):
+        img = read_for_ocr(image_path, normalize_text_size=normalize_text_size)
+
+    # Denoising and OCR are skipped on a cache hit
+    try:
+        if img is None:
+            if not os.path.exists(image_path):
+                raise FileNotFoundError(image_path)
+            raise ValueError(f"Not a readable image: {image_path}")
+        extracted = extract_text_cached(
+            img, preprocess=partial(_denoise, enable_denoise=enable_denoise, denoise_method=denoise_method),
+            params={"denoise": denoise_method if enable_denoise else None},
+            normalize_text_size=normalize_text_size,
+            detect_regions=detect_regions,
+            deadline=deadline,
+        ).text
+    except FileNotFoundError as e:
+        result.update(status="error", error=f"Image file not found: {e}")
+        return result
+    except ValueError as e:
+        result.update(status="error", error=str(e))
+        return result
+    except TimeoutError as e:
+        result.update(status="error", error=f"OCR failed: {e}")
+        return result
+    except RuntimeError as e:
+        result.update(status="error", error=f"OCR failed: {e}")
+        return result
+    except Exception as e:
+        result.update(status="error", error=f"{type(e).__name__}: {e}")
+        return result
+
+    result["extracted_text"] = extracted
+    if not extracted or not extracted.strip():
+        result["status"] = "no_text"
+    return result
+
+
+def ocr_image_job(image_path: str, enable_denoise: bool = False, denoise_method: str = "gaussian",
+                  normalize_text_size: bool = False, detect_regions: bool = False,
+                  deadline_seconds: float = None) -> tuple:
+    """Process-pool task for pipelined batches: ocr_image_file() under a fresh deadline.
+
+    Returns:
+        (result, deadline): the deadline travels back with the result so
+        translation in the parent process gets what is left of it.
+    """
+    deadline = Deadline.after(deadline_seconds)
+    return ocr_image_file(image_path, enable_denoise=enable_denoise, denoise_method=denoise_method,
+                          normalize_text_size=normalize_text_size, detect_regions=detect_regions,
+                          deadline=deadline), deadline
+
+
+def interpret_image(image_path: str, target_lang: str = "hi", enable_denoise: bool = False,
+                    denoise_method: str = "gaussian", normalize_text_size: bool = False,
+                    detect_regions: bool = False, deadline_seconds: float = None) -> dict:
+    """Process one signboard image and return its results as a dict.
+
+    Failures are recorded in the result instead of being raised, so a single
+    bad image never aborts a batch run.
+
+    Args:
+        image_path: Path to input image
+        target_lang: Target language for translation (e.g., 'en', 'hi')
+        enable_denoise: If True, denoise image before OCR
+        denoise_method: Denoising method ('gaussian', 'nlmeans', 'bilateral')
+        normalize_text_size: If True, rescale so text is about 32 px tall before denoising
+        detect_regions: If True, OCR only detected text lines instead of the whole frame
+        deadline_seconds: Time budget for this image, from when a worker
+            starts on it; once spent, translation is skipped and the OCR
+            text and guidance are returned (None = no limit)
+
+    Returns:
+        Dict with keys 'image', 'status' ('ok', 'no_text' or 'error'),
+        'extracted_text', 'translated_text', 'guidance' and 'error'.
+    """
+    # 1. OCR
+    result, deadline = ocr_image_job(image_path, enable_denoise=enable_denoise,
+                                     denoise_method=denoise_method,
+                                     normalize_text_size=normalize_text_size,
+                                     detect_regions=detect_regions, deadline_seconds=deadline_seconds)
+    if result["status"] != "ok":
+        return result
+    extracted = result["extracted_text"]
+
+    # 2. Guidance; local and cheap, so it is ready even if translation fails
+    try:
+        result["guidance"] = generate_guidance(extracted)
+    except Exception as e:
+        result["error"] = f"Guidance failed: {e}"
+
+    # 3. Translation, with whatever is left of the deadline
+    try:
+        result["translated_text"] = translate_text(extracted, target_lang, deadline=deadline)
+    except Exception as e:
+        result["error"] = f"Translation failed: {e}"
+
+    return result
@@ -0,0 +1,354 @@
+"""
+Declarative image preprocessing pipelines.
+
+A Pipeline is a list of named stages with parameters. Running it returns a
+ProcessedImage that records which stages were applied, so a later pipeline
+(e.g. the one inside OCR) can skip work that has already been done: a second
+denoise pass, re-thresholding an already binarized image, and so on.
+"""
+
+from typing import NamedTuple
+
+import cv2
+import numpy as np
+
+
+class Stage(NamedTuple):
+    """One preprocessing step: a registered operation name and its parameters."""
+    name: str
+    params: dict
+
+
+class ProcessedImage(NamedTuple):
+    """An image plus the stages that produced it."""
+    image: np.ndarray
+    applied: tuple = ()
+
+
+def stage(name: str, **params) -> Stage:
+    if name not in STAGE_OPS:
+        raise ValueError(f"Unknown preprocessing stage: {name}. Use one of {', '.join(STAGE_OPS)}.")
+    return Stage(name, params)
+
+
+def _grayscale(img):
+    if img.ndim == 2:
+        return img
+    if img.shape[2] == 4:
+        return cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY)
+    return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+
+def _nlmeans(img, h=10, template_window=7, search_window=21):
+    if img.ndim == 2:
+        return cv2.fastNlMeansDenoising(img, None, h=h, templateWindowSize=template_window,
+                                        searchWindowSize=search_window)
+    return cv2.fastNlMeansDenoisingColored(img, None, h=h, templateWindowSize=template_window,
+                                           searchWindowSize=search_window)
+
+
+def _gaussian_blur(img, ksize=5):
+    return cv2.GaussianBlur(img, (ksize, ksize), 0)
+
+
+def _median_blur(img, ksize=3):
+    return cv2.medianBlur(img, ksize)
+
+
+def _bilateral(img, d=9, sigma_color=75, sigma_space=75):
+    return cv2.bilateralFilter(img, d=d, sigmaColor=sigma_color, sigmaSpace=sigma_space)
+
+
+SHARPEN_KERNEL = np.array([[0, -1, 0],
+                           [-1, 5, -1],
+                           [0, -1, 0]], dtype=np.float32)
+
+
+def _sharpen(img):
+    return cv2.filter2D(img, -1, SHARPEN_KERNEL)
+
+
+def _adaptive_threshold(img, block_size=31, c=10):
+    return cv2.adaptiveThreshold(_grayscale(img), 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                 cv2.THRESH_BINARY, block_size, c)
+
+
+def _upscale(img, factor=2):
+    if factor == 1:
+        return img
+    return cv2.resize(img, None, fx=factor, fy=factor, interpolation=cv2.INTER_LANCZOS4)
+
+
+def estimate_text_height(img, analysis_max_dim: int = 1000) -> float:
+    """Estimate the dominant character height of an image in pixels.
+
+    The image is analysed at a reduced size: it is binarized with Otsu in both
+    polarities (dark-on-light and light-on-dark), connected components with
+    a character-like shape are kept, and the median height of the polarity
+    with more candidates is returned (scaled back to full resolution).
+    Returns 0.0 if no text-like components are found.
+    """
+    gray = _grayscale(img)
+    h, w = gray.shape[:2]
+    scale = min(1.0, analysis_max_dim / max(h, w))
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+    small_h = small.shape[0]
+
+    best = []
+    for flag in (cv2.THRESH_BINARY_INV, cv2.THRESH_BINARY):
+        _, binary = cv2.threshold(small, 0, 255, flag | cv2.THRESH_OTSU)
+        _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+        heights = []
+        for x, y, cw, ch, area in stats[1:]:
+            if ch < 4 or ch > small_h / 3:
+                continue
+            if not 0.1 <= cw / ch <= 2.0:       # glyph-like aspect ratio
+                continue
+            if area < 0.1 * cw * ch:             # skip thin frames and lines
+                continue
+            heights.append(ch)
+        if len(heights) > len(best):
+            best = heights
+    if len(best) < 3:
+        return 0.0
+    return float(np.median(best)) / scale
+
+
+def _normalize_text_size(img, target_height=32, min_scale=0.1, max_scale=4.0, tolerance=0.15):
+    # Tesseract is most accurate with characters roughly 20-40 px tall
+    text_height = estimate_text_height(img)
+    if text_height <= 0:
+        return img
+    factor = min(max(target_height / text_height, min_scale), max_scale)
+    if abs(factor - 1.0) <= tolerance:
+        return img
+    interpolation = cv2.INTER_AREA if factor < 1.0 else cv2.INTER_CUBIC
+    return cv2.resize(img, None, fx=factor, fy=factor, interpolation=interpolation)
+
+
+def _contrast(img, factor=2.0):
+    # Same formula as PIL's ImageEnhance.Contrast: blend with the mean gray level
+    mean = int(_grayscale(img).mean() + 0.5)
+    return cv2.addWeighted(img, factor, img, 0, mean * (1.0 - factor))
+
+
+# name -> (operation, kind); at most one stage of each kind is applied
+STAGE_OPS = {
+    "grayscale": (_grayscale, "grayscale"),
+    "nlmeans": (_nlmeans, "denoise"),
+    "gaussian_blur": (_gaussian_blur, "denoise"),
+    "median_blur": (_median_blur, "denoise"),
+    "bilateral": (_bilateral, "denoise"),
+    "sharpen": (_sharpen, "sharpen"),
+    "adaptive_threshold": (_adaptive_threshold, "threshold"),
+    "upscale": (_upscale, "resize"),
+    "normalize_text_size": (_normalize_text_size, "normalize"),
+    "contrast": (_contrast, "contrast"),
+}
+
+
+def _is_redundant(st: Stage, img: np.ndarray, applied: tuple) -> bool:
+    """True if running `st` would repeat or undo work already done."""
+    kind = STAGE_OPS[st.name][1]
+    if kind == "grayscale":
+        return img.ndim == 2
+    kinds = {STAGE_OPS[s.name][1] for s in applied}
+    if kind in kinds and kind != "resize":
+        return True
+    if "threshold" in kinds and kind in ("denoise", "sharpen"):
+        # Denoising or sharpening a binarized image only damages it
+        return True
+    if kind == "contrast" and applied and STAGE_OPS[applied[-1].name][1] == "threshold":
+        # Raising contrast on a pure black/white image is a no-op
+        return st.params.get("factor", 2.0) >= 1.0
+    return False
+
+
+class Pipeline:
+    """An ordered list of preprocessing stages.
+
+    Example:
+        pipeline = Pipeline([stage("grayscale"), stage("nlmeans", h=10),
+                             stage("adaptive_threshold", block_size=31, c=10)])
+        result = pipeline.run(img)          # ProcessedImage
+        ocr_input = result.image
+    """
+
+    def __init__(self, stages):
+        self.stages = tuple(stages)
+
+    def run(self, img, applied=()) -> ProcessedImage:
+        """Apply every stage not already covered by `applied`.
+
+        Args:
+            img: np.ndarray or a ProcessedImage from an earlier pipeline
+                (its applied stages are carried over).
+            applied: Stages already applied to a plain ndarray.
+        """
+        if isinstance(img, ProcessedImage):
+            img, applied = img.image, img.applied
+        applied = tuple(applied)
+        for st in self.stages:
+            if _is_redundant(st, img, applied):
+                continue
+            img = STAGE_OPS[st.name][0](img, **st.params)
+            applied += (st,)
+        return ProcessedImage(img, applied)
+
+    def then(self, other: "Pipeline") -> "Pipeline":
+        return Pipeline(self.stages + other.stages)
+
+    def describe(self) -> list:
+        """JSON-friendly description, used in cache keys."""
+        return [[s.name, dict(sorted(s.params.items()))] for s in self.stages]
+
+    def __repr__(self) -> str:
+        return f"Pipeline({[s.name for s in self.stages]})"
+
+
+# Stand-in color image for FramePreprocessor's one-time redundancy check
+_COLOR_PROBE = np.empty((1, 1, 3), np.uint8)
+
+
+class FramePreprocessor:
+    """Buffer-reusing runner of a Pipeline, for video frames.
+
+    Pipeline.run() allocates a new array at every stage, which for a video
+    stream means several megabytes of garbage per frame. FramePreprocessor
+    compiles the pipeline once (dropping stages that would be redundant on
+    a frame, such as contrast after thresholding), allocates its working
+    buffers for the frame size on first use, and writes every step into
+    them with `dst=`. The output is identical to Pipeline.run().
+
+    The pipeline must start with grayscale (color frames are converted
+    before anything else, which is only what Pipeline.run() does if that
+    is its first stage). Supported stages: grayscale, gaussian_blur,
+    median_blur, sharpen, adaptive_threshold and contrast.
+
+    Not thread-safe: use one instance per worker thread. The array returned
+    by run() is reused by the next call; copy it to keep it.
+    """
+
+    SUPPORTED = ("grayscale", "gaussian_blur", "median_blur", "sharpen", "adaptive_threshold", "contrast")
+
+    def __init__(self, pipeline: "Pipeline"):
+        unsupported = [st.name for st in pipeline.stages if st.name not in self.SUPPORTED]
+        if unsupported:
+            raise ValueError(f"FramePreprocessor does not support stages: {', '.join(unsupported)}")
+        if not pipeline.stages or pipeline.stages[0].name != "grayscale":
+            raise ValueError("FramePreprocessor needs a pipeline that starts with grayscale")
+        self.pipeline = pipeline
+        # Decide redundancy once, as Pipeline.run() would for a color frame
+        self._steps = []
+        applied = ()
+        for st in pipeline.stages:
+            if st.name != "grayscale" and not _is_redundant(st, _COLOR_PROBE, applied):
+                self._steps.append(st)
+                applied += (st,)
+        self._shape = None
+        self._buffers = {}
+
+    def _allocate(self, shape: tuple) -> None:
+        height, width = shape[:2]
+        self._buffers = {
+            "gray": np.empty((height, width), np.uint8),
+            "ping": np.empty((height, width), np.uint8),
+            "pong": np.empty((height, width), np.uint8),
+        }
+        if any(st.name == "adaptive_threshold" for st in self._steps):
+            self._buffers.update(
+                src32=np.empty((height, width), np.float32),
+                mean32=np.empty((height, width), np.float32),
+                mean=np.empty((height, width), np.uint8),
+                diff=np.empty((height, width), np.int16),
+            )
+        self._shape = shape
+
+    def _adaptive_threshold(self, src, dst, block_size=31, c=10):
+        # cv2.adaptiveThreshold(ADAPTIVE_THRESH_GAUSSIAN_C, THRESH_BINARY),
+        # spelled out so its float and mean images live in our buffers
+        b = self._buffers
+        np.copyto(b["src32"], src)
+        cv2.GaussianBlur(b["src32"], (block_size, block_size), 0, dst=b["mean32"],
+                         borderType=cv2.BORDER_REPLICATE | cv2.BORDER_ISOLATED)
+        cv2.convertScaleAbs(b["mean32"], dst=b["mean"])
+        cv2.subtract(src, b["mean"], dst=b["diff"], dtype=cv2.CV_16S)
+        return cv2.compare(b["diff"], -int(np.ceil(c)), cv2.CMP_GT, dst=dst)
+
+    def run(self, frame: np.ndarray) -> np.ndarray:
+        """Preprocess a BGR, BGRA or grayscale frame; returns a reused buffer."""
+        if frame.shape != self._shape:
+            self._allocate(frame.shape)
+        b = self._buffers
+
+        if frame.ndim == 2:
+            current = frame
+        else:
+            code = cv2.COLOR_BGRA2GRAY if frame.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+            current = cv2.cvtColor(frame, code, dst=b["gray"])
+
+        targets = ("ping", "pong")
+        for i, st in enumerate(self._steps):
+            dst = b[targets[i % 2]]
+            params = st.params
+            if st.name == "gaussian_blur":
+                k = params.get("ksize", 5)
+                current = cv2.GaussianBlur(current, (k, k), 0, dst=dst)
+            elif st.name == "median_blur":
+                current = cv2.medianBlur(current, params.get("ksize", 3), dst=dst)
+            elif st.name == "sharpen":
+                current = cv2.filter2D(current, -1, SHARPEN_KERNEL, dst=dst)
+            elif st.name == "adaptive_threshold":
+                current = self._adaptive_threshold(current, dst, **params)
+            elif st.name == "contrast":
+                factor = params.get("factor", 2.0)
+                mean = int(cv2.mean(current)[0] + 0.5)
+                current = cv2.addWeighted(current, factor, current, 0, mean * (1.0 - factor), dst=dst)
+        return current
+
+
+# Preprocessing that OCR applies before Tesseract
+OCR_PIPELINE = Pipeline([
+    stage("grayscale"),
+    stage("nlmeans", h=10),
+    stage("sharpen"),
+    stage("adaptive_threshold", block_size=31, c=10),
+    stage("contrast", factor=2.0),
+])
+
+# Rescale so text falls in Tesseract's preferred size range; run it before
+# any denoising so NL-means works on the (usually much smaller) result
+TEXT_SIZE_PIPELINE = Pipeline([stage("normalize_text_size", target_height=32)])
+
+# Webcam frames (camera_engine.py): grayscale + light denoise only ...
+CAMERA_GRAY_PIPELINE = Pipeline([stage("grayscale"), stage("median_blur", ksize=3)])
+
+# ... or also sharpen and binarize before OCR
+CAMERA_PIPELINE = Pipeline([
+    stage("grayscale"),
+    stage("median_blur", ksize=3),
+    stage("sharpen"),
+    stage("adaptive_threshold", block_size=31, c=10),
+])
+
+# denoise.py methods
+DENOISE_PIPELINES = {
+    "gaussian": Pipeline([stage("grayscale"), stage("gaussian_blur", ksize=5)]),
+    "nlmeans": Pipeline([stage("nlmeans", h=10)]),
+    "bilateral": Pipeline([stage("bilateral", d=9, sigma_color=75, sigma_space=75)]),
+}
+
+
+def advanced_pipeline(upscale: int = 1, contrast: float = 1.0) -> Pipeline:
+    """The Streamlit apps' "Advanced preprocessing" options as a pipeline."""
+    stages = [
+        stage("grayscale"),
+        stage("nlmeans", h=10),
+        stage("sharpen"),
+        stage("adaptive_threshold", block_size=31, c=10),
+    ]
+    if upscale > 1:
+        stages.append(stage("upscale", factor=upscale))
+    if contrast != 1.0:
+        stages.append(stage("contrast", factor=contrast))
+    return Pipeline(stages)
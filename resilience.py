@@ -0,0 +1,245 @@
+"""
+Request deadlines and a circuit breaker for the interpreter pipeline.
+
+A Deadline is created once per request and handed down through denoise ->
+OCR -> translate -> guidance. Each stage checks it before starting and
+bounds its blocking calls by the time left (Tesseract runs get a timeout,
+translation requests a client timeout), so a request never takes much
+longer than its budget:
+
+    deadline = Deadline.after(8.0)
+    text = extract_text_cached(img, deadline=deadline).text
+    translated = translate_text(text, "hi", deadline=deadline)
+
+The translation backend is wrapped in a CircuitBreaker. After
+`failure_threshold` consecutive failures it opens and calls fail at once
+with CircuitOpenError instead of waiting for a timeout; callers then
+return partial results (OCR text and guidance). After `reset_timeout`
+seconds it lets `half_open_probes` trial calls through: if they all
+succeed it closes again, any failure reopens it.
+
+The services take their per-request budget from the REQUEST_DEADLINE
+environment variable (see request_deadline()). Breakers are configured
+through environment variables (NAME is the
+breaker name in upper case, e.g. GOOGLE):
+    <NAME>_BREAKER_FAILURES: Consecutive failures that open it (default: 5)
+    <NAME>_BREAKER_RESET: Seconds open before probing (default: 30)
+    <NAME>_BREAKER_PROBES: Trial calls in the half-open state (default: 1)
+"""
+
+import os
+import time
+import threading
+
+import metrics
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a request's time budget runs out before or during a stage."""
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a backend whose circuit breaker is open."""
+
+
+def _restore_deadline(seconds: float, remaining: float) -> "Deadline":
+    deadline = Deadline(seconds)
+    deadline.expires_at = time.monotonic() + remaining
+    return deadline
+
+
+class Deadline:
+    """Point in time by which a request must be finished.
+
+    Deadlines can be sent to worker processes: they are pickled as the time
+    left and re-anchored on the receiving side's clock.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def after(cls, seconds: float = None):
+        """Deadline `seconds` from now, or None (no deadline) if seconds is None or <= 0."""
+        return cls(seconds) if seconds is not None and seconds > 0 else None
+
+    def __reduce__(self):
+        return _restore_deadline, (self.seconds, self.remaining())
+
+    def remaining(self) -> float:
+        """Seconds left (0.0 once expired)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def timeout(self, cap: float = None) -> float:
+        """Time left, but at most `cap`; for bounding a single blocking call."""
+        remaining = self.remaining()
+        return remaining if cap is None else min(remaining, cap)
+
+    def check(self, stage: str) -> None:
+        """Raise DeadlineExceeded if the budget is spent before `stage` starts."""
+        if self.expired():
+            raise self.exceeded(stage)
+
+    def exceeded(self, stage: str) -> DeadlineExceeded:
+        """Count `stage` as cut short by this deadline and return the exception to raise."""
+        metrics.inc(metrics.DEADLINE_EXCEEDED, stage=stage)
+        return DeadlineExceeded(f"Deadline of {self.seconds:g}s exceeded in {stage}")
+
+
+def request_deadline(default: float = 10.0):
+    """Deadline for a new request: REQUEST_DEADLINE seconds (default 10; 0 = none)."""
+    return Deadline.after(float(os.environ.get("REQUEST_DEADLINE", str(default))))
+
+
+def check_deadline(deadline, stage: str) -> None:
+    """Deadline.check() that accepts None (no deadline)."""
+    if deadline is not None:
+        deadline.check(stage)
+
+
+def time_left(deadline, cap: float = None):
+    """Timeout for one blocking call: the time left, capped; `cap` if there is no deadline."""
+    return cap if deadline is None else deadline.timeout(cap)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with half-open probing.
+
+    Thread-safe; use allow() / record_success() / record_failure() around
+    a call, or call() to do all three. Every allowed call must end in one
+    of record_success(), record_failure() or release(), or a half-open
+    circuit runs out of probes.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 half_open_probes: int = 1):
+        """
+        Args:
+            name: Label for metrics and error messages.
+            failure_threshold: Consecutive failures that open the circuit.
+            reset_timeout: Seconds the circuit stays open before probing.
+            half_open_probes: Trial calls let through while half-open; all
+                must succeed to close the circuit.
+        """
+        if failure_threshold < 1 or half_open_probes < 1:
+            raise ValueError("failure_threshold and half_open_probes must be at least 1")
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0      # trial calls started in this half-open period
+        self._successes = 0   # trial calls that succeeded
+        metrics.set_gauge(metrics.BREAKER_STATE, 0, breaker=name)
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        self._probes = self._successes = 0
+        metrics.set_gauge(metrics.BREAKER_STATE, _STATE_VALUES[state], breaker=self.name)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def retry_after(self) -> float:
+        """Seconds until the next probe is allowed (0.0 unless open)."""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> bool:
+        """Whether a call may go through now; a True in half-open state reserves a probe."""
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._set_state(HALF_OPEN)
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+        metrics.inc(metrics.BREAKER_REJECTED, breaker=self.name)
+        return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._successes += 1
+                if self._successes >= self.half_open_probes:
+                    self._set_state(CLOSED)
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                self._set_state(OPEN)
+
+    def release(self) -> None:
+        """Give back a call allowed by allow() that ended without a verdict (e.g. cancelled)."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes > self._successes:
+                self._probes -= 1
+
+    def reject(self) -> CircuitOpenError:
+        """The exception to raise when allow() returned False."""
+        return CircuitOpenError(f"{self.name} unavailable (circuit open, retry in {self.retry_after():.0f}s)")
+
+    def call(self, fn, *args, **kwargs):
+        """Call fn through the breaker.
+
+        DeadlineExceeded from fn means the caller ran out of time, not that
+        the backend failed, so it releases the call instead of counting it.
+
+        Raises:
+            CircuitOpenError: If the circuit is open (fn is not called)
+        """
+        if not self.allow():
+            raise self.reject()
+        try:
+            result = fn(*args, **kwargs)
+        except DeadlineExceeded:
+            self.release()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Return the process-wide breaker `name`, configured from the environment."""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            prefix = f"{name.upper()}_BREAKER_"
+            breaker = CircuitBreaker(
+                name,
+                failure_threshold=int(os.environ.get(prefix + "FAILURES", "5")),
+                reset_timeout=float(os.environ.get(prefix + "RESET", "30")),
+                half_open_probes=int(os.environ.get(prefix + "PROBES", "1")),
+            )
+            _breakers[name] = breaker
+        return breaker
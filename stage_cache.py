@@ -0,0 +1,138 @@
+"""
+Per-session memoization of pipeline stage results for the Streamlit apps.
+
+Streamlit reruns the whole script on every widget change. StageCache keeps
+each stage's output keyed on its input's key plus the stage's own
+parameters, so a rerun only recomputes the stages downstream of the
+setting that changed:
+
+    upload ─> decode ─> denoise ─> binarize ─> adjust ─> ocr ─┬─> translate (+ lang)
+                          method               upscale,        └─> guidance
+                                               contrast
+
+Keys are derived without computing anything (key() hashes the upstream key
+and the parameters), so a later stage can be looked up first and earlier
+stages are only computed on its miss. The cache lives in the session's
+st.session_state and is bounded in bytes; the least recently used
+entries of that session are evicted first.
+"""
+
+import os
+import json
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+SESSION_KEY = "_stage_cache"
+
+
+def upload_digest(data) -> str:
+    """Content hash of an uploaded file's bytes."""
+    return hashlib.sha256(memoryview(data)).hexdigest()
+
+
+def _sizeof(value) -> int:
+    """Approximate memory held by a cached value (arrays dominate)."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        return 64 + sum(_sizeof(v) for v in value)
+    if isinstance(value, dict):
+        return 64 + sum(_sizeof(v) for v in value.values())
+    return 64
+
+
+class StageCache:
+    """Byte-bounded LRU of stage results for one session.
+
+    Example:
+        decode_key = stages.key("decode", upload_digest(data))
+        img = stages.cached(decode_key, lambda: decode_image(data))
+        denoise_key = stages.key("denoise", decode_key, method="nlmeans")
+        denoised = stages.cached(denoise_key, lambda: denoise_processed(img, "nlmeans"))
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def key(stage: str, *inputs, **params) -> str:
+        """Key of a stage's output: its name, upstream keys/values and parameters."""
+        h = hashlib.sha256(stage.encode())
+        h.update(json.dumps([inputs, params], sort_keys=True, default=str).encode())
+        return f"{stage}:{h.hexdigest()[:32]}"
+
+    def peek(self, key: str):
+        """The cached value, or None; does not count as a use."""
+        entry = self._data.get(key)
+        return entry[0] if entry is not None else None
+
+    def cached(self, key: str, compute, deadline=None):
+        """Return the value for `key`, calling compute() on a miss.
+
+        Exceptions from compute() propagate and nothing is cached, so a
+        failed stage is retried on the next rerun. Neither is a value
+        computed while `deadline` (resilience.Deadline) ran out: it may be
+        cut short (e.g. the best OCR result so far), so it is returned but
+        computed again on the next rerun.
+        """
+        entry = self._data.get(key)
+        if entry is not None:
+            self._data.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[0]
+
+        self.stats["misses"] += 1
+        value = compute()
+        if deadline is None or not deadline.expired():
+            self.put(key, value)
+        return value
+
+    def put(self, key: str, value) -> None:
+        """Store a value, evicting least recently used entries over max_bytes."""
+        old = self._data.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        size = _sizeof(value)
+        if size > self.max_bytes:
+            return  # would evict everything else; recompute instead
+        self._data[key] = (value, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted) = self._data.popitem(last=False)
+            self._bytes -= evicted
+            self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._bytes = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def get_stage_cache(session_state, max_bytes: int = None) -> StageCache:
+    """Return the StageCache of a Streamlit session, creating it on first use.
+
+    Args:
+        session_state: st.session_state (any mutable mapping works).
+        max_bytes: Memory bound per session (default: STAGE_CACHE_MB
+            environment variable, or 256 MB).
+    """
+    cache = session_state.get(SESSION_KEY)
+    if cache is None:
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get("STAGE_CACHE_MB", "256")) * 1024 * 1024)
+        cache = StageCache(max_bytes)
+        session_state[SESSION_KEY] = cache
+    return cache
@@ -0,0 +1,252 @@
+"""
+Pipelined execution of the interpreter stages over many images.
+
+    images ─> OCR (process pool) ─┬─> [translate queue] ─> translate (threads) ─┬─> results
+                                  └─> [guidance queue]  ─> guidance (thread)  ──┘
+
+OCR is CPU-bound and runs on worker processes. Translation mostly waits on
+the network, so it runs on threads in this process, where all images share
+one translation memory and circuit breaker. Guidance does not depend on the
+translation and runs alongside it. While image N is being translated,
+image N+1 is already in OCR.
+
+The queues between stages are bounded: when translation falls behind, the
+OCR loop blocks on the full queue and stops handing new images to the
+pool, so memory stays flat however long the batch. Each queue reports its
+depth (gauge signboard_queue_depth) and how long items wait in it
+(histogram signboard_queue_wait_seconds). A translate queue that stays full
+while the OCR loop is blocked calls for more translation workers; an empty
+one with short waits means OCR is the bottleneck.
+
+A worker process that dies (e.g. killed for running out of memory) breaks
+the whole pool: the images it had in flight are recorded as errors, and
+the rest go to a fresh pool from restart_pool, or are recorded as errors
+too if there is none.
+"""
+
+import time
+import queue
+import threading
+from concurrent.futures import wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+import metrics
+
+_DONE = object()
+
+
+def _ocr_error(path, e: Exception) -> dict:
+    """Result for an image whose OCR job never returned one."""
+    return {"image": path, "status": "error", "extracted_text": None, "translated_text": None,
+            "guidance": None, "error": f"{type(e).__name__}: {e}"}
+
+
+class StageQueue:
+    """Bounded FIFO between two stages that records its depth and wait times."""
+
+    def __init__(self, name: str, maxsize: int = 0):
+        self.name = name
+        self.maxsize = maxsize
+        self._queue = queue.Queue(maxsize)
+        self._lock = threading.Lock()
+        self.peak = 0
+        self.blocked_seconds = 0.0  # producers waiting for room in a full queue
+
+    def put(self, item) -> None:
+        """Add an item, blocking while the queue is full."""
+        offered = time.perf_counter()
+        self._queue.put((offered, item))
+        if item is _DONE:
+            return
+        depth = self._queue.qsize()
+        with self._lock:
+            self.blocked_seconds += time.perf_counter() - offered
+            self.peak = max(self.peak, depth)
+        metrics.set_gauge(metrics.QUEUE_DEPTH, depth, queue=self.name)
+
+    def get(self):
+        offered, item = self._queue.get()
+        if item is not _DONE:
+            metrics.observe(metrics.QUEUE_WAIT_SECONDS, time.perf_counter() - offered, queue=self.name)
+        metrics.set_gauge(metrics.QUEUE_DEPTH, self._queue.qsize(), queue=self.name)
+        return item
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"maxsize": self.maxsize, "peak": self.peak,
+                    "blocked_seconds": self.blocked_seconds}
+
+
+class ThreadStage:
+    """Worker threads that apply fn to (key, payload) items from an inbox.
+
+    Each result is put on the outbox as (key, stage name, value); if fn
+    raises, the exception is sent as the value, so one bad item never stops
+    the stage.
+    """
+
+    def __init__(self, name: str, fn, inbox: StageQueue, outbox: StageQueue, workers: int = 1):
+        self.name = name
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self._threads = [threading.Thread(target=self._run, name=f"{name}-{i}", daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self.inbox.get()
+            if item is _DONE:
+                return
+            key, payload = item
+            try:
+                value = self.fn(payload)
+            except Exception as e:
+                value = e
+            self.outbox.put((key, self.name, value))
+
+    def close(self) -> None:
+        """Finish the queued items, then stop the workers."""
+        for _ in self._threads:
+            self.inbox.put(_DONE)
+        for thread in self._threads:
+            thread.join()
+
+
+def run_pipelined(pool, images, ocr_job, translate, guide, on_result, max_inflight: int,
+                  translation_workers: int = 4, queue_size: int = None,
+                  restart_pool=None) -> dict:
+    """OCR images on a process pool while earlier ones are translated and guided.
+
+    Args:
+        pool: Executor for OCR (a ProcessPoolExecutor).
+        images: Iterable of image paths.
+        ocr_job: Picklable callable, path -> (result dict, deadline), as
+            pipeline.ocr_image_job; results with status 'ok' go on to
+            translation and guidance.
+        translate: Callable (text, deadline) -> translated text.
+        guide: Callable text -> guidance.
+        on_result: Called with each finished result dict, in completion
+            order, always from the same thread.
+        max_inflight: OCR jobs handed to the pool at once.
+        translation_workers: Threads translating concurrently.
+        queue_size: Bound of the translate and guidance queues (default:
+            max_inflight).
+        restart_pool: Callable returning a new executor to carry on with
+            once a worker crash has broken the current one (None = record
+            the images not yet OCR'd as errors). Pools it returns are shut
+            down before returning; the one passed in is left to the caller.
+
+    Returns:
+        Per-queue statistics: {name: {'maxsize', 'peak', 'blocked_seconds'}}.
+    """
+    queue_size = queue_size or max_inflight
+    translate_queue = StageQueue("translate", queue_size)
+    guidance_queue = StageQueue("guidance", queue_size)
+    done_queue = StageQueue("results")  # unbounded, so stages never block on the writer
+    stages = [
+        ThreadStage("translate", lambda item: translate(*item), translate_queue, done_queue,
+                    workers=translation_workers),
+        ThreadStage("guidance", guide, guidance_queue, done_queue),
+    ]
+    writer_errors = []
+
+    def write_results():
+        # Joins the OCR, translate and guidance parts of each image
+        results, parts_left = {}, {}
+        while True:
+            item = done_queue.get()
+            if item is _DONE:
+                return
+            key, stage, value = item
+            if stage == "ocr":
+                results[key] = value
+                parts_left[key] = len(stages) if value["status"] == "ok" else 0
+            elif isinstance(value, Exception):
+                results[key]["error"] = f"{stage.capitalize()} failed: {value}"
+                parts_left[key] -= 1
+            else:
+                results[key]["translated_text" if stage == "translate" else "guidance"] = value
+                parts_left[key] -= 1
+            if parts_left[key] == 0:
+                del parts_left[key]
+                try:
+                    on_result(results.pop(key))
+                except Exception as e:
+                    writer_errors.append(e)
+
+    writer = threading.Thread(target=write_results, name="results", daemon=True)
+    writer.start()
+
+    pending = {}
+    pools = [pool]  # the last one is in use
+    remaining = iter(enumerate(images))
+
+    def replace_pool(broken) -> bool:
+        """Move on to a fresh pool (once per broken one); False if there is none."""
+        if restart_pool is None:
+            return False
+        if pools[-1] is broken:
+            pools.append(restart_pool())
+            broken.shutdown(wait=False, cancel_futures=True)
+        return True
+
+    def submit_next() -> bool:
+        nxt = next(remaining, None)
+        if nxt is None:
+            return False
+        key, path = nxt
+        current = pools[-1]
+        try:
+            # Workers send their stage metrics back with each result
+            future = current.submit(metrics.collect, ocr_job, path)
+        except BrokenProcessPool as e:
+            if not replace_pool(current):
+                done_queue.put((key, "ocr", _ocr_error(path, e)))
+                return True
+            current = pools[-1]
+            future = current.submit(metrics.collect, ocr_job, path)
+        pending[future] = (key, path, current)
+        return True
+
+    def fill() -> None:
+        while len(pending) < max_inflight and submit_next():
+            pass
+
+    try:
+        fill()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                key, path, owner = pending.pop(future)
+                deadline = None
+                try:
+                    (result, deadline), samples = future.result()
+                    metrics.merge(samples)
+                except BrokenProcessPool as e:
+                    # A worker died; every job still on its pool fails with it
+                    replace_pool(owner)
+                    result = _ocr_error(path, e)
+                except Exception as e:
+                    # Result could not be returned
+                    result = _ocr_error(path, e)
+                # The OCR part goes first, so the writer knows what else to wait for
+                done_queue.put((key, "ocr", result))
+                if result["status"] == "ok":
+                    # Blocks while translation is behind: backpressure on OCR
+                    translate_queue.put((key, (result["extracted_text"], deadline)))
+                    guidance_queue.put((key, result["extracted_text"]))
+                fill()
+    finally:
+        for stage in stages:
+            stage.close()
+        done_queue.put(_DONE)
+        writer.join()
+        for replacement in pools[1:]:
+            replacement.shutdown(wait=True, cancel_futures=True)
+
+    if writer_errors:
+        raise writer_errors[0]
+    return {q.name: q.stats() for q in (translate_queue, guidance_queue)}
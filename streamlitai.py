@@ -7,13 +7,14 @@ Run with: streamlit run app.py
 import streamlit as st
 import cv2
 import numpy as np
-from PIL import Image, ImageEnhance
-import os
-import tempfile
-from ocr import extract_text
+from ocr import extract_text_from_array
 from translate import translate_text
 from guidance import generate_guidance
-from denoise import denoise_image
+from denoise import denoise_processed
+from preprocess import ProcessedImage, advanced_pipeline
+from stage_cache import get_stage_cache, upload_digest
+from resilience import request_deadline
+from image_io import decode_image
 
 # Page configuration
 st.set_page_config(
@@ -85,77 +86,52 @@ with col1:
     )
 
 if uploaded_file is not None:
-    # Save uploaded file to temporary location
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as tmp:
-        tmp.write(uploaded_file.getbuffer())
-        img_path = tmp.name
+    # Stage results are memoized per session, so a widget change only reruns
+    # the stages downstream of it (see stage_cache.py)
+    stages = get_stage_cache(st.session_state)
+    # Time budget for the stages this rerun has to compute (REQUEST_DEADLINE)
+    deadline = request_deadline()
+    file_bytes = np.frombuffer(uploaded_file.getbuffer(), dtype=np.uint8)
+    decode_key = stages.key("decode", upload_digest(file_bytes))
     
     try:
-        # Read original image
-        original_img = cv2.imread(img_path)
+        # Decode the upload straight from memory (no temp file round trip),
+        # upright according to its EXIF orientation
+        original_img = stages.cached(decode_key, lambda: decode_image(file_bytes))
         if original_img is None:
             st.error("Failed to read image file")
         else:
             original_rgb = cv2.cvtColor(original_img, cv2.COLOR_BGR2RGB)
+            denoise_key = stages.key("denoise", decode_key, method=denoise_method if enable_denoise else None)
+            binarize_key = stages.key("binarize", denoise_key, enabled=enable_preprocessing)
+            adjust_key = stages.key("adjust", binarize_key, upscale=upscale, contrast=contrast)
             
-            # Process image
-            processing_image = original_img.copy()
-            
-            # Step 1: Denoise if enabled
-            if enable_denoise:
+            # Step 1: Denoise if enabled; the ProcessedImage records which
+            # stages ran so OCR does not denoise or threshold a second time
+            def denoise():
+                if not enable_denoise:
+                    return ProcessedImage(original_img), None
                 with st.spinner(f"Denoising image ({denoise_method} method)..."):
                     try:
-                        denoised_path = denoise_image(img_path, method=denoise_method)
-                        processing_image = cv2.imread(denoised_path)
-                        st.success(f"✓ Denoised using {denoise_method} method")
+                        return denoise_processed(ProcessedImage(original_img), method=denoise_method), None
                     except Exception as e:
-                        st.warning(f"Denoising failed: {e}. Proceeding with original image.")
+                        return ProcessedImage(original_img), str(e)
+            processing_image, denoise_error = stages.cached(denoise_key, denoise)
+            if enable_denoise:
+                if denoise_error:
+                    st.warning(f"Denoising failed: {denoise_error}. Proceeding with original image.")
+                else:
+                    st.success(f"✓ Denoised using {denoise_method} method")
             
             # Step 2: Preprocess for OCR if advanced mode enabled
+            # (grayscale -> NL-means unless already denoised -> sharpen ->
+            # adaptive threshold, cached apart from upscale -> contrast so a
+            # slider change does not redo the denoising)
             if enable_preprocessing:
-                gray = cv2.cvtColor(processing_image, cv2.COLOR_BGR2GRAY)
-                
-                # Denoise if not already done
-                if not enable_denoise:
-                    denoised = cv2.fastNlMeansDenoising(gray, h=10)
-                else:
-                    denoised = gray
-                
-                # Sharpening kernel
-                kernel = np.array([[0, -1, 0],
-                                   [-1, 5, -1],
-                                   [0, -1, 0]])
-                sharpened = cv2.filter2D(denoised, -1, kernel)
-                
-                # Adaptive threshold
-                thresh = cv2.adaptiveThreshold(
-                    sharpened, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                    cv2.THRESH_BINARY, 31, 10
-                )
-                
-                # Convert to PIL and enhance
-                pil_img = Image.fromarray(thresh)
-                
-                # Upscale
-                if upscale > 1:
-                    pil_img = pil_img.resize(
-                        (pil_img.width * upscale, pil_img.height * upscale),
-                        Image.LANCZOS
-                    )
-                
-                # Contrast enhancement
-                if contrast != 1.0:
-                    enhancer = ImageEnhance.Contrast(pil_img)
-                    pil_img = enhancer.enhance(contrast)
-                
-                # Save processed image temporarily for OCR
-                proc_tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".processed.png")
-                proc_tmp.close()
-                processed_path = proc_tmp.name
-                pil_img.save(processed_path)
-                ocr_input_path = processed_path
-            else:
-                ocr_input_path = img_path
+                binarized = stages.cached(binarize_key, lambda: advanced_pipeline().run(processing_image))
+                processing_image = stages.cached(
+                    adjust_key, lambda: advanced_pipeline(upscale, contrast).run(binarized))
+            ocr_input = processing_image
             
             # Display original image
             with col1:
@@ -166,33 +142,54 @@ if uploaded_file is not None:
             if enable_preprocessing:
                 with col2:
                     st.markdown("### Processed Image for OCR")
-                    processed_rgb = cv2.cvtColor(cv2.imread(ocr_input_path), cv2.COLOR_BGR2RGB)
-                    st.image(processed_rgb, use_column_width=True)
+                    st.image(ocr_input.image, use_column_width=True)
             
             # Step 3: OCR
             st.markdown("---")
-            with st.spinner("Extracting text using OCR..."):
-                try:
-                    extracted_text = extract_text(ocr_input_path)
-                    st.success("✓ OCR completed")
-                except Exception as e:
-                    st.error(f"❌ OCR failed: {e}")
-                    extracted_text = None
+            try:
+                def run_ocr():
+                    with st.spinner("Extracting text using OCR..."):
+                        return extract_text_from_array(ocr_input, deadline=deadline)
+                # Text cut short by the deadline is shown but not memoized
+                extracted_text = stages.cached(stages.key("ocr", adjust_key), run_ocr, deadline=deadline)
+                st.success("✓ OCR completed")
+            except Exception as e:
+                st.error(f"❌ OCR failed: {e}")
+                extracted_text = None
             
             if extracted_text:
                 # Display extracted text
                 st.subheader("📝 Extracted Text")
                 st.text_area("Detected text:", value=extracted_text, height=100, disabled=True)
                 
-                # Step 4: Translate
+                # Guidance does not depend on the translation: compute it first
+                # so it is there even when translation fails or runs out of time
+                def guide():
+                    with st.spinner("Generating guidance..."):
+                        return generate_guidance(extracted_text)
+                try:
+                    guidance = stages.cached(stages.key("guidance", extracted_text), guide)
+                    guidance_error = None
+                except Exception as e:
+                    guidance = "Unable to generate guidance"
+                    guidance_error = e
+                
+                # Step 4: Translate (fails fast once the deadline is spent or
+                # the translation service is marked down)
                 st.markdown("---")
-                with st.spinner(f"Translating to {target_language[0]}..."):
-                    try:
-                        translated_text = translate_text(extracted_text, target_lang_code)
-                        st.success("✓ Translation completed")
-                    except Exception as e:
-                        st.warning(f"Translation failed: {e}")
-                        translated_text = extracted_text
+                def translate():
+                    with st.spinner(f"Translating to {target_language[0]}..."):
+                        result = translate_text(extracted_text, target_lang_code, deadline=deadline)
+                    if result.startswith("Translation Error"):
+                        raise RuntimeError(result)  # not cached, retried on the next rerun
+                    return result
+                try:
+                    translated_text = stages.cached(
+                        stages.key("translate", extracted_text, lang=target_lang_code), translate)
+                    st.success("✓ Translation completed")
+                except Exception as e:
+                    st.warning(f"Translation failed: {e}")
+                    translated_text = extracted_text
                 
                 # Display translated text
                 st.subheader(f"🌐 Translated Text ({target_language[0]})")
@@ -200,13 +197,10 @@ if uploaded_file is not None:
                 
                 # Step 5: Guidance
                 st.markdown("---")
-                with st.spinner("Generating guidance..."):
-                    try:
-                        guidance = generate_guidance(extracted_text)
-                        st.success("✓ Guidance generated")
-                    except Exception as e:
-                        st.warning(f"Guidance generation failed: {e}")
-                        guidance = "Unable to generate guidance"
+                if guidance_error is None:
+                    st.success("✓ Guidance generated")
+                else:
+                    st.warning(f"Guidance generation failed: {guidance_error}")
                 
                 # Display guidance
                 st.subheader("💡 Guidance")
@@ -243,31 +237,7 @@ GUIDANCE:
                 - Enabling denoising
                 - Ensuring the text in the image is clear and readable
                 """)
-        
-        # Clean up temporary files
-        try:
-            # remove uploaded temp
-            try:
-                os.remove(img_path)
-            except:
-                pass
 
-            # remove processed image if created
-            if enable_preprocessing and 'processed_path' in locals():
-                try:
-                    os.remove(processed_path)
-                except:
-                    pass
-
-            # remove denoised image if denoise_image returned a temp path
-            if enable_denoise and 'denoised_path' in locals():
-                try:
-                    os.remove(denoised_path)
-                except:
-                    pass
-        except:
-            pass
-    
     except Exception as e:
         st.error(f"Error processing image: {e}")
 else:
@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+import pytest
+
+import translate
+import translate_stub
+from async_translate import REQUEST_ERRORS, AsyncTranslator, RateLimitError
+from cache import LRUCache, TieredCache
+from resilience import CLOSED, OPEN, CircuitBreaker, CircuitOpenError, Deadline, DeadlineExceeded
+
+
+@pytest.fixture
+def stub():
+    """Start translate_stub.py on a free port; returns a function that sets its behavior."""
+    servers = []
+
+    def start(**behavior):
+        server = translate_stub.serve(port=0, **behavior)
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}/translate_a/single"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def memory(monkeypatch):
+    memory = TieredCache(LRUCache(100), None)
+    monkeypatch.setattr(translate, "_memory", memory)
+    return memory
+
+
+def run(coro_fn, **kwargs):
+    """Run coro_fn(client) with a fresh AsyncTranslator, closing it afterwards."""
+    async def main():
+        async with AsyncTranslator(**kwargs) as client:
+            return await coro_fn(client), client
+    return asyncio.run(main())
+
+
+def test_concurrent_requests_share_one_client(stub):
+    endpoint = stub(latency=0.2)
+
+    async def translate_all(client):
+        return await asyncio.gather(*(client.translate(f"SIGN {i}", "hi") for i in range(8)))
+
+    start = time.perf_counter()
+    results, client = run(translate_all, endpoint=endpoint, max_concurrency=4, use_memory=False,
+                          use_local=False, breaker=CircuitBreaker("test"))
+    elapsed = time.perf_counter() - start
+    assert results == [f"[hi] SIGN {i}" for i in range(8)]
+    assert client.stats["requests"] == 8
+    # Four at a time: two rounds of 0.2 s, not eight
+    assert 0.35 < elapsed < 1.2
+
+
+def test_unique_lines_go_in_one_request_and_are_remembered(stub, memory):
+    endpoint = stub()
+
+    async def twice(client):
+        first = await client.translate("EXIT\n\n  exit\nSTOP", "hi")
+        second = await client.translate("STOP\nEXIT", "hi")
+        return first, second
+
+    (first, second), client = run(twice, endpoint=endpoint, use_local=False, breaker=CircuitBreaker("test"))
+    assert first == "[hi] EXIT\n\n  [hi] EXIT\n[hi] STOP"
+    assert second == "[hi] STOP\n[hi] EXIT"
+    assert client.stats["requests"] == 1
+    assert memory.get(translate.memory_key("stop", "hi")) == "[hi] STOP"
+
+
+def test_deadline_expires_without_charging_the_breaker(stub):
+    endpoint = stub(latency=1.0)
+    breaker = CircuitBreaker("test", failure_threshold=1)
+
+    async def late(client):
+        with pytest.raises(DeadlineExceeded, match="translate"):
+            await client.translate("EXIT", "hi", deadline=Deadline(0.1))
+
+    start = time.perf_counter()
+    run(late, endpoint=endpoint, use_memory=False, use_local=False, breaker=breaker)
+    assert time.perf_counter() - start < 0.9
+    assert breaker.state == CLOSED
+
+    async def spent(client):
+        with pytest.raises(DeadlineExceeded):
+            await client.translate("EXIT", "hi", deadline=Deadline(0))
+
+    _, client = run(spent, endpoint=endpoint, use_memory=False, use_local=False, breaker=breaker)
+    assert client.stats["requests"] == 0
+
+
+def test_backend_timeout_counts_as_failure(stub):
+    endpoint = stub(latency=1.0)
+    breaker = CircuitBreaker("test", failure_threshold=1)
+
+    async def slow(client):
+        with pytest.raises(REQUEST_ERRORS):
+            await client.translate("EXIT", "hi")
+
+    _, client = run(slow, endpoint=endpoint, timeout=0.1, max_retries=1, backoff_base=0.01,
+                    use_memory=False, use_local=False, breaker=breaker)
+    assert client.stats["errors"] == 2  # timed out, retried, timed out again
+    assert breaker.state == OPEN
+
+
+def test_breaker_opens_after_repeated_failures(stub):
+    endpoint = stub(error_rate=1.0)
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+
+    async def failing(client):
+        for _ in range(2):
+            with pytest.raises(RateLimitError):
+                await client.translate("EXIT", "hi")
+        sent = client.stats["requests"]
+        with pytest.raises(CircuitOpenError):
+            await client.translate("EXIT", "hi")
+        return sent
+
+    sent, client = run(failing, endpoint=endpoint, max_retries=1, backoff_base=0.01, backoff_max=0.01,
+                       use_memory=False, use_local=False, breaker=breaker)
+    assert breaker.state == OPEN
+    assert sent == 4  # two attempts per call
+    assert client.stats["requests"] == sent
+    assert client.stats["rate_limited"] == 4
@@ -0,0 +1,135 @@
+import os
+
+import numpy as np
+import pytest
+
+import cache
+from cache import DiskStore, LRUCache, TieredCache, make_image_key
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "cache" / "store.sqlite")
+
+
+def test_image_key_depends_on_pixels_and_params():
+    img = np.zeros((4, 4), np.uint8)
+    key = make_image_key(img, psm=3)
+    assert make_image_key(img.copy(), psm=3) == key
+    assert make_image_key(img, psm=6) != key
+    assert make_image_key(np.ones((4, 4), np.uint8), psm=3) != key
+
+
+def test_lru_evicts_least_recently_used():
+    lru = LRUCache(max_entries=2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1  # "b" is now the oldest
+    lru.put("c", 3)
+    assert lru.get("b") is None
+    assert (lru.get("a"), lru.get("c"), len(lru)) == (1, 3, 2)
+
+
+def test_lru_ttl(clock):
+    lru = LRUCache(ttl=10)
+    lru.put("a", 1)
+    clock.now += 9
+    assert lru.get("a") == 1
+    clock.now += 2
+    assert lru.get("a") is None
+    assert len(lru) == 0
+
+
+def test_disk_store_round_trip_and_size_triggers(store_path):
+    store = DiskStore(store_path)
+    store.put("a", {"text": "NO PARKING"})
+    store.put("b", "EXIT")
+    assert store.get("a") == {"text": "NO PARKING"}
+    size = store.total_size()
+    assert size == len('{"text": "NO PARKING"}') + len('"EXIT"')
+
+    store.put("a", "x")  # replacing an entry replaces its size
+    assert store.total_size() == len('"x"') + len('"EXIT"')
+    store.clear()
+    assert (len(store), store.total_size()) == (0, 0)
+
+
+def test_disk_store_evicts_least_recently_accessed(store_path, clock):
+    store = DiskStore(store_path, max_bytes=25)
+    for i, key in enumerate("abc"):
+        clock.now += 1
+        store.put(key, "x" * 6)  # 8 bytes each as JSON
+    clock.now += 1
+    assert store.get("a") is not None  # "b" is now the least recently used
+    clock.now += 1
+    store.put("d", "x" * 6)
+    assert store.total_size() <= 25
+    assert store.get("b") is None
+    assert store.get("a") is not None and store.get("d") is not None
+
+
+def test_disk_store_ttl(store_path, clock):
+    store = DiskStore(store_path, ttl=10)
+    store.put("a", 1)
+    clock.now += 11
+    assert store.get("a") is None
+    assert len(store) == 0
+
+
+def test_disk_store_is_persistent(store_path):
+    DiskStore(store_path).put("a", [1, 2])
+    assert DiskStore(store_path).get("a") == [1, 2]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_disk_store_reconnects_after_fork(store_path):
+    store = DiskStore(store_path)
+    store.put("a", 1)
+    parent_conn = store._conn
+    pid = os.fork()
+    if pid == 0:
+        ok = store._conn is not parent_conn and store.get("a") == 1
+        store.put("b", 2)
+        os._exit(0 if ok else 1)
+    _, status = os.waitpid(pid, 0)
+    assert status == 0
+    assert store._conn is parent_conn
+    assert store.get("b") == 2
+
+
+def test_tiered_cache_promotes_disk_hits(store_path):
+    tiered = TieredCache(LRUCache(), DiskStore(store_path))
+    tiered.put("a", "NO PARKING")
+    tiered.memory.clear()
+    assert tiered.get("a") == "NO PARKING"  # from disk
+    assert tiered.get("a") == "NO PARKING"  # promoted to memory
+    assert tiered.get("b") is None
+    stats = tiered.stats()
+    assert (stats["hits"], stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (2, 1, 1, 1)
+    assert stats["disk_entries"] == 1
+
+
+def test_tiered_cache_promotion_keeps_the_disk_expiry(store_path, clock):
+    tiered = TieredCache(LRUCache(ttl=100), DiskStore(store_path, ttl=100))
+    tiered.put("a", "EXIT")
+    clock.now += 60
+    tiered.memory.clear()
+    assert tiered.get("a") == "EXIT"  # promoted from disk with 40 s left
+    clock.now += 50
+    assert tiered.memory.get("a") is None
+    assert tiered.get("a") is None
@@ -0,0 +1,104 @@
+import cv2
+import numpy as np
+import pytest
+
+from frame_gate import FrameGate, block_change, block_signature
+
+
+def frame(text: str = "NO PARKING", brightness: int = 0) -> np.ndarray:
+    img = np.full((480, 640, 3), 230, np.uint8)
+    cv2.putText(img, text, (40, 260), cv2.FONT_HERSHEY_SIMPLEX, 2.5, (20, 20, 20), 6)
+    return cv2.add(img, np.full_like(img, brightness)) if brightness else img
+
+
+def steady(gate: FrameGate, img: np.ndarray):
+    """Feed the same frame until the camera counts as still; return the last decision."""
+    for _ in range(gate.steady_frames):
+        decision = gate.check(img)
+    return decision
+
+
+def test_block_change_threshold():
+    a = np.zeros((10, 10), np.float32)
+    b = a.copy()
+    b[0, :2] = 13
+    b[5, 5] = 12  # not more than the level
+    assert block_change(a, b) == pytest.approx(0.02)
+    assert block_change(a, a) == 0.0
+
+
+def test_signature_ignores_exposure_changes():
+    gray = cv2.cvtColor(frame(), cv2.COLOR_BGR2GRAY)
+    brighter = cv2.add(gray, np.full_like(gray, 15))
+    assert block_change(block_signature(gray), block_signature(brighter)) == 0.0
+
+
+def test_first_frame_waits_for_steady_camera():
+    gate = FrameGate(steady_frames=3)
+    img = frame()
+    assert [gate.check(img).reason for _ in range(3)] == ["moving", "moving", "first"]
+
+
+def test_skips_unchanged_and_accepts_changed_scene():
+    gate = FrameGate()
+    decision = steady(gate, frame())
+    assert decision.run and decision.change == 1.0
+    gate.commit()
+
+    assert gate.check(frame()) == (False, "unchanged", 0.0, pytest.approx(decision.sharpness))
+    assert gate.check(frame(brightness=10)).reason == "unchanged"
+
+    # New text on the same sign: the jump counts as movement, then it is OCR'd once still
+    new = frame("TOW AWAY ZONE")
+    assert gate.check(new).reason == "moving"
+    decision = steady(gate, new)
+    assert (decision.run, decision.reason) == (True, "changed")
+    assert decision.change >= gate.change_threshold
+    gate.commit()
+    assert gate.check(new).reason == "unchanged"
+
+
+def test_uncommitted_frame_is_not_the_reference():
+    gate = FrameGate()
+    assert steady(gate, frame()).run
+    # Not committed (e.g. OCR was busy): the next still frame passes again
+    assert gate.check(frame()).reason == "first"
+
+
+def test_change_threshold():
+    gate = FrameGate(change_threshold=1.01)
+    steady(gate, frame())
+    gate.commit()
+    new = frame("TOW AWAY ZONE")
+    gate.check(new)
+    assert steady(gate, new).reason == "unchanged"
+
+
+def test_rejects_blurred_frames():
+    gate = FrameGate(steady_frames=1)
+    sharp = frame()
+    first = gate.check(sharp)
+    assert first.reason == "first"
+    gate.commit()
+    blurred = cv2.GaussianBlur(sharp, (0, 0), 8)
+    decision = gate.check(blurred)
+    assert decision.reason == "moving"  # the blur changes the block grid
+    decision = gate.check(blurred)
+    assert (decision.run, decision.reason) == (False, "blurred")
+    assert decision.sharpness < gate.blur_ratio * first.sharpness
+
+
+def test_min_sharpness_floor():
+    gate = FrameGate(steady_frames=1, min_sharpness=1e9)
+    assert gate.check(frame()).reason == "blurred"
+
+
+def test_reset_and_stats():
+    gate = FrameGate(steady_frames=2)
+    img = frame()
+    steady(gate, img)
+    gate.commit()
+    gate.check(img)
+    gate.reset()
+    assert gate.check(img).reason == "first"
+    assert gate.stats == {"frames": 4, "passed": 2, "unchanged": 1, "moving": 1, "blurred": 0}
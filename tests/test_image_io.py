@@ -0,0 +1,108 @@
+import io
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from image_io import decode_for_ocr, decode_image, image_size, is_jpeg, read_for_ocr
+from preprocess import estimate_text_height
+
+ORIENTATION = 0x0112
+
+
+def encode(img, ext=".jpg") -> bytes:
+    ok, buf = cv2.imencode(ext, img)
+    assert ok
+    return buf.tobytes()
+
+
+def sign(font_scale: float, thickness: int, size=(3000, 4000)) -> np.ndarray:
+    img = np.full(size, 255, np.uint8)
+    cv2.putText(img, "HOTEL PARKING", (200, size[0] // 2), cv2.FONT_HERSHEY_SIMPLEX,
+                font_scale, 0, thickness)
+    return img
+
+
+@pytest.fixture
+def rotated_jpeg() -> bytes:
+    """400x200 JPEG with a dark top-left corner, tagged to be shown rotated 90° clockwise."""
+    raw = np.full((200, 400, 3), 255, np.uint8)
+    raw[:40, :40] = 0
+    im = Image.fromarray(raw)
+    exif = im.getexif()
+    exif[ORIENTATION] = 6
+    buf = io.BytesIO()
+    im.save(buf, "JPEG", exif=exif.tobytes())
+    return buf.getvalue()
+
+
+def test_decode_image_formats():
+    img = sign(2, 4, size=(300, 400))
+    png = encode(img, ".png")
+    assert not is_jpeg(png)
+    assert is_jpeg(encode(img))
+    assert image_size(png) == (400, 300)
+    assert np.array_equal(decode_image(png, grayscale=True), img)
+    assert decode_image(png).shape == (300, 400, 3)
+    assert decode_image(np.frombuffer(png, np.uint8), grayscale=True).shape == (300, 400)
+    assert decode_image(encode(img), grayscale=True, reduce=4).shape == (75, 100)
+
+
+def test_decode_image_unreadable():
+    assert decode_image(b"") is None
+    assert decode_image(b"not an image") is None
+    assert image_size(b"not an image") is None
+    with pytest.raises(ValueError, match="Unsupported reduction: 3"):
+        decode_image(encode(np.zeros((8, 8), np.uint8)), reduce=3)
+
+
+@pytest.mark.parametrize("reduce", [1, 2, 4, 8])
+@pytest.mark.parametrize("grayscale", [True, False])
+def test_reduced_decode_applies_exif_orientation(rotated_jpeg, reduce, grayscale):
+    img = decode_image(rotated_jpeg, grayscale=grayscale, reduce=reduce)
+    h, w = img.shape[:2]
+    assert (h, w) == (400 // reduce, 200 // reduce)
+    # The dark corner ends up top right once the image is upright
+    corner = 40 // reduce
+    assert img[:corner // 2, -corner // 2:].mean() < 64
+    assert img[:corner // 2, :corner // 2].mean() > 192
+
+
+def test_decode_for_ocr_keeps_preview_when_text_is_large():
+    data = encode(sign(6, 14))
+    assert decode_for_ocr(data).shape == (3000, 4000)
+    img = decode_for_ocr(data, normalize_text_size=True)
+    assert img.shape == (750, 1000)
+    assert estimate_text_height(img) >= 32 * 0.85
+
+
+def test_decode_for_ocr_never_shrinks_text_below_target():
+    data = encode(sign(4, 9))
+    full_height = estimate_text_height(decode_for_ocr(data))
+    # Too small for the 1/4 preview: decoded again at 1/2
+    img = decode_for_ocr(data, normalize_text_size=True)
+    assert img.shape == (1500, 2000)
+    assert full_height / 2 >= 32 * 0.85
+    # Small text: decoded at full size
+    assert decode_for_ocr(encode(sign(2, 5)), normalize_text_size=True).shape == (3000, 4000)
+
+
+def test_decode_for_ocr_applies_exif_orientation(rotated_jpeg):
+    img = decode_for_ocr(rotated_jpeg, normalize_text_size=True)
+    assert img.shape == (400, 200)
+
+
+def test_decode_for_ocr_decodes_other_formats_at_full_size():
+    assert decode_for_ocr(encode(sign(6, 14), ".png"), normalize_text_size=True).shape == (3000, 4000)
+    assert decode_for_ocr(b"not an image", normalize_text_size=True) is None
+
+
+def test_read_for_ocr(tmp_path):
+    path = tmp_path / "straße.jpg"
+    path.write_bytes(encode(sign(6, 14)))
+    assert read_for_ocr(str(path)).shape == (3000, 4000)
+    assert read_for_ocr(str(path), normalize_text_size=True).shape == (750, 1000)
+    assert read_for_ocr(str(tmp_path / "missing.jpg")) is None
+    (tmp_path / "empty.jpg").write_bytes(b"")
+    assert read_for_ocr(str(tmp_path / "empty.jpg")) is None
@@ -0,0 +1,55 @@
+from keyword_matcher import KeywordMatcher
+
+
+def matches(matcher, text):
+    return sorted(matcher.find_all(text))
+
+
+def test_overlapping_keywords_share_one_scan():
+    matcher = KeywordMatcher()
+    for keyword in ("he", "she", "his", "hers"):
+        matcher.add(keyword, payload=keyword)
+    assert matches(matcher, "ushers") == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")]
+
+
+def test_matching_is_case_insensitive():
+    matcher = KeywordMatcher()
+    matcher.add("No Parking", payload="parking")
+    assert matches(matcher, "NO PARKING HERE") == [(0, 10, "parking")]
+
+
+def test_whole_word_requires_boundaries():
+    matcher = KeywordMatcher()
+    matcher.add("exit", payload="exit", whole_word=True)
+    assert matches(matcher, "exit only") == [(0, 4, "exit")]
+    assert matches(matcher, "exiting") == []
+
+
+def test_whole_word_keeps_combining_marks_in_the_word():
+    matcher = KeywordMatcher()
+    matcher.add("रुक", payload="stop", whole_word=True)
+    assert matches(matcher, "रुको") == []  # the vowel sign continues the word
+    assert matches(matcher, "रुक जाओ") == [(0, 3, "stop")]
+
+
+def test_add_after_build_does_not_duplicate_matches():
+    matcher = KeywordMatcher()
+    matcher.add("he", payload="he")
+    matcher.add("she", payload="she")
+    matcher.build()
+    assert matches(matcher, "she") == [(0, 3, "she"), (1, 3, "he")]
+
+    matcher.add("e", payload="e")
+    matcher.build()
+    assert matches(matcher, "she") == [(0, 3, "she"), (1, 3, "he"), (2, 3, "e")]
+    matcher.build()
+    assert matches(matcher, "she") == [(0, 3, "she"), (1, 3, "he"), (2, 3, "e")]
+
+
+def test_search_rebuilds_after_add():
+    matcher = KeywordMatcher()
+    matcher.add("stop", payload="stop")
+    assert matches(matcher, "bus stop") == [(4, 8, "stop")]
+    matcher.add("bus", payload="bus")
+    assert matches(matcher, "bus stop") == [(0, 3, "bus"), (4, 8, "stop")]
+    assert len(matcher) == 2
@@ -0,0 +1,118 @@
+import asyncio
+import io
+import json
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+import main
+
+
+def crash_worker(data, **kwargs):
+    os._exit(1)
+
+
+def echo_text(data, **kwargs):
+    return data.decode()
+
+
+class FakeTranslator:
+    async def translate(self, text, lang, deadline=None):
+        if text == "FAIL":
+            raise ConnectionError("backend down")
+        return f"[{lang}] {text}"
+
+
+def make_zip(entries):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as archive:
+        for name, data in entries.items():
+            archive.writestr(name, data)
+    return buf.getvalue()
+
+
+@pytest.fixture
+def pool():
+    main.app.state.pool = ProcessPoolExecutor(max_workers=1)
+    yield
+    main.app.state.pool.shutdown(wait=True, cancel_futures=True)
+
+
+@pytest.fixture
+def server(pool, monkeypatch):
+    monkeypatch.setattr(main, "ocr_image_bytes", echo_text)
+    main.app.state.translator = FakeTranslator()
+    main.app.state.inflight = 0
+
+
+def test_run_ocr_replaces_pool_after_worker_crash(pool, monkeypatch):
+    broken = main.app.state.pool
+    monkeypatch.setattr(main, "ocr_image_bytes", crash_worker)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(main.run_ocr(b"STOP"))
+    assert exc.value.status_code == 503
+    assert exc.value.headers == {"Retry-After": "1"}
+    assert main.app.state.pool is not broken
+
+    monkeypatch.setattr(main, "ocr_image_bytes", echo_text)
+    assert asyncio.run(main.run_ocr(b"STOP")) == "STOP"
+
+
+def test_expand_uploads_unpacks_zip_archives(monkeypatch):
+    monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", 10)
+    archive = make_zip({"signs/": b"", "signs/stop.jpg": b"STOP", "notes.txt": b"hello",
+                        "big.png": b"x" * 11})
+    items = main.expand_uploads([("photo.png", b"EXIT"), ("batch.zip", archive),
+                                 ("broken.zip", b"not a zip")])
+    assert items[0] == ("photo.png", b"EXIT", None)
+    assert items[1] == ("batch.zip/signs/stop.jpg", b"STOP", None)
+    assert items[2] == ("batch.zip/big.png", None, "Larger than 0 MB")
+    assert items[3][:2] == ("broken.zip", None)
+    assert items[3][2].startswith("Bad zip archive: ")
+    assert len(items) == 4
+
+
+def test_expand_uploads_detects_zip_without_extension():
+    items = main.expand_uploads([("upload", make_zip({"a.png": b"A"}))])
+    assert items == [("upload/a.png", b"A", None)]
+
+
+def test_interpret_item_rows(server):
+    keys = ["index", "image", "status", "extracted_text", "translated_text", "guidance", "error"]
+    ok = asyncio.run(main.interpret_item(0, "a.png", b"NO PARKING", None, "hi"))
+    assert list(ok) == keys
+    assert ok["status"] == "ok"
+    assert ok["extracted_text"] == "NO PARKING"
+    assert ok["translated_text"] == "[hi] NO PARKING"
+    assert ok["guidance"]
+    assert ok["error"] is None
+
+    blank = asyncio.run(main.interpret_item(1, "b.png", b"  ", None, "hi"))
+    assert (blank["status"], blank["translated_text"], blank["guidance"]) == ("no_text", None, None)
+
+    rejected = asyncio.run(main.interpret_item(2, "c.png", None, "Larger than 20 MB", "hi"))
+    assert list(rejected) == keys
+    assert (rejected["status"], rejected["error"]) == ("error", "Larger than 20 MB")
+
+    failed = asyncio.run(main.interpret_item(3, "d.png", b"FAIL", None, "hi"))
+    assert failed["status"] == "ok"
+    assert failed["translated_text"] == "Translation Error: backend down"
+
+
+def test_batch_streams_one_ndjson_line_per_image(server):
+    files = [UploadFile(io.BytesIO(b"STOP"), filename="stop.png"),
+             UploadFile(io.BytesIO(make_zip({"a.png": b"EXIT", "b.png": b""})), filename="more.zip")]
+
+    async def collect():
+        response = await main.interpret_signboard_batch(files, "hi")
+        return [line async for line in response.body_iterator]
+
+    lines = asyncio.run(collect())
+    assert all(line.endswith("\n") for line in lines)
+    rows = sorted((json.loads(line) for line in lines), key=lambda row: row["index"])
+    assert [(row["index"], row["image"], row["status"]) for row in rows] == [
+        (0, "stop.png", "ok"), (1, "more.zip/a.png", "ok"), (2, "more.zip/b.png", "no_text")]
+    assert main.app.state.inflight == 0
@@ -0,0 +1,101 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import metrics
+from metrics import BUCKETS, CACHE_REQUESTS, STAGE_SECONDS, MetricsRegistry
+
+
+def work(n):
+    metrics.inc(CACHE_REQUESTS, cache="ocr", result="miss")
+    metrics.REGISTRY.observe(STAGE_SECONDS, 0.02, stage="ocr")
+    return n * 2
+
+
+@pytest.fixture
+def registry():
+    metrics.reset()
+    yield metrics.REGISTRY
+    metrics.reset()
+
+
+def test_render_prometheus_text_format():
+    reg = MetricsRegistry()
+    reg.inc(CACHE_REQUESTS, cache="ocr", result="hit")
+    reg.inc(CACHE_REQUESTS, 2, cache="ocr", result="miss")
+    reg.set_gauge(metrics.INFLIGHT_REQUESTS, 3)
+    reg.observe(STAGE_SECONDS, 0.003, stage="ocr")
+    reg.observe(STAGE_SECONDS, 0.2, stage="ocr")
+    reg.observe(STAGE_SECONDS, 60, stage="ocr")
+    lines = reg.render_prometheus().splitlines()
+
+    assert "# TYPE signboard_cache_requests_total counter" in lines
+    assert 'signboard_cache_requests_total{cache="ocr",result="hit"} 1' in lines
+    assert 'signboard_cache_requests_total{cache="ocr",result="miss"} 2' in lines
+    assert "# TYPE signboard_inflight_requests gauge" in lines
+    assert "signboard_inflight_requests 3" in lines
+    assert "# HELP signboard_stage_seconds Latency of interpreter stages" in lines
+    assert "# TYPE signboard_stage_seconds histogram" in lines
+
+    buckets = [line for line in lines if line.startswith("signboard_stage_seconds_bucket")]
+    assert len(buckets) == len(BUCKETS) + 1
+    assert 'signboard_stage_seconds_bucket{stage="ocr",le="0.0025"} 0' in buckets
+    assert 'signboard_stage_seconds_bucket{stage="ocr",le="0.005"} 1' in buckets
+    assert 'signboard_stage_seconds_bucket{stage="ocr",le="0.25"} 2' in buckets
+    assert 'signboard_stage_seconds_bucket{stage="ocr",le="30"} 2' in buckets
+    assert buckets[-1] == 'signboard_stage_seconds_bucket{stage="ocr",le="+Inf"} 3'
+    assert 'signboard_stage_seconds_sum{stage="ocr"} 60.203000' in lines
+    assert 'signboard_stage_seconds_count{stage="ocr"} 3' in lines
+
+
+def test_label_values_are_escaped():
+    reg = MetricsRegistry()
+    reg.inc(CACHE_REQUESTS, cache='a"b\\c\nd')
+    assert 'signboard_cache_requests_total{cache="a\\"b\\\\c\\nd"} 1' in reg.render_prometheus()
+
+
+def test_merge_sums_samples():
+    parent, worker = MetricsRegistry(), MetricsRegistry()
+    parent.inc(CACHE_REQUESTS, cache="ocr", result="hit")
+    parent.observe(STAGE_SECONDS, 0.01, stage="ocr")
+    worker.inc(CACHE_REQUESTS, 2, cache="ocr", result="hit")
+    worker.observe(STAGE_SECONDS, 0.5, stage="ocr")
+    worker.set_gauge(metrics.STAGE_INFLIGHT, 1, stage="ocr")
+
+    parent.merge(worker.snapshot())
+    parent.merge(None)
+    samples = parent.snapshot()
+    assert parent.counter(CACHE_REQUESTS, cache="ocr", result="hit") == 3
+    counts, total, count = samples["histograms"][(STAGE_SECONDS, (("stage", "ocr"),))]
+    assert (sum(counts), total, count) == (2, pytest.approx(0.51), 2)
+    # Gauges stay per process
+    assert "signboard_stage_inflight" not in parent.render_prometheus()
+
+
+def test_snapshot_reset_clears_samples():
+    reg = MetricsRegistry()
+    reg.inc(CACHE_REQUESTS)
+    assert reg.snapshot(reset=True)["counters"]
+    assert reg.snapshot() == {"counters": {}, "histograms": {}}
+
+
+def test_merge_sums_worker_samples(registry):
+    with ProcessPoolExecutor(max_workers=2, initializer=metrics.reset) as pool:
+        results = []
+        for result, samples in pool.map(metrics.collect, [work] * 4, range(4)):
+            results.append(result)
+            metrics.merge(samples)
+    assert results == [0, 2, 4, 6]
+    assert metrics.counter(CACHE_REQUESTS, cache="ocr", result="miss") == 4
+    assert 'signboard_stage_seconds_count{stage="ocr"} 4' in metrics.render_prometheus()
+
+
+def test_summary_lists_stages(registry):
+    assert metrics.summary() == "No metrics recorded."
+    with metrics.stage("guidance"):
+        pass
+    metrics.inc(metrics.TRANSLATION_ERRORS)
+    summary = metrics.summary().splitlines()
+    assert summary[0].split()[:2] == ["stage", "count"]
+    assert summary[1].split()[:2] == ["guidance", "1"]
+    assert summary[2] == "signboard_translation_errors_total 1"
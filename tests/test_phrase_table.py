@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+from phrase_table import PhraseTable, compile_phrase_table, load_phrase_table
+
+PHRASES = """\
+# lang\tsource\ttranslation
+hi\tNO PARKING\tपार्किंग निषेध
+hi\tEXIT\tनिकास
+hi\tPLATFORM {0}\tप्लेटफ़ॉर्म {0}
+hi\tGATE {0} TO {1}\tगेट {0} से {1}
+fr\tEXIT\tSORTIE
+hi\tEXIT\tबाहर
+hi\tincomplete line
+"""
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "phrases.tsv"
+    path.write_text(PHRASES, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def table(source, tmp_path):
+    compiled = str(tmp_path / "out" / "phrases.bin")
+    compile_phrase_table(source, compiled)
+    return PhraseTable(compiled)
+
+
+def test_exact_lookup(table):
+    assert table.lookup("NO PARKING", "hi") == "पार्किंग निषेध"
+    assert table.lookup("  NO   PARKING ", "hi") == "पार्किंग निषेध"  # whitespace collapsed
+    assert table.report()["exact"] == 2
+
+
+def test_normalized_lookup_ignores_case_and_punctuation(table):
+    assert table.lookup("No-Parking!", "hi") == "पार्किंग निषेध"
+    assert table.lookup("no parking", "HI") == "पार्किंग निषेध"
+    assert table.report()["normalized"] == 2
+
+
+def test_template_lookup_fills_in_numbers(table):
+    assert table.lookup("Platform 12", "hi") == "प्लेटफ़ॉर्म 12"
+    assert table.lookup("GATE 3 TO B12", "hi") == "गेट 3 से B12"
+    assert table.lookup("PLATFORM", "hi") is None  # no number to fill in
+    assert table.report()["template"] == 2
+
+
+def test_languages_are_separate_and_later_lines_win(table):
+    assert table.lookup("EXIT", "fr") == "SORTIE"
+    assert table.lookup("EXIT", "hi") == "बाहर"
+    assert table.lookup("NO PARKING", "fr") is None
+
+
+def test_misses_are_counted_for_the_report(table, tmp_path):
+    for _ in range(3):
+        table.lookup("NO  ENTRY", "hi")
+    table.lookup("EXIT", "hi")
+    table.lookup("Platform 9", "hi", record=False)
+    report = table.report(top=5)
+    assert (report["lookups"], report["hits"], report["misses"]) == (4, 1, 3)
+    assert report["hit_rate"] == pytest.approx(0.25)
+    assert report["top_misses"] == [{"lang": "hi", "text": "NO ENTRY", "count": 3}]
+
+    misses_path = str(tmp_path / "misses.tsv")
+    assert table.write_misses(misses_path) == 1
+    with open(misses_path, encoding="utf-8") as f:
+        assert f.read().splitlines()[1] == "hi\tNO ENTRY\t"
+
+
+def test_rejects_files_that_are_not_compiled_tables(tmp_path, source):
+    with pytest.raises(ValueError):
+        PhraseTable(source)
+    empty = tmp_path / "empty.bin"
+    empty.write_bytes(b"")
+    with pytest.raises(ValueError):
+        PhraseTable(str(empty))
+
+
+def test_load_recompiles_when_the_source_changes(source, tmp_path):
+    compiled = str(tmp_path / "phrases.bin")
+    assert load_phrase_table(source, compiled).lookup("STOP", "hi") is None
+    with open(source, "a", encoding="utf-8") as f:
+        f.write("hi\tSTOP\tरुकें\n")
+    os.utime(source, (os.path.getmtime(compiled) + 10,) * 2)
+    assert load_phrase_table(source, compiled).lookup("STOP", "hi") == "रुकें"
+
+
+def test_shipped_phrase_file_compiles(tmp_path):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    compiled = str(tmp_path / "signage.bin")
+    assert compile_phrase_table(os.path.join(root, "signage_phrases.tsv"), compiled) > 0
+    assert len(PhraseTable(compiled)) > 0
@@ -0,0 +1,116 @@
+import cv2
+import numpy as np
+import pytest
+
+from preprocess import (CAMERA_GRAY_PIPELINE, CAMERA_PIPELINE, DENOISE_PIPELINES, OCR_PIPELINE,
+                        FramePreprocessor, Pipeline, ProcessedImage, stage)
+
+
+def photo(height=240, width=320, seed=0) -> np.ndarray:
+    """Noisy color frame with some text on it."""
+    rng = np.random.default_rng(seed)
+    img = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    img = cv2.GaussianBlur(img, (7, 7), 0)
+    cv2.putText(img, "EXIT 12", (10, height // 2), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 0), 3)
+    return img
+
+
+def names(applied) -> list:
+    return [st.name for st in applied]
+
+
+def test_stage_rejects_unknown_names():
+    with pytest.raises(ValueError, match="Unknown preprocessing stage: blur"):
+        stage("blur")
+
+
+def test_run_records_applied_stages():
+    img = photo()
+    result = OCR_PIPELINE.run(img)
+    assert isinstance(result, ProcessedImage)
+    assert names(result.applied) == ["grayscale", "nlmeans", "sharpen", "adaptive_threshold"]
+    # Contrast on a binarized image is skipped
+    assert set(np.unique(result.image)) <= {0, 255}
+    assert OCR_PIPELINE.describe()[1] == ["nlmeans", {"h": 10}]
+
+
+def test_second_pipeline_skips_work_already_done():
+    img = photo()
+    denoised = DENOISE_PIPELINES["gaussian"].run(img)
+    result = OCR_PIPELINE.run(denoised)
+    # Already denoised: NL-means is not run again
+    assert names(result.applied) == ["grayscale", "gaussian_blur", "sharpen", "adaptive_threshold"]
+    expected = Pipeline([stage("sharpen"), stage("adaptive_threshold", block_size=31, c=10)]).run(
+        denoised.image).image
+    assert np.array_equal(result.image, expected)
+
+    # Running the same pipeline twice is a no-op the second time
+    again = OCR_PIPELINE.run(result)
+    assert again.applied == result.applied
+    assert again.image is result.image
+
+
+def test_plain_array_with_applied_stages():
+    gray = cv2.cvtColor(photo(), cv2.COLOR_BGR2GRAY)
+    binary = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY)[1]
+    result = OCR_PIPELINE.run(binary, applied=(stage("adaptive_threshold"),))
+    assert result.image is binary
+
+
+def test_contrast_below_one_still_runs_after_threshold():
+    pipeline = Pipeline([stage("adaptive_threshold"), stage("contrast", factor=0.5)])
+    result = pipeline.run(cv2.cvtColor(photo(), cv2.COLOR_BGR2GRAY))
+    assert names(result.applied) == ["adaptive_threshold", "contrast"]
+
+
+def test_then_concatenates():
+    combined = DENOISE_PIPELINES["gaussian"].then(OCR_PIPELINE)
+    assert len(combined.stages) == 7
+    assert repr(DENOISE_PIPELINES["gaussian"]) == "Pipeline(['grayscale', 'gaussian_blur'])"
+
+
+FRAME_PIPELINES = {
+    "camera": CAMERA_PIPELINE,
+    "camera_gray": CAMERA_GRAY_PIPELINE,
+    "gaussian": DENOISE_PIPELINES["gaussian"],
+    "contrast": Pipeline([stage("grayscale"), stage("gaussian_blur", ksize=3), stage("contrast", factor=1.7)]),
+    "low_contrast": Pipeline([stage("grayscale"), stage("contrast", factor=0.6), stage("sharpen")]),
+    "threshold_fractional_c": Pipeline([stage("grayscale"), stage("median_blur", ksize=5),
+                                        stage("adaptive_threshold", block_size=15, c=7.5)]),
+    "threshold_then_contrast": Pipeline([stage("grayscale"), stage("adaptive_threshold"),
+                                         stage("contrast")]),
+}
+
+
+@pytest.mark.parametrize("name", FRAME_PIPELINES)
+@pytest.mark.parametrize("channels", [3, 4, 1])
+def test_frame_preprocessor_matches_pipeline(name, channels):
+    pipeline = FRAME_PIPELINES[name]
+    runner = FramePreprocessor(pipeline)
+    for seed, size in enumerate([(240, 320), (240, 320), (121, 203)]):
+        frame = photo(*size, seed=seed)
+        if channels == 4:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
+        elif channels == 1:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        expected = pipeline.run(frame).image
+        result = runner.run(frame)
+        assert result.dtype == expected.dtype
+        assert np.array_equal(result, expected)
+
+
+def test_frame_preprocessor_reuses_buffers():
+    runner = FramePreprocessor(CAMERA_PIPELINE)
+    first = runner.run(photo(seed=1))
+    kept = first.copy()
+    second = runner.run(photo(seed=2))
+    assert second is first
+    assert not np.array_equal(second, kept)
+
+
+def test_frame_preprocessor_rejects_unsupported_stages():
+    with pytest.raises(ValueError, match="does not support stages: nlmeans"):
+        FramePreprocessor(OCR_PIPELINE)
+    # Pipeline.run() would blur the color frame, not its grayscale version
+    with pytest.raises(ValueError, match="starts with grayscale"):
+        FramePreprocessor(Pipeline([stage("median_blur"), stage("adaptive_threshold")]))
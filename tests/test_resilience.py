@@ -0,0 +1,176 @@
+import pickle
+
+import pytest
+
+import resilience
+from resilience import (CircuitBreaker, CircuitOpenError, Deadline, DeadlineExceeded,
+                        check_deadline, get_breaker, time_left)
+
+
+class Clock:
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    return clock
+
+
+def fail():
+    raise ConnectionError("backend down")
+
+
+def test_deadline_counts_down(clock):
+    deadline = Deadline(5)
+    clock.now += 2
+    assert deadline.remaining() == pytest.approx(3)
+    assert deadline.timeout(cap=1) == 1
+    assert not deadline.expired()
+    deadline.check("ocr")
+    clock.now += 3
+    assert deadline.expired()
+    assert deadline.remaining() == 0.0
+    with pytest.raises(DeadlineExceeded, match="exceeded in ocr"):
+        deadline.check("ocr")
+
+
+def test_deadline_after_treats_zero_and_none_as_no_deadline():
+    assert Deadline.after(None) is None
+    assert Deadline.after(0) is None
+    assert isinstance(Deadline.after(1), Deadline)
+
+
+def test_helpers_accept_no_deadline():
+    check_deadline(None, "ocr")
+    assert time_left(None) is None
+    assert time_left(None, cap=5) == 5
+
+
+def test_deadline_pickles_as_time_left(clock):
+    deadline = Deadline(10)
+    clock.now += 4
+    data = pickle.dumps(deadline)
+    clock.now += 100  # the receiving process' clock is unrelated
+    restored = pickle.loads(data)
+    assert restored.seconds == 10
+    assert restored.remaining() == pytest.approx(6)
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+    assert breaker.call(lambda: "ok") == "ok"  # a success resets the count
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "not called")
+    assert breaker.retry_after() == pytest.approx(30)
+
+
+def test_breaker_half_open_probe_closes_on_success(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30, half_open_probes=2)
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    clock.now += 30
+    assert breaker.state == "half_open"
+    assert breaker.allow() and breaker.allow()
+    assert not breaker.allow()  # only two probes
+    breaker.record_success()
+    assert breaker.state == "half_open"
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_breaker_half_open_probe_reopens_on_failure(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    clock.now += 30
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == "open"
+    assert breaker.retry_after() == pytest.approx(30)
+
+
+def test_released_probe_can_be_retried(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_deadline_exceeded_is_not_a_backend_failure(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+
+    def out_of_time():
+        raise Deadline(1).exceeded("translate")
+
+    for _ in range(3):
+        with pytest.raises(DeadlineExceeded):
+            breaker.call(out_of_time)
+    assert breaker.state == "closed"
+
+    breaker.record_failure()
+    clock.now += 30
+    with pytest.raises(DeadlineExceeded):
+        breaker.call(out_of_time)  # the probe is given back, not failed
+    assert breaker.state == "half_open"
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == "closed"
+
+
+def test_breaker_validates_settings():
+    with pytest.raises(ValueError):
+        CircuitBreaker("test", failure_threshold=0)
+
+
+def test_get_breaker_reads_the_environment(monkeypatch):
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setenv("DEMO_BREAKER_FAILURES", "2")
+    monkeypatch.setenv("DEMO_BREAKER_RESET", "7")
+    breaker = get_breaker("demo")
+    assert (breaker.failure_threshold, breaker.reset_timeout, breaker.half_open_probes) == (2, 7.0, 1)
+    assert get_breaker("demo") is breaker
+
+
+def test_async_translation_cut_short_by_the_deadline_keeps_the_breaker_closed():
+    import asyncio
+    from async_translate import AsyncTranslator
+
+    breaker = CircuitBreaker("test", failure_threshold=1)
+
+    async def run():
+        client = AsyncTranslator(breaker=breaker, use_memory=False, use_local=False)
+
+        async def slow(segments, dest, src):
+            await asyncio.sleep(1)
+
+        async def broken(segments, dest, src):
+            raise ConnectionError("backend down")
+
+        try:
+            client._request_batch = slow
+            with pytest.raises(DeadlineExceeded):
+                await client.translate("NO PARKING", "hi", deadline=Deadline(0.05))
+            assert breaker.state == "closed"
+            client._request_batch = broken
+            with pytest.raises(ConnectionError):
+                await client.translate("NO PARKING", "hi", deadline=Deadline(5))
+            assert breaker.state == "open"
+        finally:
+            await client.aclose()
+
+    asyncio.run(run())
@@ -0,0 +1,87 @@
+import numpy as np
+
+from resilience import Deadline
+from stage_cache import StageCache, get_stage_cache, upload_digest
+
+
+def test_key_depends_on_inputs_and_params():
+    key = StageCache.key("denoise", "decode:abc", method="nlmeans")
+    assert key.startswith("denoise:")
+    assert StageCache.key("denoise", "decode:abc", method="nlmeans") == key
+    assert StageCache.key("denoise", "decode:abc", method="gaussian") != key
+    assert StageCache.key("denoise", "decode:def", method="nlmeans") != key
+
+
+def test_cached_computes_once():
+    stages = StageCache()
+    calls = []
+    compute = lambda: calls.append(1) or "NO PARKING"
+    assert stages.cached("ocr:a", compute) == "NO PARKING"
+    assert stages.cached("ocr:a", compute) == "NO PARKING"
+    assert len(calls) == 1
+    assert (stages.stats["hits"], stages.stats["misses"]) == (1, 1)
+
+
+def test_failed_stage_is_not_cached():
+    stages = StageCache()
+
+    def fail():
+        raise RuntimeError("down")
+
+    try:
+        stages.cached("translate:a", fail)
+    except RuntimeError:
+        pass
+    assert stages.peek("translate:a") is None
+    assert len(stages) == 0
+
+
+def test_result_computed_past_the_deadline_is_not_cached():
+    stages = StageCache()
+    expired = Deadline(0)
+    assert stages.cached("ocr:a", lambda: "NO PARK", deadline=expired) == "NO PARK"
+    assert stages.peek("ocr:a") is None
+    assert stages.cached("ocr:a", lambda: "NO PARKING", deadline=Deadline(60)) == "NO PARKING"
+    assert stages.peek("ocr:a") == "NO PARKING"
+
+
+def test_byte_bound_evicts_least_recently_used():
+    stages = StageCache(max_bytes=250)
+    img = np.zeros(100, np.uint8)  # 100 bytes
+    stages.put("a", img)
+    stages.put("b", img)
+    stages.cached("a", lambda: None)  # "b" is now the oldest
+    stages.put("c", img)
+    assert stages.peek("b") is None
+    assert stages.peek("a") is not None and stages.peek("c") is not None
+    assert stages.size_bytes == 200
+    assert stages.stats["evictions"] == 1
+
+
+def test_value_larger_than_the_bound_is_not_stored():
+    stages = StageCache(max_bytes=50)
+    stages.put("small", np.zeros(10, np.uint8))
+    stages.put("big", np.zeros(100, np.uint8))
+    assert stages.peek("big") is None
+    assert stages.peek("small") is not None
+
+
+def test_replacing_an_entry_updates_the_size():
+    stages = StageCache()
+    stages.put("a", np.zeros(100, np.uint8))
+    stages.put("a", np.zeros(30, np.uint8))
+    assert stages.size_bytes == 30
+    stages.clear()
+    assert (len(stages), stages.size_bytes) == (0, 0)
+
+
+def test_session_cache_is_created_once():
+    session = {}
+    stages = get_stage_cache(session, max_bytes=1024)
+    assert get_stage_cache(session) is stages
+    assert stages.max_bytes == 1024
+
+
+def test_upload_digest_accepts_buffers():
+    data = b"\xff\xd8\xff" + b"x" * 10
+    assert upload_digest(memoryview(data)) == upload_digest(data)
@@ -0,0 +1,58 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pytest
+
+from stage_executor import run_pipelined
+
+KEYS = {"image", "status", "extracted_text", "translated_text", "guidance", "error"}
+
+
+def ocr_job(path):
+    if path == "crash.png":
+        os._exit(1)
+    status = "no_text" if path == "blank.png" else "ok"
+    text = None if status == "no_text" else path.upper()
+    return {"image": path, "status": status, "extracted_text": text, "translated_text": None,
+            "guidance": None, "error": None}, None
+
+
+def translate(text, deadline):
+    if text == "BAD.PNG":
+        raise ConnectionError("backend down")
+    return text.lower()
+
+
+def run(images, restart=True, **kwargs):
+    results = []
+    new_pool = partial(ProcessPoolExecutor, max_workers=1)
+    with new_pool() as pool:
+        queues = run_pipelined(pool, images, ocr_job, translate, guide=lambda text: f"read {text}",
+                               on_result=results.append, max_inflight=1,
+                               restart_pool=new_pool if restart else None, **kwargs)
+    return {r["image"]: r for r in results}, queues
+
+
+def test_joins_stage_results():
+    results, queues = run(["a.png", "blank.png", "bad.png"], translation_workers=2)
+    assert results["a.png"] == {"image": "a.png", "status": "ok", "extracted_text": "A.PNG",
+                                "translated_text": "a.png", "guidance": "read A.PNG", "error": None}
+    assert results["blank.png"]["status"] == "no_text"
+    assert results["blank.png"]["guidance"] is None
+    assert results["bad.png"]["error"] == "Translate failed: backend down"
+    assert results["bad.png"]["guidance"] == "read BAD.PNG"
+    assert set(queues) == {"translate", "guidance"}
+
+
+@pytest.mark.parametrize("restart", [True, False])
+def test_worker_crash_is_recorded(restart):
+    results, _ = run(["a.png", "crash.png", "b.png", "c.png"], restart=restart)
+    assert len(results) == 4
+    assert all(set(r) == KEYS for r in results.values())
+    crashed = results["crash.png"]
+    assert crashed["status"] == "error"
+    assert crashed["error"].startswith("BrokenProcessPool: ")
+    assert results["a.png"]["status"] == "ok"
+    expected = "ok" if restart else "error"
+    assert [results[p]["status"] for p in ("b.png", "c.png")] == [expected, expected]
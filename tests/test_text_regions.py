@@ -0,0 +1,75 @@
+import cv2
+import numpy as np
+import pytest
+
+from text_regions import TextRegion, detect_text_regions, reading_order, regions_to_text
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+LINES = (("NO PARKING", (200, 300)), ("TOW AWAY ZONE", (200, 550)))
+
+
+def signboard(scale: float = 1.0) -> np.ndarray:
+    """A framed white sign with two lines of text on a flat background."""
+    img = np.full((1200, 1600, 3), (120, 140, 160), np.uint8)
+    cv2.rectangle(img, (100, 100), (1500, 700), (255, 255, 255), -1)
+    cv2.rectangle(img, (100, 100), (1500, 700), (0, 0, 0), 6)
+    for text, origin in LINES:
+        cv2.putText(img, text, origin, FONT, 3, (0, 0, 0), 6)
+    return cv2.resize(img, None, fx=scale, fy=scale) if scale != 1.0 else img
+
+
+def ink_box(text, origin, scale=1.0):
+    """Bounding box of the pixels drawn for a line of text."""
+    mask = np.zeros((1200, 1600), np.uint8)
+    cv2.putText(mask, text, origin, FONT, 3, 255, 6)
+    return tuple(int(v * scale) for v in cv2.boundingRect(mask))
+
+
+def contains(outer, inner) -> bool:
+    ox, oy, ow, oh = outer
+    ix, iy, iw, ih = inner
+    return ox <= ix and oy <= iy and ix + iw <= ox + ow and iy + ih <= oy + oh
+
+
+@pytest.mark.parametrize("scale", [1.0, 2.5])
+def test_detects_each_text_line(scale):
+    img = signboard(scale)
+    boxes = detect_text_regions(img)
+    assert len(boxes) == 2
+    ordered = [box for _, box in reading_order(boxes)]
+    for box, (text, origin) in zip(ordered, LINES):
+        assert contains(box, ink_box(text, origin, scale))
+        # The sign's border is not part of the line
+        assert box[2] < 1400 * scale and box[3] < 200 * scale
+    height, width = img.shape[:2]
+    assert all(x + w <= width and y + h <= height for x, y, w, h in boxes)
+
+
+def test_grayscale_and_bgra_input():
+    img = signboard()
+    expected = detect_text_regions(img)
+    assert detect_text_regions(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)) == expected
+    assert detect_text_regions(cv2.cvtColor(img, cv2.COLOR_BGR2BGRA)) == expected
+
+
+def test_no_regions_without_text():
+    assert detect_text_regions(np.full((600, 800), 200, np.uint8)) == []
+    frame = np.full((600, 800), 200, np.uint8)
+    cv2.rectangle(frame, (50, 50), (750, 550), 0, 4)
+    assert detect_text_regions(frame) == []
+
+
+def test_reading_order_groups_lines():
+    boxes = [(300, 110, 80, 40), (10, 200, 50, 30), (10, 100, 200, 50), (220, 205, 90, 30)]
+    assert reading_order(boxes) == [
+        (0, (10, 100, 200, 50)), (0, (300, 110, 80, 40)),
+        (1, (10, 200, 50, 30)), (1, (220, 205, 90, 30)),
+    ]
+    assert reading_order([]) == []
+
+
+def test_regions_to_text():
+    regions = [TextRegion((0, 0, 1, 1), "NO", 90.0, 0), TextRegion((5, 0, 1, 1), "PARKING", 88.0, 0),
+               TextRegion((0, 5, 1, 1), "", 0.0, 1), TextRegion((0, 9, 1, 1), "TOW AWAY", 80.0, 2)]
+    assert regions_to_text(regions) == "NO PARKING\nTOW AWAY"
+    assert regions_to_text([]) == ""
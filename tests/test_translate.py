@@ -0,0 +1,66 @@
+import pytest
+
+import translate
+from cache import LRUCache, TieredCache
+from translate import join_segments, split_segments, translate_text
+
+TEXT = "  NO  Parking\n\nno parking\n\tEXIT \nTOW-AWAY ZONE"
+
+
+class UpperBackend:
+    """Remote backend stand-in that upper-cases each line and records its calls."""
+
+    name = "upper"
+    remote = True
+    calls = []
+
+    def translate_segments(self, segments, target_lang, deadline=None):
+        self.calls.append(list(segments))
+        return [f"{target_lang}:{segment.upper()}" for segment in segments]
+
+
+@pytest.fixture
+def upper(monkeypatch):
+    UpperBackend.calls = []
+    monkeypatch.setitem(translate.TRANSLATION_BACKENDS, "upper", UpperBackend)
+    monkeypatch.setenv("TRANSLATION_BACKENDS", "upper")
+    monkeypatch.setattr(translate, "_backends", {})
+    monkeypatch.setattr(translate, "_memory", TieredCache(LRUCache(100), None))
+    return UpperBackend
+
+
+def test_split_segments_dedupes_lines():
+    layout, segments = split_segments(TEXT)
+    assert layout == [("  ", "no parking"), ("", None), ("", "no parking"), ("\t", "exit"),
+                      ("", "tow-away zone")]
+    assert segments == {"no parking": "NO Parking", "exit": "EXIT", "tow-away zone": "TOW-AWAY ZONE"}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("EXIT", "EXIT"),
+    ("\n\nEXIT\n\n", "\n\nEXIT\n\n"),
+    ("  A\n    B\n\tC", "  A\n    B\n\tC"),
+    # Whitespace inside and after a line is collapsed, indentation kept
+    ("  NO   PARKING  \r\nEXIT", "  NO PARKING\nEXIT"),
+    ("   \nEXIT", "\nEXIT"),
+])
+def test_split_join_round_trip(text, expected):
+    layout, segments = split_segments(text)
+    assert join_segments(layout, segments) == expected
+
+
+def test_duplicate_lines_share_a_translation():
+    layout, segments = split_segments(TEXT)
+    joined = join_segments(layout, {key: key.upper() for key in segments})
+    assert joined == "  NO PARKING\n\nNO PARKING\n\tEXIT\nTOW-AWAY ZONE"
+
+
+def test_translate_text_sends_unique_lines_once(upper):
+    assert translate_text(TEXT, "hi") == "  hi:NO PARKING\n\nhi:NO PARKING\n\thi:EXIT\nhi:TOW-AWAY ZONE"
+    assert upper.calls == [["NO Parking", "EXIT", "TOW-AWAY ZONE"]]
+
+    # Known lines come from the translation memory; only the new one is sent
+    assert translate_text("exit\nSTOP", "hi") == "hi:EXIT\nhi:STOP"
+    assert upper.calls[1:] == [["STOP"]]
+    assert translate_text("No Parking", "en") == "en:NO PARKING"
+    assert translate_text(" \n ", "hi") == "No text to translate"
@@ -1,14 +1,369 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import httpx
 from googletrans import Translator
 
+import metrics
+from cache import LRUCache, DiskStore, TieredCache
+from phrase_table import load_phrase_table
+from resilience import get_breaker, time_left
+
 translator = Translator()
 
-def translate_text(text: str, target_lang: str = "en") -> str:
-    """Translate text into the selected language."""
+# Upper bound on concurrent translation requests across all callers
+MAX_TRANSLATION_WORKERS = int(os.environ.get("TRANSLATION_WORKERS", "8"))
+# Client timeout per request, shortened to the time left when a deadline is given
+TRANSLATION_TIMEOUT = float(os.environ.get("TRANSLATION_TIMEOUT", "5"))
+# httpx timeout errors (googletrans pins httpx 0.13, which has no common base class)
+HTTP_TIMEOUT_ERRORS = (httpx.ConnectTimeout, httpx.ReadTimeout, httpx.WriteTimeout, httpx.PoolTimeout)
+
+_memory = None
+_memory_lock = threading.Lock()
+_local = threading.local()
+_executor = None
+_executor_lock = threading.Lock()
+_backends = {}
+_backends_lock = threading.Lock()
+
+DEFAULT_PHRASE_TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "signage_phrases.tsv")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize source text for translation memory lookups (case and whitespace)."""
+    return " ".join(text.split()).casefold()
+
+
+def memory_key(text: str, target_lang: str) -> str:
+    return f"{target_lang.lower()}|{normalize_text(text)}"
+
+
+def split_segments(text: str) -> tuple:
+    """Split OCR output into line segments for translation.
+
+    Returns:
+        (layout, segments): `layout` has one (indent, key) pair per input
+        line (key is None for blank lines); `segments` maps each unique
+        normalized key to the whitespace-collapsed line text to translate.
+    """
+    layout = []
+    segments = {}
+    for line in text.split("\n"):
+        segment = " ".join(line.split())
+        if not segment:
+            layout.append(("", None))
+            continue
+        key = normalize_text(segment)
+        segments.setdefault(key, segment)
+        layout.append((line[:len(line) - len(line.lstrip())], key))
+    return layout, segments
+
+
+def join_segments(layout: list, translations: dict) -> str:
+    """Reassemble translated segments in the original line layout."""
+    return "\n".join(indent + translations[key] if key else "" for indent, key in layout)
+
+
+def get_translation_memory() -> TieredCache:
+    """Return the shared translation memory (in-process LRU + on-disk tier).
+
+    Configured through environment variables:
+        TRANSLATION_CACHE_PATH: SQLite file for the persistent tier
+            (default: .cache/translations.sqlite; empty string = memory only)
+        TRANSLATION_CACHE_TTL: Seconds before an entry is re-translated (default: 30 days)
+        TRANSLATION_CACHE_ENTRIES: Entries kept in the in-process LRU (default: 4096)
+        TRANSLATION_PHRASES: Phrase file preloaded on first use (see preload_phrases)
+    """
+    global _memory
+    with _memory_lock:
+        if _memory is None:
+            ttl = float(os.environ.get("TRANSLATION_CACHE_TTL", str(30 * 24 * 3600)))
+            memory = LRUCache(int(os.environ.get("TRANSLATION_CACHE_ENTRIES", "4096")), ttl=ttl)
+            path = os.environ.get("TRANSLATION_CACHE_PATH", os.path.join(".cache", "translations.sqlite"))
+            disk = DiskStore(path, max_bytes=64 * 1024 * 1024, ttl=ttl) if path else None
+            _memory = TieredCache(memory, disk)
+            phrases = os.environ.get("TRANSLATION_PHRASES")
+            if phrases:
+                preload_phrases(phrases, _memory)
+        return _memory
+
+
+def preload_phrases(path: str, memory: TieredCache = None) -> int:
+    """Load known translations into the translation memory.
+
+    The file is tab-separated, one phrase per line:
+        <target_lang>\t<source text>\t<translation>
+    Blank lines and lines starting with '#' are ignored.
+
+    Returns:
+        Number of phrases loaded.
+    """
+    memory = memory or get_translation_memory()
+    count = 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) != 3:
+                continue
+            lang, source, translation = parts
+            memory.put(memory_key(source, lang), translation)
+            count += 1
+    return count
+
+
+def _get_translator() -> Translator:
+    """Translator for the current thread; googletrans clients are not shared across threads."""
+    t = getattr(_local, "translator", None)
+    if t is None:
+        t = translator if threading.current_thread() is threading.main_thread() else Translator()
+        _local.translator = t
+    return t
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_TRANSLATION_WORKERS,
+                                           thread_name_prefix="translate")
+        return _executor
+
+
+def _translate_batch(segments: list, target_lang: str, deadline=None) -> list:
+    """Translate several segments, in a single request when the backend allows it.
+
+    Raises:
+        DeadlineExceeded: If a request timed out because the deadline, not
+            TRANSLATION_TIMEOUT, ran out
+    """
+    client = _get_translator()
+
+    def request(text):
+        # The translator is per thread, so its HTTP client timeout can be set per call
+        timeout = time_left(deadline, TRANSLATION_TIMEOUT)
+        client.client.timeout = httpx.Timeout(max(timeout, 0.001))
+        try:
+            return client.translate(text, dest=target_lang)
+        except HTTP_TIMEOUT_ERRORS:
+            if timeout < TRANSLATION_TIMEOUT:
+                # Cut short by the request deadline, not by a slow backend:
+                # must not count against the circuit breaker
+                raise deadline.exceeded("translate")
+            raise
+
+    if len(segments) == 1:
+        return [request(segments[0]).text]
+
+    # One request for all lines; Google keeps line breaks, so split them back
+    joined = request("\n".join(segments)).text
+    parts = joined.split("\n") if joined else []
+    if len(parts) == len(segments):
+        return [part.strip() for part in parts]
+
+    # Line structure was not preserved; translate the segments one by one
+    return [t.text for t in request(segments)]
+
+
+class PhraseTableBackend:
+    """Offline backend: answers lines found in the compiled phrase table.
+
+    Lines it does not know are returned as None and fall through to the
+    next backend; lookups take microseconds, so it runs before the
+    translation memory.
+    """
+
+    name = "phrases"
+    remote = False
+
+    def __init__(self, path: str = None):
+        path = path or os.environ.get("TRANSLATION_PHRASE_TABLE") or DEFAULT_PHRASE_TABLE
+        if not os.path.exists(path):
+            raise RuntimeError(f"Phrase table not found: {path}")
+        try:
+            self.table = load_phrase_table(path)
+        except (OSError, ValueError) as e:
+            raise RuntimeError(f"Cannot load phrase table {path}: {e}")
+
+    def translate_segments(self, segments: list, target_lang: str, deadline=None) -> list:
+        results = [self.table.lookup(segment, target_lang) for segment in segments]
+        for value in results:
+            metrics.inc(metrics.CACHE_REQUESTS, cache="phrases", result="miss" if value is None else "hit")
+        return results
+
+
+class GoogleBackend:
+    """Network backend (googletrans); results are kept in the translation memory.
+
+    Calls go through the "google" circuit breaker (see resilience.py), and
+    each HTTP request times out after TRANSLATION_TIMEOUT seconds or when
+    the deadline expires, whichever comes first.
+    """
+
+    name = "google"
+    remote = True
+
+    def translate_segments(self, segments: list, target_lang: str, deadline=None) -> list:
+        return _translate_batch(segments, target_lang, deadline)
+
+
+TRANSLATION_BACKENDS = {
+    "phrases": PhraseTableBackend,
+    "google": GoogleBackend,
+}
+
+
+def get_translation_backends(names: str = None) -> list:
+    """Return the shared backend chain, tried in order for each line.
+
+    Args:
+        names: Comma-separated backend names (default: the
+            `TRANSLATION_BACKENDS` environment variable, else
+            'phrases,google'). In the default chain a backend that is not
+            available (e.g. no phrase file) is skipped.
+
+    Raises:
+        ValueError: If a backend name is unknown
+        RuntimeError: If an explicitly requested backend is not available
+    """
+    explicit = names or os.environ.get("TRANSLATION_BACKENDS")
+    names = [n.strip().lower() for n in (explicit or "phrases,google").split(",") if n.strip()]
+    for name in names:
+        if name not in TRANSLATION_BACKENDS:
+            raise ValueError(f"Unknown translation backend: {name}. Use {', '.join(TRANSLATION_BACKENDS)}.")
+
+    with _backends_lock:
+        key = tuple(names)
+        if key not in _backends:
+            chain = []
+            for name in names:
+                try:
+                    chain.append(TRANSLATION_BACKENDS[name]())
+                except RuntimeError:
+                    if explicit:
+                        raise
+            _backends[key] = chain
+        return _backends[key]
+
+
+def translate_local(segments: list, target_lang: str) -> list:
+    """Translate segments with the local (non-network) backends only; None where unknown."""
+    results = [None] * len(segments)
+    for backend in get_translation_backends():
+        if backend.remote:
+            continue
+        pending = [i for i, value in enumerate(results) if value is None]
+        if not pending:
+            break
+        for i, value in zip(pending, backend.translate_segments([segments[i] for i in pending], target_lang)):
+            results[i] = value
+    return results
+
+
+def phrase_report(top: int = 50) -> dict:
+    """Hit rate and most frequent misses of the phrase table (None if it is not in use)."""
+    for backend in get_translation_backends():
+        if isinstance(backend, PhraseTableBackend):
+            return backend.table.report(top)
+    return None
+
+
+def _translate_one(text: str, target_lang: str, deadline=None) -> str:
+    memory = get_translation_memory()
+    layout, segments = split_segments(text)
+
+    # Each backend only sees the unique segments earlier ones could not
+    # translate; remote results go through the translation memory, and
+    # remote calls fail fast when the deadline is spent or the backend's
+    # circuit breaker is open
+    translations = {}
+    remaining = list(segments)
+    for backend in get_translation_backends():
+        if not remaining:
+            break
+        if backend.remote:
+            missing = []
+            for key in remaining:
+                cached = memory.get(memory_key(segments[key], target_lang))
+                metrics.inc(metrics.CACHE_REQUESTS, cache="translation",
+                            result="miss" if cached is None else "hit")
+                if cached is not None:
+                    translations[key] = cached
+                else:
+                    missing.append(key)
+            remaining = missing
+            if not remaining:
+                break
+        try:
+            pending = [segments[key] for key in remaining]
+            if backend.remote:
+                if deadline is not None:
+                    deadline.check("translate")
+                translated = get_breaker(backend.name).call(
+                    backend.translate_segments, pending, target_lang, deadline=deadline)
+            else:
+                translated = backend.translate_segments(pending, target_lang)
+        except Exception as e:
+            # Errors are returned to the caller but never cached
+            metrics.inc(metrics.TRANSLATION_ERRORS)
+            return f"Translation Error: {e}"
+        unmatched = []
+        for key, value in zip(remaining, translated):
+            if value is None:
+                unmatched.append(key)
+                continue
+            translations[key] = value or ""
+            if value and backend.remote:
+                memory.put(memory_key(segments[key], target_lang), value)
+        remaining = unmatched
+
+    # No backend knew these lines (e.g. offline with phrases only): keep the source text
+    for key in remaining:
+        translations[key] = segments[key]
+    return join_segments(layout, translations)
+
+
+def iter_translations(text: str, target_langs, deadline=None):
+    """Translate text into several languages concurrently.
+
+    Yields (target_lang, translated_text) pairs in completion order, so
+    callers can show each result as soon as it arrives. Requests run on a
+    shared pool of at most MAX_TRANSLATION_WORKERS threads.
+    """
     if not text.strip():
-        return "No text to translate"
+        for lang in target_langs:
+            yield lang, "No text to translate"
+        return
 
-    try:
-        translated = translator.translate(text, dest=target_lang)
-        return translated.text
-    except Exception as e:
-        return f"Translation Error: {e}"
\ No newline at end of file
+    executor = _get_executor()
+    futures = {executor.submit(_translate_one, text, lang, deadline): lang
+               for lang in dict.fromkeys(target_langs)}
+    for future in as_completed(futures):
+        yield futures[future], future.result()
+
+
+@metrics.stage("translate")
+def translate_text(text: str, target_lang="en", deadline=None):
+    """Translate text into the selected language.
+
+    The text is split into lines; unique lines go through the backend chain
+    (see get_translation_backends): known signage phrases are answered
+    offline from the phrase table, and only the rest not already in the
+    translation memory are sent (batched into one request). The result
+    keeps the original line layout.
+
+    `target_lang` may also be a list of language codes, in which case the
+    targets are translated concurrently and a {lang: text} dict is returned.
+
+    With a `deadline` (resilience.Deadline), network requests time out when
+    it expires. If it is already spent, or the backend's circuit breaker is
+    open after repeated failures, lines not answered locally are not sent
+    and a 'Translation Error: ...' string is returned at once.
+    """
+    if not isinstance(target_lang, str):
+        return dict(iter_translations(text, target_lang, deadline))
+
+    if not text.strip():
+        return "No text to translate"
+    return _translate_one(text, target_lang, deadline)
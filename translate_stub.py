@@ -0,0 +1,111 @@
+"""
+Local stand-in for the Google Translate web endpoint, for offline load tests.
+
+Serves GET /translate_a/single in the same JSON shape as the real endpoint
+(the translation is each input line prefixed with the target language), with
+configurable latency and a requests-per-second limit that answers 429.
+
+Run with: python translate_stub.py --port 8765 --latency 0.05 --max-rps 50
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class _RateLimiter:
+    """Token bucket shared by all handler threads."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        if self.rate <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+def make_handler(latency: float = 0.0, jitter: float = 0.0, max_rps: float = 0.0, error_rate: float = 0.0):
+    """Build a request handler class with the given behavior."""
+    limiter = _RateLimiter(max_rps)
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so client connection pooling is exercised
+        # Headers and body are separate writes; without this, Nagle plus delayed
+        # ACKs add ~40 ms to every keep-alive response
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/translate_a/single":
+                self._send(404, {"error": "not found"})
+                return
+
+            if not limiter.allow() or random.random() < error_rate:
+                self._send(429, {"error": "rate limited"}, {"Retry-After": "1"})
+                return
+
+            time.sleep(latency + random.uniform(0, jitter))
+            params = parse_qs(url.query)
+            text = params.get("q", [""])[0]
+            dest = params.get("tl", ["en"])[0]
+            src = params.get("sl", ["auto"])[0]
+            # Like the real endpoint, line breaks in the input are kept in the output
+            translated = "\n".join(f"[{dest}] {line}" for line in text.split("\n"))
+            self._send(200, [[[translated, text, None, None, 1]], None, src if src != "auto" else "en"])
+
+        def _send(self, status: int, body, headers: dict = None):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass  # keep load tests quiet
+
+    return StubHandler
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, **behavior) -> ThreadingHTTPServer:
+    """Start the stub server in a background thread and return it (call .shutdown() to stop)."""
+    server = ThreadingHTTPServer((host, port), make_handler(**behavior))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub of the Google Translate endpoint")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port (default: 8765)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Base response latency in seconds (default: 0.05)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Extra random latency in seconds (default: 0.02)")
+    parser.add_argument("--max-rps", type=float, default=0.0, help="Requests/sec before answering 429 (default: unlimited)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests randomly answered 429")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port),
+                                 make_handler(args.latency, args.jitter, args.max_rps, args.error_rate))
+    print(f"Translate stub listening on http://{args.host}:{args.port}/translate_a/single")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
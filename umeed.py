@@ -2,11 +2,13 @@
 import streamlit as st
 import cv2
 from PIL import Image
-import pytesseract
-from googletrans import Translator
 import numpy as np
-
-translator = Translator()
+from ocr import ocr_best_psm
+from translate import iter_translations
+from guidance import is_alert
+from stage_cache import get_stage_cache, upload_digest
+from resilience import request_deadline
+from image_io import decode_image
 
 st.set_page_config(page_title="OCR + Translator", layout="wide")
 st.title("📄 OCR + Multi-language Translator")
@@ -16,36 +18,51 @@ st.title("📄 OCR + Multi-language Translator")
 # ---------------------------
 uploaded_file = st.file_uploader("Upload an image", type=["png", "jpg", "jpeg"])
 if uploaded_file:
-    img = Image.open(uploaded_file).convert("RGB")
-    img_np = np.array(img)
+    # Picking languages reruns the script; keep decode, preprocessing and OCR
+    # of this upload in the session's stage cache
+    stages = get_stage_cache(st.session_state)
+    # Time budget for the stages this rerun has to compute (REQUEST_DEADLINE)
+    deadline = request_deadline()
+    upload_key = stages.key("upload", upload_digest(uploaded_file.getbuffer()))
+    # Decoded from memory and turned upright according to its EXIF orientation
+    def decode():
+        bgr = decode_image(uploaded_file.getbuffer())
+        return None if bgr is None else cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+
+    img_np = stages.cached(stages.key("decode", upload_key), decode)
+    if img_np is None:
+        st.error("Failed to read image file")
+        st.stop()
     st.subheader("Original Image")
     st.image(img_np, use_column_width=True)
 
     # ---------------------------
     # 2. Preprocess Image
     # ---------------------------
-    gray = cv2.cvtColor(img_np, cv2.COLOR_RGB2GRAY)
-    denoised = cv2.fastNlMeansDenoising(gray, h=10)
-    thresh = cv2.adaptiveThreshold(
-        denoised, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-        cv2.THRESH_BINARY, 31, 10
-    )
-    pil_img = Image.fromarray(thresh)
-    pil_img = pil_img.resize((pil_img.width*2, pil_img.height*2), Image.LANCZOS)
+    def preprocess():
+        gray = cv2.cvtColor(img_np, cv2.COLOR_RGB2GRAY)
+        denoised = cv2.fastNlMeansDenoising(gray, h=10)
+        thresh = cv2.adaptiveThreshold(
+            denoised, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+            cv2.THRESH_BINARY, 31, 10
+        )
+        pil_img = Image.fromarray(thresh)
+        pil_img = pil_img.resize((pil_img.width*2, pil_img.height*2), Image.LANCZOS)
+        return np.array(pil_img)
+
+    preprocess_key = stages.key("preprocess", upload_key)
+    processed = stages.cached(preprocess_key, preprocess)
 
     st.subheader("Processed Image for OCR")
-    st.image(np.array(pil_img), use_column_width=True)
+    st.image(processed, use_column_width=True)
 
     # ---------------------------
     # 3. OCR
     # ---------------------------
-    custom_configs = [r'--oem 3 --psm 3', r'--oem 3 --psm 6', r'--oem 3 --psm 11']
-    extracted_text = ""
-    for config in custom_configs:
-        text = pytesseract.image_to_string(pil_img, config=config).strip()
-        if text:
-            extracted_text = text
-            break
+    # The primary PSM mode runs first; the others only if it is not confident
+    # Text cut short by the deadline is shown but not memoized
+    extracted_text = stages.cached(stages.key("ocr", preprocess_key),
+                                   lambda: ocr_best_psm(processed, deadline=deadline).text, deadline=deadline)
 
     st.subheader("Extracted Text")
     st.text(extracted_text if extracted_text else "No text detected")
@@ -74,13 +91,24 @@ if uploaded_file:
 
         if selected_langs:
             st.subheader("Translations")
-            for idx, lang_name in enumerate(selected_langs):
+            # One placeholder per language, filled in as each translation arrives
+            slots = {}
+            missing = []
+            for lang_name in selected_langs:
                 lang_code = languages[lang_name]
-                try:
-                    translated = translator.translate(extracted_text, dest=lang_code)
-                    text = translated.text
-                    if any(word in text.lower() for word in ["danger", "stop", "warning"]):
+                slots[lang_code] = (lang_name, st.empty())
+                cached = stages.peek(stages.key("translate", extracted_text, lang=lang_code))
+                if cached is None:
+                    missing.append(lang_code)
+                    slots[lang_code][1].markdown(f"**{lang_name} ({lang_code}):** _translating..._")
+                else:
+                    slots[lang_code][1].markdown(f"**{lang_name} ({lang_code}):** {cached}")
+
+            # Only languages not shown before in this session are translated
+            for lang_code, text in iter_translations(extracted_text, missing, deadline=deadline):
+                lang_name, slot = slots[lang_code]
+                if not text.startswith("Translation Error"):
+                    if is_alert(text):
                         text = "⚠️ " + text
-                    st.markdown(f"**{lang_name} ({lang_code}):** {text}")
-                except Exception as e:
-                    st.markdown(f"**{lang_name} ({lang_code}):** Translation Error - {e}")
+                    stages.put(stages.key("translate", extracted_text, lang=lang_code), text)
+                slot.markdown(f"**{lang_name} ({lang_code}):** {text}")